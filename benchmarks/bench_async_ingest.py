@@ -0,0 +1,69 @@
+"""Async ingestion against a faulty local BLS stub.
+
+The stub adds latency jitter, fails ``--error-rate`` of requests with a
+5xx and answers 429 above ``--server-limit`` requests per second. The
+threaded ``fetch_series`` (which stops at the first failed payload) runs
+first, then ``async_ingestion.ingest`` with its client-side sliding-window
+limiter set to ``--rate`` requests per second.
+
+    python -m benchmarks.bench_async_ingest --series 1000 --error-rate 0.1
+"""
+import argparse
+import time
+
+from benchmarks.bls_stub import FaultyHandler, start_stub
+from vet_analysis.async_ingestion import DailyQuota, RetryPolicy, SlidingWindowLimiter, ingest
+from vet_analysis.ingestion import BLSRequestError, fetch_series
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--series', type=int, default=1000)
+    parser.add_argument('--start-year', type=int, default=1985)
+    parser.add_argument('--end-year', type=int, default=2024)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--jitter', type=float, default=0.3)
+    parser.add_argument('--error-rate', type=float, default=0.1)
+    parser.add_argument('--server-limit', type=int, default=20,
+                        help="requests per second before the stub answers 429")
+    parser.add_argument('--rate', type=int, default=15,
+                        help="client limit in requests per second")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--timeout', type=float, default=5.0)
+    args = parser.parse_args()
+
+    handler = FaultyHandler.configure(jitter=args.jitter, error_rate=args.error_rate,
+                                      rate_limit=args.server_limit, seed=0)
+    server, url = start_stub(args.latency, handler)
+    series_ids = [f"LNS{14049526 + i:08d}" for i in range(args.series)]
+    try:
+        t0 = time.perf_counter()
+        try:
+            rows = len(fetch_series(series_ids, args.start_year, args.end_year, api_key='stub',
+                                    url=url, max_workers=args.concurrency))
+            outcome = f"{rows} rows"
+        except BLSRequestError as e:
+            outcome = f"aborted: {e}"
+        print(f"threaded fetch_series   {time.perf_counter() - t0:7.2f}s  {outcome}")
+
+        handler.state['stats'].clear()
+        report = ingest(series_ids, args.start_year, args.end_year, api_key='stub', url=url,
+                        concurrency=args.concurrency, timeout=args.timeout,
+                        limiter=SlidingWindowLimiter(args.rate, window=1.0),
+                        quota=DailyQuota(10 ** 6),
+                        retry=RetryPolicy(max_attempts=6, base_delay=0.25), seed=0)
+    finally:
+        server.shutdown()
+
+    print(f"async ingest            {report.elapsed:7.2f}s  {len(report.frame)} rows, "
+          f"{report.requests} requests, {report.retries} retries, "
+          f"{len(report.failures)} failed payloads")
+    print(f"  throughput {len(report.frame) / report.elapsed:,.0f} rows/s, "
+          f"server responses {dict(sorted(handler.state['stats'].items()))}")
+    for failure in report.failures[:5]:
+        print(f"  failed {len(failure.series_ids)} series {failure.start_year}-"
+              f"{failure.end_year} after {failure.attempts} attempts: {failure.error}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Aggregate cube queries against the groupbys they replace.
+
+Builds a long observation table of ``--series`` monthly series over
+``--months`` months, materializes an ``AggregateCube`` from it, and times
+the dashboard queries both ways: yearly means per series, a mean over a
+window of years, and one series-year cell. Then times ``update`` with one
+new month for every series against rebuilding the cube.
+
+    python -m benchmarks.bench_cube --series 5000 --months 600
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from vet_analysis.cleaning import FREQS, to_periods
+from vet_analysis.cube import AggregateCube
+
+
+def synthetic_table(series, months, start=0, seed=0):
+    rng = np.random.default_rng(seed)
+    codes = np.repeat(np.arange(series), months)
+    ordinals = np.tile(np.arange(start, start + months), series)
+    ids = [f"S{i:06d}" for i in range(series)]
+    return pd.DataFrame({
+        'series_id': pd.Categorical.from_codes(codes, categories=ids),
+        'period': to_periods(ordinals),
+        'freq': pd.Categorical.from_codes(np.zeros(len(codes), dtype='int8'), categories=FREQS),
+        'year': (ordinals // 12 + 1970).astype('int16'),
+        'value': rng.uniform(0, 20, len(codes)),
+    })
+
+
+def timed(label, fn, repeat=1):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    print(f"{label:<44} {(time.perf_counter() - t0) / repeat * 1000:10.3f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--series', type=int, default=5000)
+    parser.add_argument('--months', type=int, default=600)
+    args = parser.parse_args()
+
+    table = synthetic_table(args.series, args.months)
+    sid, year = table['series_id'].cat.categories[args.series // 2], 2000
+    print(f"{len(table):,} rows, {args.series:,} series")
+    cube = timed("build cube", lambda: AggregateCube.from_observations(table))
+
+    print("\nyearly means per series")
+    timed("  groupby", lambda: table.groupby(['year', 'series_id'], observed=True)['value']
+          .mean().unstack())
+    cube._cache.clear()
+    timed("  cube.frame (first call)", lambda: cube.frame('year'))
+    timed("  cube.frame (cached)", lambda: cube.frame('year'), repeat=100)
+
+    print("\nmean over 2000-2002 per series")
+    timed("  groupby over isin(years)", lambda: table[table['year'].isin([2000, 2001, 2002])]
+          .groupby('series_id', observed=True)['value'].mean())
+    timed("  cube.window", lambda: cube.window('year', 2000, 2002), repeat=100)
+
+    print("\none series-year cell")
+    timed("  boolean filter + mean", lambda: table.loc[
+        (table['series_id'] == sid) & (table['year'] == year), 'value'].mean())
+    timed("  cube.lookup", lambda: cube.lookup(sid, 'year', year), repeat=1000)
+
+    print("\none new month for every series")
+    new = synthetic_table(args.series, 1, start=args.months, seed=1)
+    timed("  cube.update", lambda: cube.update(new))
+    full = pd.concat([table, new], ignore_index=True)
+    timed("  rebuild", lambda: AggregateCube.from_observations(full))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Wall-clock comparison of the batched fetcher against one request per series.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_fetch --series 40 --latency 0.25
+"""
+import argparse
+import time
+
+import pandas as pd
+import requests
+
+from benchmarks.bls_stub import start_stub
+from vet_analysis.ingestion import MAX_YEARS_REGISTERED, fetch_series, year_windows
+
+
+def fetch_one_at_a_time(series_ids, start_year, end_year, url):
+    """The original notebook approach: one blocking POST per series.
+
+    A request may span at most 20 years, so longer ranges take one request
+    per 20-year window per series.
+    """
+    frames = []
+    for sid in series_ids:
+        records = []
+        for lo, hi in year_windows(start_year, end_year, MAX_YEARS_REGISTERED):
+            payload = {"seriesid": [sid], "startyear": str(lo),
+                       "endyear": str(hi), "registrationkey": "stub"}
+            res = requests.post(url, json=payload,
+                                headers={'Content-Type': 'application/json'})
+            for series in res.json()['Results']['series']:
+                for item in series['data']:
+                    records.append({'year': item['year'], 'period': item['period'],
+                                    'value': item['value']})
+        frames.append(pd.DataFrame(records).assign(series_id=sid))
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--series', type=int, default=40)
+    parser.add_argument('--start-year', type=int, default=1985)
+    parser.add_argument('--end-year', type=int, default=2024)
+    parser.add_argument('--latency', type=float, default=0.25)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    server, url = start_stub(latency=args.latency)
+    series_ids = [f"LNS{14049526 + i:08d}" for i in range(args.series)]
+    try:
+        t0 = time.perf_counter()
+        seq = fetch_one_at_a_time(series_ids, args.start_year, args.end_year, url)
+        t_seq = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batched = fetch_series(series_ids, args.start_year, args.end_year,
+                               api_key='stub', url=url, max_workers=args.workers)
+        t_batched = time.perf_counter() - t0
+    finally:
+        server.shutdown()
+
+    assert len(seq) == len(batched), f"row counts differ: {len(seq)} vs {len(batched)}"
+    print(f"{args.start_year}-{args.end_year}, {args.series} series")
+    print(f"one-at-a-time: {len(seq):>8} rows {t_seq:8.3f}s")
+    print(f"batched:       {len(batched):>8} rows {t_batched:8.3f}s "
+          f"({t_seq / t_batched:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Batched forecasting against one model fit per series.
+
+Fits seasonal-naive, Holt smoothing and ARX(12) with an exogenous series to
+``--series`` synthetic monthly series of ``--months`` months, once as one
+batched call and once looping over the series with the same functions,
+then times a warm-start ``update`` with one new month against a full refit.
+
+    python -m benchmarks.bench_forecast --series 500 --months 600
+"""
+import argparse
+import time
+
+import numpy as np
+
+from vet_analysis.forecasting import fit_arx, fit_smoothing, seasonal_naive
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--series', type=int, default=500)
+    parser.add_argument('--months', type=int, default=600)
+    parser.add_argument('--horizon', type=int, default=12)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    Y = 4 + np.cumsum(rng.normal(0, 0.1, (args.series, args.months + 1)), axis=1)
+    X = 2e8 + np.cumsum(rng.normal(0, 1e6, args.months + 1))
+    Y, y_new, X, x_new = Y[:, :-1], Y[:, -1:], X[:-1], X[-1:]
+    h = args.horizon
+
+    models = {
+        'seasonal_naive': lambda Y: seasonal_naive(Y, h),
+        'smoothing': lambda Y: fit_smoothing(Y).forecast(h),
+        'arx(12)': lambda Y: fit_arx(Y, X, lags=12).forecast(h),
+    }
+    print(f"{'model':<16} {'batched':>9} {'per-series':>11} {'speedup':>8}")
+    for name, model in models.items():
+        t_batch = timed(lambda: model(Y))
+        t_loop = timed(lambda: [model(Y[i:i + 1]) for i in range(len(Y))])
+        print(f"{name:<16} {t_batch:8.3f}s {t_loop:10.3f}s {t_loop / t_batch:7.1f}x")
+
+    smoothing, arx = fit_smoothing(Y), fit_arx(Y, X, lags=12)
+    full = np.hstack([Y, y_new])
+    print(f"\none new month for {args.series} series:")
+    print(f"  smoothing  update {timed(lambda: smoothing.update(y_new)):.4f}s"
+          f"  refit {timed(lambda: fit_smoothing(full)):.4f}s")
+    print(f"  arx(12)    update {timed(lambda: arx.update(y_new, x_new)):.4f}s"
+          f"  refit {timed(lambda: fit_arx(full, np.concatenate([X, x_new]), lags=12)):.4f}s")
+
+
+if __name__ == '__main__':
+    main()
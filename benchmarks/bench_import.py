@@ -0,0 +1,104 @@
+"""Import-time regression guard for the package.
+
+Imports each target in a fresh interpreter under ``python -X importtime``
+and reports the total cumulative import time and the heaviest top-level
+packages. Exits non-zero when a target pulls in a package it must not
+(e.g. seaborn on the data refresh path) or exceeds ``--budget`` seconds.
+``cli:`` targets run ``python -m vet_analysis`` with the given arguments
+(``--help``, so only the argument parsing runs), which catches imports
+made while building the parser rather than at module level.
+
+    python -m benchmarks.bench_import --budget 1.0
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+PLOTTING = {'matplotlib', 'seaborn', 'plotly', 'sklearn'}
+# loaded only by the command that needs them
+COMMAND_MODULES = {'vet_analysis.service', 'vet_analysis.cube', 'vet_analysis.pipeline'}
+
+CLI_PREFIX = 'cli:'
+CLI_CODE = """
+from vet_analysis.__main__ import main
+try:
+    main({args!r})
+except SystemExit:
+    pass
+"""
+
+# target -> top-level packages (or, when dotted, modules) it must not import
+TARGETS = {
+    'vet_analysis': PLOTTING | {'numpy', 'pandas', 'pyarrow', 'requests'},
+    'vet_analysis.__main__': PLOTTING | {'numpy', 'pandas', 'pyarrow', 'requests'},
+    'vet_analysis.sync': PLOTTING,
+    'vet_analysis.ingestion': PLOTTING,
+    'vet_analysis.cleaning': PLOTTING | {'requests'},
+    'vet_analysis.plotting': PLOTTING | {'requests'},
+    'vet_analysis.modelling': PLOTTING | {'requests'},
+    'cli: sync --help': PLOTTING | COMMAND_MODULES,
+    'cli: run --help': PLOTTING | COMMAND_MODULES,
+    'cli: serve --help': PLOTTING | COMMAND_MODULES,
+}
+
+
+def _code(target):
+    if target.startswith(CLI_PREFIX):
+        return CLI_CODE.format(args=target[len(CLI_PREFIX):].split())
+    return f'import {target}'
+
+
+def _importtime(code, python):
+    proc = subprocess.run([python, '-X', 'importtime', '-c', code],
+                          capture_output=True, text=True, check=True,
+                          env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'})
+    for line in proc.stderr.splitlines():
+        if line.startswith('import time:') and 'cumulative' not in line:
+            self_us, _, name = line[len('import time:'):].split('|')
+            yield name.strip(), int(self_us) / 1e6
+
+
+def importtime(target, python=sys.executable):
+    """``{top-level package: seconds}`` spent importing ``target``, and the modules.
+
+    Each module's self time is charged to its top-level package, leaving
+    out whatever the bare interpreter already imports at startup.
+    """
+    startup = {name for name, _ in _importtime('pass', python)}
+    totals, modules = defaultdict(float), set()
+    for name, seconds in _importtime(_code(target), python):
+        if name not in startup:
+            totals[name.split('.')[0]] += seconds
+            modules.add(name)
+    return dict(totals), modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--budget', type=float, default=1.0,
+                        help="maximum total import time per target in seconds")
+    parser.add_argument('--top', type=int, default=5)
+    parser.add_argument('targets', nargs='*', default=list(TARGETS))
+    args = parser.parse_args()
+
+    failed = False
+    for target in args.targets:
+        totals, modules = importtime(target)
+        total = sum(totals.values())
+        banned = sorted((set(totals) | modules) & TARGETS.get(target, set()))
+        heaviest = sorted(totals.items(), key=lambda kv: -kv[1])[:args.top]
+        status = 'ok'
+        if banned:
+            status = f"imports {', '.join(banned)}"
+        elif total > args.budget:
+            status = f"over budget ({args.budget:.2f}s)"
+        failed |= status != 'ok'
+        print(f"{target:<26} {total:7.3f}s  {status}")
+        print('    ' + '  '.join(f"{name} {t:.3f}s" for name, t in heaviest))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Micro-benchmark of period/date parsing on synthetic inputs.
+
+Compares the notebook's string operations (``str.replace('M', '')``,
+extended to the annual ``M13``/``Q05`` and quarterly ``Q01``-``Q04`` codes,
+and a double ``str.split('/')``) with the factorized parsers in
+``vet_analysis.cleaning``.
+
+    python -m benchmarks.bench_periods --rows 10000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from vet_analysis.cleaning import parse_bls_periods, parse_dates
+
+
+def synthetic_bls(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    years = rng.integers(1948, 2025, rows)
+    codes = np.array([f"M{m:02d}" for m in range(1, 14)] + [f"Q0{q}" for q in range(1, 6)])
+    return pd.Series(years.astype(str)), pd.Series(codes[rng.integers(0, len(codes), rows)])
+
+
+def string_periods(year, period):
+    """The notebook's per-row string approach, covering every supported code."""
+    kind, num = period.str[0], period.str[1:].astype(int)
+    annual = ((kind == 'M') & (num == 13)) | ((kind == 'Q') & (num == 5))
+    month = num.where(kind == 'M', num * 3).where(~annual, 12)
+    freq = kind.where(~annual, 'A')
+    return pd.to_numeric(year, errors='coerce'), month, freq
+
+
+def synthetic_dates(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    months = rng.integers(1, 13, rows)
+    years = rng.integers(1948, 2025, rows)
+    uniques = np.array([f"{m}/1/{y}" for y in range(1948, 2025) for m in range(1, 13)])
+    return pd.Series(uniques[(years - 1948) * 12 + months - 1])
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    fn()
+    print(f"{label:<32} {time.perf_counter() - t0:8.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    year, period = synthetic_bls(args.rows)
+    dates = synthetic_dates(args.rows)
+    print(f"{args.rows:,} rows")
+    timed("bls: string ops", lambda: string_periods(year, period))
+    timed("bls: parse_bls_periods", lambda: parse_bls_periods(year, period))
+    timed("fred: str.split x2", lambda: (
+        dates.str.split('/').str[0].astype(int), dates.str.split('/').str[-1].astype(int)))
+    timed("fred: parse_dates", lambda: parse_dates(dates))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Load test for the query service (``vet_analysis.service``).
+
+Serves a ``Snapshot`` over a synthetic cube of ``--series`` monthly series
+(or targets a running ``--url``) and drives it from ``--threads`` keep-alive
+clients for ``--duration`` seconds with a dashboard-like mix: one series at
+a level, window aggregates, metrics and the occasional Arrow response. A
+``--conditional`` share of requests resend the last ``ETag`` seen for that
+path. The local snapshot is swapped every ``--refresh-every`` seconds to
+show requests are not dropped during a refresh; ``--cache-entries 0``
+disables the response LRU for comparison.
+
+    python -m benchmarks.bench_service --threads 8 --duration 10
+"""
+import argparse
+import http.client
+import itertools
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from benchmarks.bench_cube import synthetic_table
+from vet_analysis.cube import AggregateCube
+from vet_analysis.service import QueryService, Snapshot, start_service
+
+
+def synthetic_loader(series, months):
+    """Loader alternating between two cubes so each refresh is a real swap."""
+    cubes = [AggregateCube.from_observations(synthetic_table(series, months, seed=seed))
+             for seed in (0, 1)]
+    turn = itertools.count()
+
+    def load():
+        i = next(turn) % 2
+        return Snapshot(cubes[i], {'correlation': [], 'evaluation': {}}, f"synthetic-{i}",
+                        time.time())
+    return load
+
+
+def query_mix(series_ids, seed=0):
+    rng = np.random.default_rng(seed)
+    while True:
+        sid = series_ids[rng.integers(len(series_ids))]
+        roll = rng.random()
+        if roll < 0.5:
+            level = ('month', 'year', 'fiscal_year')[rng.integers(3)]
+            yield f"/series/{sid}?level={level}"
+        elif roll < 0.8:
+            start = int(rng.integers(1975, 2010))
+            yield f"/window/year?start={start}&end={start + 5}"
+        elif roll < 0.9:
+            yield "/metrics"
+        else:
+            yield f"/series/{sid}?level=year&format=arrow"
+
+
+def client(url, series_ids, conditional, deadline, seed, latencies, statuses, errors):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    rng = np.random.default_rng(seed)
+    etags = {}
+    for path in query_mix(series_ids, seed):
+        if time.perf_counter() >= deadline:
+            break
+        headers = {}
+        if path in etags and rng.random() < conditional:
+            headers['If-None-Match'] = etags[path]
+        t0 = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException) as exc:
+            errors.append(repr(exc))
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - t0)
+        statuses[response.status] += 1
+        if response.getheader('ETag'):
+            etags[path] = response.getheader('ETag')
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', help="running service; default starts a local one")
+    parser.add_argument('--series', type=int, default=200)
+    parser.add_argument('--months', type=int, default=600)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--conditional', type=float, default=0.5)
+    parser.add_argument('--refresh-every', type=float, default=2.0)
+    parser.add_argument('--cache-entries', type=int, default=1024)
+    args = parser.parse_args()
+
+    service = server = None
+    series_ids = [f"S{i:06d}" for i in range(args.series)]
+    if args.url:
+        url = args.url.rstrip('/')
+    else:
+        service = QueryService(synthetic_loader(args.series, args.months),
+                               cache_entries=args.cache_entries)
+        server, url = start_service(service)
+        if args.refresh_every:
+            service.start_refresher(args.refresh_every)
+
+    latencies, statuses, errors = [], Counter(), []
+    deadline = time.perf_counter() + args.duration
+    workers = [threading.Thread(target=client, args=(
+        url, series_ids, args.conditional, deadline, seed, latencies, statuses, errors))
+        for seed in range(args.threads)]
+    t0 = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - t0
+
+    ms = np.asarray(latencies) * 1000
+    print(f"{url}: {args.threads} clients, {elapsed:.1f}s, cache entries {args.cache_entries}")
+    print(f"requests      {len(ms):>10,}   ({len(ms) / elapsed:,.0f}/s)")
+    if len(ms):
+        p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+        print(f"latency ms    p50 {p50:.2f}  p90 {p90:.2f}  p99 {p99:.2f}  max {ms.max():.2f}")
+    print("status        " + "  ".join(f"{k}: {v:,}" for k, v in sorted(statuses.items())))
+    print(f"errors        {len(errors)}")
+    if service is not None:
+        print(f"service       {service.stats}")
+        service.stop()
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
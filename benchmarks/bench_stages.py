@@ -0,0 +1,175 @@
+"""Benchmark suite for the analysis stages with a stored baseline.
+
+Scales the four files in ``data/`` up by ``--scale`` (that many copies of
+each BLS and FRED series with jittered values, and the spending history
+repeated) and runs each stage of the notebook's flow on the result under
+``vet_analysis.instrument``:
+
+    csv_parse   read the synthetic CSVs
+    coerce      normalize_bls / normalize_fred / normalize_fiscal
+    outliers    grouped IQR over every series
+    merge       lay every series onto the monthly panel
+    model       evaluate_regression on the panel
+    render      monthly_trend over every veteran series
+
+Wall times are compared with ``benchmarks/baseline.json``; a stage more
+than ``--tolerance`` times slower than its baseline is reported as a
+regression and the script exits non-zero.
+
+    python -m benchmarks.bench_stages --scale 100
+    python -m benchmarks.bench_stages --scale 100 --update-baseline
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from vet_analysis.cleaning import normalize_bls, normalize_fiscal, normalize_fred  # noqa: E402
+from vet_analysis.instrument import Instrumentation  # noqa: E402
+from vet_analysis.modelling import evaluate_regression  # noqa: E402
+from vet_analysis.outliers import detect_outliers  # noqa: E402
+from vet_analysis.panel import Panel  # noqa: E402
+from vet_analysis.plotting import monthly_trend  # noqa: E402
+from vet_analysis.store import SOURCE_FILES, SPENDING_SERIES, UNRATE_SERIES  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def scaled_sources(directory, scale, seed=0):
+    """Write ``scale`` jittered copies of each source into ``directory``."""
+    rng = np.random.default_rng(seed)
+    paths = {}
+    for sid in ('LNS13049526', 'LNS14049526'):
+        df = pd.read_csv(SOURCE_FILES[sid], dtype=str)
+        value = df['value'].astype(float).to_numpy()
+        copies = pd.DataFrame({
+            'series_id': np.repeat([f"{sid}_{i}" for i in range(scale)], len(df)),
+            'year': np.tile(df['year'], scale),
+            'period': np.tile(df['period'], scale),
+            'value': (np.tile(value, scale) * rng.normal(1, 0.05, scale * len(df))).round(1),
+        })
+        paths[sid] = os.path.join(directory, f"{sid}.csv")
+        copies.to_csv(paths[sid], index=False)
+
+    fred = pd.read_csv(SOURCE_FILES[UNRATE_SERIES])
+    wide = pd.DataFrame({'DATE': fred['DATE']})
+    for i in range(scale):
+        wide[f"UNRATE_{i}"] = (fred['UNRATE'] * rng.normal(1, 0.05, len(fred))).round(1)
+    paths[UNRATE_SERIES] = os.path.join(directory, 'unrate.csv')
+    wide.to_csv(paths[UNRATE_SERIES], index=False)
+
+    spending = pd.read_csv(SOURCE_FILES[SPENDING_SERIES])
+    paths[SPENDING_SERIES] = os.path.join(directory, 'spending.csv')
+    pd.concat([spending] * scale, ignore_index=True).to_csv(paths[SPENDING_SERIES], index=False)
+    return paths
+
+
+def run_stages(paths, metrics):
+    with metrics.stage('csv_parse'):
+        bls = {sid: pd.read_csv(paths[sid], dtype=str) for sid in ('LNS13049526', 'LNS14049526')}
+        fred = pd.read_csv(paths[UNRATE_SERIES])
+        spending = pd.read_csv(paths[SPENDING_SERIES])
+
+    with metrics.stage('coerce'):
+        canonical = pd.concat(
+            [normalize_bls(df) for df in bls.values()]
+            + [normalize_fred(fred, column) for column in fred.columns[1:]]
+            + [normalize_fiscal(spending, 'total_obligations')],
+            ignore_index=True)
+
+    with metrics.stage('outliers'):
+        detect_outliers(canonical, ['value'], by='series_id')
+
+    with metrics.stage('merge'):
+        panel = Panel()
+        for sid, frame in canonical[canonical['freq'] == 'M'].groupby('series_id', sort=False):
+            panel.add_monthly(sid, frame, 'value')
+        panel.add_annual('total_obligations', spending.drop_duplicates('fiscal_year'),
+                         'total_obligations')
+        frame = panel.frame
+
+    with metrics.stage('model'):
+        rates = [c for c in frame.columns if c.startswith('LNS14049526')]
+        merged = frame.dropna(subset=['total_obligations', rates[0]])
+        for column in rates[:20]:
+            evaluate_regression(merged['total_obligations'], merged[column],
+                                n_splits=200, seed=0, horizon=12, workers=1)
+
+    with metrics.stage('render'):
+        series = {sid: f[['period', 'value']]
+                  for sid, f in bls_frames(canonical, 'LNS14049526')}
+        monthly_trend(series).savefig(io.BytesIO(), format='png', dpi=80)
+
+
+def bls_frames(canonical, prefix):
+    monthly = canonical[(canonical['freq'] == 'M')
+                        & canonical['series_id'].astype(str).str.startswith(prefix)]
+    return monthly.groupby('series_id', sort=False)
+
+
+def compare(results, baseline, tolerance):
+    """Print each stage against the baseline; return the regressed stages."""
+    regressed = []
+    print(f"{'stage':<10} {'wall':>9} {'cpu':>9} {'baseline':>9} {'ratio':>7}")
+    for name, r in results.items():
+        base = baseline.get(name, {}).get('wall_seconds')
+        ratio = r['wall_seconds'] / base if base else float('nan')
+        flag = ''
+        if base and ratio > tolerance:
+            regressed.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<10} {r['wall_seconds']:8.3f}s {r['cpu_seconds']:8.3f}s "
+              f"{base or float('nan'):8.3f}s {ratio:6.2f}x{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scale', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3, help="best of N runs per stage")
+    parser.add_argument('--tolerance', type=float, default=1.5)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--metrics', metavar='FILE', help="also write the raw records as JSON")
+    args = parser.parse_args()
+
+    metrics = Instrumentation()
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = scaled_sources(tmp, args.scale)
+        for _ in range(args.repeat):
+            run_stages(paths, metrics)
+
+    results = {}
+    for r in metrics.to_dicts():
+        best = results.get(r['name'])
+        if best is None or r['wall_seconds'] < best['wall_seconds']:
+            results[r['name']] = r
+    if args.metrics:
+        with open(args.metrics, 'w') as f:
+            f.write(metrics.to_json(indent=1))
+
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+    key = f"scale={args.scale}"
+    if args.update_baseline:
+        stored[key] = {name: {'wall_seconds': round(r['wall_seconds'], 4),
+                              'cpu_seconds': round(r['cpu_seconds'], 4)}
+                       for name, r in results.items()}
+        with open(args.baseline, 'w') as f:
+            json.dump(stored, f, indent=1, sort_keys=True)
+            f.write('\n')
+        print(f"baseline for {key} written to {args.baseline}")
+    return 1 if compare(results, stored.get(key, {}), args.tolerance) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Load-time comparison of the CSVs against the columnar store.
+
+The four files in ``data/`` are replicated under new series IDs to 1x, 100x
+and 10,000x their current row count. The CSV path reads the text and casts
+the columns the way the notebook does; the store path reads the typed
+Parquet dataset, in full and with a column + year-range pushdown.
+
+    python -m benchmarks.bench_store --scales 1 100 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from vet_analysis.store import ingest_csvs, load_observations, write_store
+
+
+def scaled_observations(scale):
+    base = ingest_csvs()
+    ids = base['series_id'].astype(str)
+    frames = [base.assign(series_id=ids)] + [
+        base.assign(series_id=ids + f"_{i}") for i in range(1, scale)
+    ]
+    df = pd.concat(frames, ignore_index=True)
+    df['series_id'] = df['series_id'].astype('category')
+    return df
+
+
+def write_csv(df, path):
+    raw = pd.DataFrame({
+        'series_id': df['series_id'],
+        'year': df['year'],
+        'period': 'M' + df['month'].astype(str).str.zfill(2),
+        'value': df['value'],
+    })
+    raw.to_csv(path, index=False)
+
+
+def load_csv(path):
+    df = pd.read_csv(path)
+    df['year'] = pd.to_numeric(df['year'], errors='coerce')
+    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+    df['period'] = df['period'].str.replace('M', '').astype(int)
+    return df
+
+
+def timed(fn, *args, repeat=3, **kwargs):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 100, 10000])
+    args = parser.parse_args()
+
+    print(f"{'scale':>6} {'rows':>10} {'csv':>9} {'store':>9} {'filtered':>9}")
+    for scale in args.scales:
+        df = scaled_observations(scale)
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, 'observations.csv')
+            store_dir = os.path.join(tmp, 'store')
+            write_csv(df, csv_path)
+            write_store(df, store_dir)
+            t_csv, _ = timed(load_csv, csv_path)
+            t_store, _ = timed(load_observations, store_dir)
+            t_filtered, _ = timed(load_observations, store_dir,
+                                  columns=['series_id', 'month', 'value'],
+                                  years=(2020, 2022))
+        print(f"{scale:>6} {len(df):>10} {t_csv:>8.3f}s {t_store:>8.3f}s {t_filtered:>8.3f}s")
+
+
+if __name__ == '__main__':
+    main()
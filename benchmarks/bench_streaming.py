@@ -0,0 +1,82 @@
+"""Peak-memory comparison of ``res.json()`` parsing against the streaming parser.
+
+A synthetic BLS response of several hundred MB is written to a temporary
+file, then parsed both ways under ``tracemalloc``:
+
+* the notebook's path: ``json.load``, a list of dicts, ``pd.DataFrame``
+* ``vet_analysis.streaming``: block reads into fixed-size column batches
+
+    python -m benchmarks.bench_streaming --series 1500 --years 80
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.bls_stub import synthetic_series
+from vet_analysis.streaming import iter_file_chunks, iter_observation_batches
+
+
+def write_response(path, n_series, start_year, end_year):
+    """Write the response series by series so generating it stays small."""
+    with open(path, 'w') as f:
+        f.write('{"status":"REQUEST_SUCCEEDED","responseTime":1,"message":[],'
+                '"Results":{"series":[')
+        for i in range(n_series):
+            if i:
+                f.write(',')
+            sid = f"LNU{i:08d}"
+            f.write(json.dumps({"seriesID": sid,
+                                "data": synthetic_series(sid, start_year, end_year)}))
+        f.write(']}}')
+
+
+def parse_whole(path):
+    with open(path) as f:
+        data = json.load(f)
+    records = []
+    for series in data['Results']['series']:
+        for item in series['data']:
+            records.append({'series_id': series['seriesID'], 'year': item['year'],
+                            'period': item['period'], 'value': item['value']})
+    return len(pd.DataFrame(records))
+
+
+def parse_streaming(path, batch_rows):
+    rows = 0
+    for batch in iter_observation_batches(iter_file_chunks(path), batch_rows):
+        rows += len(batch)
+    return rows
+
+
+def measure(label, fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    rows = fn(*args)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<12} {rows:>10} rows {elapsed:8.2f}s peak {peak / 2**20:9.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--series', type=int, default=1500)
+    parser.add_argument('--years', type=int, default=80)
+    parser.add_argument('--batch-rows', type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'response.json')
+        write_response(path, args.series, 2025 - args.years, 2024)
+        print(f"response: {os.path.getsize(path) / 2**20:.1f} MiB")
+        measure("streaming", parse_streaming, path, args.batch_rows)
+        measure("json.load", parse_whole, path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Render time of the trend charts as the monthly history grows.
+
+Draws ``--series`` synthetic monthly series over 10 and 80 years with the
+Agg backend, once as ``sns.lineplot`` over raw rows keyed by year (the
+notebook's original call, with its per-year bootstrap) and once with
+``plotting.monthly_trend`` (LTTB-downsampled lines).
+
+    python -m benchmarks.bench_trend --series 200
+"""
+import argparse
+import io
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import seaborn as sns  # noqa: E402
+
+from vet_analysis.cleaning import to_periods  # noqa: E402
+from vet_analysis.plotting import monthly_trend  # noqa: E402
+
+
+def synthetic(n_series, years, seed=0):
+    rng = np.random.default_rng(seed)
+    months = years * 12
+    start = (2025 - years - 1970) * 12
+    series = {}
+    for i in range(n_series):
+        series[f"S{i}"] = pd.DataFrame({
+            'period': to_periods(np.arange(start, start + months)),
+            'value': 4 + np.cumsum(rng.normal(0, 0.1, months)),
+        })
+    return series
+
+
+def render(fig):
+    fig.savefig(io.BytesIO(), format='png', dpi=80)
+    plt.close(fig)
+
+
+def time_seaborn(series):
+    fig = plt.figure(figsize=(10, 6))
+    for label, frame in series.items():
+        sns.lineplot(x=frame['period'].dt.year, y=frame['value'], label=label, legend=False)
+    render(fig)
+
+
+def time_downsampled(series, max_points):
+    render(monthly_trend(series, max_points=max_points))
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--series', type=int, default=200)
+    parser.add_argument('--seaborn-series', type=int, default=20,
+                        help="series drawn on the (slow) seaborn path")
+    parser.add_argument('--max-points', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'years':>5} {'seaborn (%d series)' % args.seaborn_series:>22} "
+          f"{'lttb (%d series)' % args.series:>20}")
+    for years in (10, 80):
+        series = synthetic(args.series, years)
+        subset = dict(list(series.items())[:args.seaborn_series])
+        t_sns = timed(time_seaborn, subset)
+        t_lttb = timed(time_downsampled, series, args.max_points)
+        print(f"{years:>5} {t_sns:>21.2f}s {t_lttb:>19.2f}s")
+
+
+if __name__ == '__main__':
+    main()
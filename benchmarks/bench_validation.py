@@ -0,0 +1,66 @@
+"""Validation overhead on a synthetic long observation table.
+
+Builds ``--rows`` monthly observations spread over ``--series`` series in
+the layout of ``vet_analysis.observations``, then times
+``OBSERVATIONS.validate`` on the table in key order and shuffled, next to
+the pandas calls the same checks would otherwise take (``duplicated`` and
+a grouped ``diff`` for gaps) and the sort ``observation_table`` already
+does when it builds the table.
+
+    python -m benchmarks.bench_validation --rows 10000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from vet_analysis.cleaning import FREQS, to_periods
+from vet_analysis.validation import OBSERVATIONS
+
+
+def synthetic_table(rows, series, seed=0):
+    rng = np.random.default_rng(seed)
+    months = rows // series
+    codes = np.repeat(np.arange(series), months)
+    ordinals = np.tile(np.arange(months) - months + 660, series)
+    ids = [f"S{i:06d}" for i in range(series)]
+    return pd.DataFrame({
+        'series_id': pd.Categorical.from_codes(codes, categories=ids),
+        'period': to_periods(ordinals),
+        'freq': pd.Categorical.from_codes(np.zeros(len(codes), dtype='int8'), categories=FREQS),
+        'year': (ordinals // 12 + 1970).astype('int16'),
+        'value': rng.uniform(0, 20, len(codes)),
+        'source': pd.Categorical(np.full(len(codes), 'BLS')),
+    })
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    result = fn()
+    print(f"{label:<36} {time.perf_counter() - t0:8.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--series', type=int, default=10_000)
+    args = parser.parse_args()
+
+    table = synthetic_table(args.rows, args.series)
+    shuffled = table.sample(frac=1, random_state=0)
+    print(f"{len(table):,} rows, {args.series:,} series")
+
+    report = timed("validate (key order)", lambda: OBSERVATIONS.validate(table))
+    timed("validate (shuffled)", lambda: OBSERVATIONS.validate(shuffled))
+    timed("pandas duplicated", lambda: table.duplicated(['series_id', 'period', 'freq']))
+    timed("pandas grouped period diff", lambda: table.groupby(
+        'series_id', observed=True)['period'].diff())
+    timed("observation_table sort (for scale)", lambda: shuffled.sort_values(
+        ['series_id', 'period'], kind='stable', ignore_index=True))
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
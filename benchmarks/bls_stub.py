@@ -0,0 +1,122 @@
+"""Local stand-in for the BLS timeseries API used by the benchmarks.
+
+Serves deterministic synthetic monthly data for any series ID, enforces the
+per-request series/year limits and sleeps ``latency`` seconds per request to
+mimic a network round-trip. ``FaultyHandler`` additionally injects latency
+jitter, 5xx errors and 429 throttling.
+"""
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def synthetic_series(series_id, start_year, end_year):
+    """Return BLS-shaped ``data`` items for one series, newest first."""
+    seed = zlib.crc32(series_id.encode())
+    items = []
+    for year in range(end_year, start_year - 1, -1):
+        for month in range(12, 0, -1):
+            value = 3 + ((seed + year * 12 + month) % 70) / 10
+            items.append({
+                "year": str(year),
+                "period": f"M{month:02d}",
+                "periodName": "",
+                "value": f"{value:.1f}",
+                "footnotes": [{}],
+            })
+    return items
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    max_series = 50
+    max_years = 20
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        payload = json.loads(body)
+        time.sleep(self.latency)
+        series_ids = payload['seriesid']
+        start, end = int(payload['startyear']), int(payload['endyear'])
+        if len(series_ids) > self.max_series or end - start + 1 > self.max_years:
+            out = {"status": "REQUEST_NOT_PROCESSED",
+                   "message": ["request exceeds series or year limit"],
+                   "Results": {"series": []}}
+        else:
+            out = {"status": "REQUEST_SUCCEEDED", "message": [], "Results": {"series": [
+                {"seriesID": sid, "data": synthetic_series(sid, start, end)}
+                for sid in series_ids
+            ]}}
+        raw = json.dumps(out).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FaultyHandler(StubHandler):
+    """Stub that misbehaves like a loaded API.
+
+    Adds up to ``jitter`` seconds of extra latency, answers ``error_rate``
+    of requests with a random 500/502/503, and answers 429 with a
+    ``Retry-After`` once more than ``rate_limit`` requests arrive within one
+    second. ``stats`` counts the responses by status.
+    """
+    jitter = 0.0
+    error_rate = 0.0
+    rate_limit = None
+    retry_after = 1
+    seed = 0
+
+    @classmethod
+    def configure(cls, **options):
+        state = {'rng': random.Random(options.get('seed', cls.seed)), 'lock': threading.Lock(),
+                 'window': [], 'stats': {}}
+        return type('FaultyHandler', (cls,), {**options, 'state': state})
+
+    def _record(self, status):
+        stats = self.state['stats']
+        stats[status] = stats.get(status, 0) + 1
+
+    def _fail(self, status, headers=()):
+        self._record(status)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        state = self.state
+        with state['lock']:
+            now = time.monotonic()
+            state['window'] = [t for t in state['window'] if now - t < 1.0] + [now]
+            throttled = self.rate_limit is not None and len(state['window']) > self.rate_limit
+            delay = state['rng'].uniform(0, self.jitter)
+            error = state['rng'].random() < self.error_rate
+            status = state['rng'].choice((500, 502, 503))
+        if throttled:
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            return self._fail(429, [('Retry-After', str(self.retry_after))])
+        time.sleep(delay)
+        if error:
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            return self._fail(status)
+        with state['lock']:
+            self._record(200)
+        super().do_POST()
+
+
+def start_stub(latency=0.0, handler=StubHandler):
+    """Start the stub on a free port and return ``(server, url)``."""
+    handler = type('Handler', (handler,), {'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/"
@@ -45,98 +45,58 @@ from sklearn.metrics import mean_squared_error, r2_score
 # *How are you going to relate these datasets?*
 # 📝 <!-- Answer Below -->
 
-# In[50]:
+# In[ ]:
 
 
-# Import the BLS stats for veteran unemployment numbers
+# Sync the BLS stats for veteran unemployment numbers and rates. Only the periods newer than
+# what is already in data/ (plus the BLS revision window) are downloaded and upserted.
+# Responses are cached in .cache/bls; without an API key the sync runs offline from that cache
+# and falls back to the files already in data/. The typed columnar store in data/store is built
+# from the CSVs on the first run and kept up to date by the sync. The series are loaded in a compact schema
+# (int16 year, categorical period code, float32 value) instead of as strings.
 import os
 import pandas as pd
-import requests
 from dotenv import load_dotenv
+from vet_analysis.cache import CacheMissError, ResponseCache
+from vet_analysis.compact import read_bls_csv
+from vet_analysis.store import STORE_DIR, ingest_csvs, write_store
+from vet_analysis.sync import BLS_SERIES_FILES, sync_series
 
 load_dotenv()
 
 api_key = os.getenv("BLS_API_KEY")
+bls_cache = ResponseCache(offline=not api_key)
 
-if not api_key:
-    raise ValueError("For Me: The key is in your inbox, set the env variable again")
-
-url = 'https://api.bls.gov/publicAPI/v2/timeseries/data/'
-headers = {'Content-Type': 'application/json'}
-
-payload = {
-    "seriesid": ["LNS13049526"],
-    "startyear": "2014",
-    "endyear": "2024",
-    "registrationkey": api_key
-}
-
-res = requests.post(url, json=payload, headers=headers)
-
-if res.status_code == 200:
-    data = res.json()
-    records = []
-    for series in data['Results']['series']:
-        for item in series['data']:
-            records.append({
-                'year': item['year'],
-                'period': item['period'],
-                'value': item['value']
-            })
-    vet_employment_stats_df = pd.DataFrame(records)
-    vet_employment_stats_df.to_csv('data/veteran_unemployment_bls.csv', index=False)
-    print("download complete.")
-    print(vet_employment_stats_df.head())
-else:
-    print(f"Failed to retrieve data: {res.status_code}")
+if not os.path.isdir(STORE_DIR):
+    write_store(ingest_csvs())
 
+try:
+    sync_results = sync_series(BLS_SERIES_FILES, api_key=api_key, store_dir=STORE_DIR, cache=bls_cache)
+    for result in sync_results.values():
+        print(result)
+except CacheMissError as e:
+    print(f"Offline and not cached, using the data already on disk: {e}")
 
-# In[51]:
+vet_employment_stats_df = read_bls_csv(BLS_SERIES_FILES["LNS13049526"])
+print(vet_employment_stats_df.tail())
 
 
-# Import the BLS stats for veteran unemployment rates
-
-
-if not api_key:
-    raise ValueError("For Me: The key is in your inbox, set the env variable again")
-
-url = 'https://api.bls.gov/publicAPI/v2/timeseries/data/'
-headers = {'Content-Type': 'application/json'}
-
-payload = {
-    "seriesid": ["LNS14049526"],
-    "startyear": "2014",
-    "endyear": "2024",
-    "registrationkey": api_key
-}
+# In[ ]:
 
-res = requests.post(url, json=payload, headers=headers)
 
-if res.status_code == 200:
-    data = res.json()
-    records = []
-    for series in data['Results']['series']:
-        for item in series['data']:
-            records.append({
-                'year': item['year'],
-                'period': item['period'],
-                'value': item['value']
-            })
-    vet_unemployment_rates_df = pd.DataFrame(records)
-    vet_unemployment_rates_df.to_csv('data/veteran_unemployment_rates_bls.csv', index=False)
-    print("download complete.")
-    print(vet_unemployment_rates_df.head())
-else:
-    print(f"Failed to retrieve data: {res.status_code}")
+# Load the BLS stats for veteran unemployment rates
+vet_unemployment_rates_df = read_bls_csv(BLS_SERIES_FILES["LNS14049526"])
+print(vet_unemployment_rates_df.tail())
 
 
-# In[52]:
+# In[ ]:
 
 
-# load the unemployment rate from 2014-2024 from csv
+# load the unemployment rate from 2014-2024 from csv. compact_frame narrows the numbers to the smallest lossless dtypes
 import pandas as pd
+from vet_analysis.compact import compact_frame
 
-unemployment_rate_df = pd.read_csv('data/us_unemployment_rate_2014_2024.csv')
+unemployment_rate_df = compact_frame(pd.read_csv('data/us_unemployment_rate_2014_2024.csv'))
 unemployment_rate_df.head()
 
 
@@ -144,10 +104,30 @@ unemployment_rate_df.head()
 
 
 # load total US spending on veterans programs
-vet_program_spending_df = pd.read_csv('data/veterans_program_spending_by_year.csv')
+vet_program_spending_df = compact_frame(pd.read_csv('data/veterans_program_spending_by_year.csv'))
 print(vet_program_spending_df.head())
 
 
+# In[ ]:
+
+
+# Memory of each frame loaded naively (strings and 64-bit numbers) against the compact loads above
+from vet_analysis.compact import memory_report
+
+naive_frames = {
+    "vet_employment_stats_df": pd.read_csv(BLS_SERIES_FILES["LNS13049526"], dtype=str),
+    "vet_unemployment_rates_df": pd.read_csv(BLS_SERIES_FILES["LNS14049526"], dtype=str),
+    "unemployment_rate_df": pd.read_csv('data/us_unemployment_rate_2014_2024.csv'),
+    "vet_program_spending_df": pd.read_csv('data/veterans_program_spending_by_year.csv'),
+}
+memory_report(naive_frames, {
+    "vet_employment_stats_df": vet_employment_stats_df,
+    "vet_unemployment_rates_df": vet_unemployment_rates_df,
+    "unemployment_rate_df": unemployment_rate_df,
+    "vet_program_spending_df": vet_program_spending_df,
+})
+
+
 # ## Approach and Analysis
 # *What is your approach to answering your project question?*
 # *How will you use the identified data to answer your project question?*
@@ -164,204 +144,181 @@ print(vet_program_spending_df.head())
 #     Data types transformation.
 # 
 
-# In[54]:
+# In[ ]:
+
 
+#All series in one long table (series_id, period, freq, year, value, source), described by the series registry.
+#Every check below is one groupby over this table, so adding series only means adding registry rows
+from vet_analysis.observations import SERIES_REGISTRY, duplicate_counts, load_observation_table, relative_to, series_summary
 
-#Putting the dataframs in a list to make it easier to iterate and runs checks on all
-dfs = [vet_employment_stats_df, unemployment_rate_df, vet_program_spending_df, vet_unemployment_rates_df]
-df_names = ["vet_employment_stats_df", "unemployment_rate_df", "vet_program_spending_df", "vet_unemployment_rates_df"]
+observations = load_observation_table()
+print(SERIES_REGISTRY[['source', 'title', 'units', 'population']])
 
-#Running a describe() on each df
-descriptions = {name: df.describe(include='all') for df, name in zip(dfs, df_names)}
-for name, description in descriptions.items():
-    print(f"\n--- {name} ---\n")
-    print(description)
+series_summary(observations)
 
 
+# In[ ]:
 
-# In[55]:
 
+#Looking for nulls and examining datatypes. The table has one dtype per column for every series
+print(observations.dtypes)
+print(f"memory usage: {observations.memory_usage(deep=True).sum()} bytes")
 
-#Running info() on each dataframe to look for nulls and examine datatypes
-for df, name in zip(dfs, df_names):
-    print(f"\n--- {name} ---\n")
-    df.info()
+observations['value'].isna().groupby(observations['series_id'], observed=True).sum()
 
 
-# In[56]:
+# In[ ]:
 
 
-#The vet_employment_stats_df has all its values stored as string. I will need to convert the values to ints and trim the "M" designator from the renamed column month
+#The vet_employment_stats_df values are already numeric from the loader. I still need to turn year/period
+#into a monthly period key. parse_bls_periods does that in one vectorized pass (annual M13 and quarterly codes included)
+from vet_analysis.cleaning import fiscal_year_periods, parse_bls_periods, parse_dates
 
-vet_employment_stats_df['year'] = pd.to_numeric(vet_employment_stats_df['year'], errors='coerce')
-vet_employment_stats_df['value'] = pd.to_numeric(vet_employment_stats_df['value'], errors='coerce')
-vet_employment_stats_df['period'] = vet_employment_stats_df['period'].str.replace('M', '').astype(int)
-vet_employment_stats_df.rename(columns={'period': 'month'}, inplace=True)
+period_keys = parse_bls_periods(vet_employment_stats_df['year'], vet_employment_stats_df['period'])
+vet_employment_stats_df['period'] = period_keys['period']
+vet_employment_stats_df['year'] = period_keys['period'].dt.year.astype('int16')
+vet_employment_stats_df['month'] = period_keys['period'].dt.month.astype('int8')
 
 
 vet_employment_stats_df.info()
 vet_employment_stats_df.describe()
 
 
-# In[57]:
+# In[ ]:
 
 
-#The vet_unemployment_rates_df has all its values stored as string. I will need to convert the values to ints and trim the "M" designator from the renamed column month
+#Same period key for vet_unemployment_rates_df
 
-vet_unemployment_rates_df['year'] = pd.to_numeric(vet_unemployment_rates_df['year'], errors='coerce')
-vet_unemployment_rates_df['value'] = pd.to_numeric(vet_unemployment_rates_df['value'], errors='coerce')
-vet_unemployment_rates_df['period'] = vet_unemployment_rates_df['period'].str.replace('M', '').astype(int)
-vet_unemployment_rates_df.rename(columns={'period': 'month'}, inplace=True)
+period_keys = parse_bls_periods(vet_unemployment_rates_df['year'], vet_unemployment_rates_df['period'])
+vet_unemployment_rates_df['period'] = period_keys['period']
+vet_unemployment_rates_df['year'] = period_keys['period'].dt.year.astype('int16')
+vet_unemployment_rates_df['month'] = period_keys['period'].dt.month.astype('int8')
 
 
 vet_unemployment_rates_df.info()
 vet_unemployment_rates_df.describe()
 
 
-# In[58]:
+# In[ ]:
 
 
-unemployment_rate_df['Month'] = unemployment_rate_df['DATE'].str.split('/').str[0].astype(int)
-unemployment_rate_df['Year'] = unemployment_rate_df['DATE'].str.split('/').str[-1].astype(int)
+# The FRED dates become the same monthly period key, and the spending totals are keyed on the
+# month their fiscal year ends (September)
+unemployment_rate_df['period'] = parse_dates(unemployment_rate_df['DATE'])
+unemployment_rate_df['Month'] = unemployment_rate_df['period'].dt.month.astype('int8')
+unemployment_rate_df['Year'] = unemployment_rate_df['period'].dt.year.astype('int16')
 
 unemployment_rate_df.drop(columns=['DATE'], inplace=True)
 
-
-unemployment_rate_df
+vet_program_spending_df['period'] = fiscal_year_periods(vet_program_spending_df['fiscal_year'])
 
 
-# In[59]:
+unemployment_rate_df
 
 
-# Checking for duplicates in each df
-duplicate_counts = {name: df.duplicated().sum() for df, name in zip(dfs, df_names)}
+# In[ ]:
 
-duplicate_counts
 
+# Checking for duplicate periods within each series
+duplicate_counts(observations)
 
-# In[60]:
 
+# In[ ]:
 
-# Checking for Outliers using the IQR method
-outliers_iqr = {}
 
+# Running the data-quality rules over the whole table in one pass: schema, nulls, allowed frequencies, duplicate
+# keys, gaps in the monthly sequence and value ranges. raise_for_errors stops the notebook here instead of in
+# a later merge or model cell
+from vet_analysis.validation import OBSERVATIONS
 
-for df, name in zip(dfs, df_names):
-    outlier_info = {}
+observations_report = OBSERVATIONS.validate(observations).raise_for_errors()
+print(observations_report)
+observations_report.to_frame()
 
-    for col in df.select_dtypes(include=['float64', 'int64']).columns:
-        
-        Q1 = df[col].quantile(0.25)
-        Q3 = df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-        
-        outliers_count = ((df[col] < lower_bound) | (df[col] > upper_bound)).sum()
-        outlier_info[col] = outliers_count
-    outliers_iqr[name] = outlier_info
 
-outliers_iqr
+# In[ ]:
 
 
-# In[61]:
+# Checking for Outliers using the IQR method. detect_outliers takes the quartiles of every series in one grouped
+# quantile pass and keeps the bounds, counts and row masks together for the cells below
+from vet_analysis.outliers import detect_outliers
 
+outliers = detect_outliers(observations, 'value', by='series_id')
+flagged = outliers.rows(observations)
+outliers.counts.xs('value', level=-1)
 
-# Identifying the outliers in the unemployment rate df
-Q1 = unemployment_rate_df['UNRATE'].quantile(0.25)
-Q3 = unemployment_rate_df['UNRATE'].quantile(0.75)
-IQR = Q3 - Q1
 
-# Define lower and upper bounds for outliers
-lower_bound = Q1 - 1.5 * IQR
-upper_bound = Q3 + 1.5 * IQR
+# In[ ]:
 
-# Identify rows with outliers in 'UNRATE_PCH'
-unemp_outliers = unemployment_rate_df[(unemployment_rate_df['UNRATE'] < lower_bound) | (unemployment_rate_df['UNRATE'] > upper_bound)]
 
+# Identifying the outliers in the national unemployment rate
 print("Outliers detected:")
-print(unemp_outliers)
-
+print(flagged[flagged['series_id'] == 'UNRATE'])
 
 
 # These outliers are from COVID years. As mentioned above they willl not be treated as outliers in the analysis
 
-# In[62]:
-
+# In[ ]:
 
-# Identifying the outliers in the vet_employment_stats_df
-Q1 = vet_employment_stats_df['value'].quantile(0.25)
-Q3 = vet_employment_stats_df['value'].quantile(0.75)
-IQR = Q3 - Q1
 
-# Define lower and upper bounds for outliers
-lower_bound = Q1 - 1.5 * IQR
-upper_bound = Q3 + 1.5 * IQR
+# Identifying the outliers in the number of unemployed veterans
+print("Outliers detected:")
+print(flagged[flagged['series_id'] == 'LNS13049526'])
 
-# Identify rows with outliers in 'UNRATE_PCH'
-vet_outliers = vet_employment_stats_df[(vet_employment_stats_df['value'] < lower_bound) | (vet_employment_stats_df['value'] > upper_bound)]
 
-print("Outliers detected:")
-print(vet_outliers)
+# These outliers are from COVID years. As mentioned above they willl not be treated as outliers in the analysis
 
+# In[ ]:
 
 
-# These outliers are from COVID years. As mentioned above they willl not be treated as outliers in the analysis
+# Identifying the outliers in the veteran unemployment rate
+print("Outliers detected:")
+print(flagged[flagged['series_id'] == 'LNS14049526'])
 
-# In[63]:
 
+# These outliers are from COVID years. As mentioned above they willl not be treated as outliers in the analysis
 
-# Identifying the outliers in the vet_employment_stats_df
-Q1 = vet_unemployment_rates_df['value'].quantile(0.25)
-Q3 = vet_unemployment_rates_df['value'].quantile(0.75)
-IQR = Q3 - Q1
+# In[ ]:
 
-# Define lower and upper bounds for outliers
-lower_bound = Q1 - 1.5 * IQR
-upper_bound = Q3 + 1.5 * IQR
 
-# Identify rows with outliers in 'UNRATE_PCH'
-vet_unemp_outliers = vet_unemployment_rates_df[(vet_unemployment_rates_df['value'] < lower_bound) | (vet_unemployment_rates_df['value'] > upper_bound)]
+# Identifying the outliers in the VA spending
+spending_outliers = flagged[flagged['series_id'] == 'VA_TOTAL_OBLIGATIONS']
 
 print("Outliers detected:")
-print(vet_unemp_outliers)
-
+print(spending_outliers)
 
+# This year is an outlier in the data and will be removed from further analysis
+observations = observations.drop(spending_outliers.index)
+vet_program_spending_df = vet_program_spending_df[~vet_program_spending_df['fiscal_year'].isin(spending_outliers['year'])]
 
-# These outliers are from COVID years. As mentioned above they willl not be treated as outliers in the analysis
 
-# In[64]:
+# In[ ]:
 
 
-# Identifying the outliers in the vet_program_spending_df
-Q1 = vet_program_spending_df['total_obligations'].quantile(0.25)
-Q3 = vet_program_spending_df['total_obligations'].quantile(0.75)
-IQR = Q3 - Q1
+# The IQR filter should only drop years at the edge of the range. Checking that no fiscal year between the
+# first and last one kept went missing before the spending is merged
+from vet_analysis.validation import SPENDING
 
-# Define lower and upper bounds for outliers
-lower_bound = Q1 - 1.5 * IQR
-upper_bound = Q3 + 1.5 * IQR
+print(SPENDING(vet_program_spending_df))
 
-# Identify rows with outliers in 'UNRATE_PCH'
-spending_outliers = vet_program_spending_df[(vet_program_spending_df['total_obligations'] < lower_bound) | (vet_program_spending_df['total_obligations'] > upper_bound)]
 
-print("Outliers detected:")
-print(spending_outliers)
+# In[ ]:
 
-# This year is an outlier in the data and will be removed from further analysis
 
-vet_program_spending_df = vet_program_spending_df[(vet_program_spending_df['total_obligations'] >= lower_bound) & (vet_program_spending_df['total_obligations'] <= upper_bound)]
+# Materializing the aggregates the charts, the COVID comparison and the models read below: every series by
+# month, quarter, calendar year, fiscal year and trailing 12 months. Those cells look values up in the cube
+# instead of grouping the frames again
+from vet_analysis.cube import AggregateCube
 
+cube = AggregateCube.from_observations(observations)
+yearly = cube.frame('year')
+yearly
 
 
-# In[65]:
+# In[ ]:
 
 
-descriptions = {name: df.describe(include='all') for df, name in zip(dfs, df_names)}
-for name, description in descriptions.items():
-    print(f"\n--- {name} ---\n")
-    print(description)
+series_summary(observations)
 
 
 # The data has been properly examined and cleaned. The data is in the right datatypes, with no null or missing values, no duplicates are present and any outliers not relevant to the analysis have been removed. 
@@ -369,56 +326,87 @@ for name, description in descriptions.items():
 # ## Visualizations
 # 4 Visualizations from 2 different libraries
 
-# In[66]:
+# In[ ]:
+
+
+# Aligning all the sources on one monthly panel. Spending is laid onto the months of its fiscal year (Oct-Sep)
+# instead of being matched to the calendar year
+from vet_analysis.panel import Panel
+from vet_analysis.validation import PANEL
+from vet_analysis.plotting import actual_vs_predicted, increase_barplot, spending_regplot, spending_treemap, unemployment_trend
 
+panel = Panel()
+panel.add_monthly('vet_unemployed', vet_employment_stats_df, 'value')
+panel.add_monthly('vet_unemployment_rate', vet_unemployment_rates_df, 'value')
+panel.add_monthly('UNRATE', unemployment_rate_df, 'UNRATE')
+panel.add_annual('total_obligations', vet_program_spending_df, 'total_obligations')
+PANEL(panel.frame)
 
-merged_df = vet_employment_stats_df.merge(vet_program_spending_df, left_on='year', right_on='fiscal_year')
+merged_df = panel.frame.dropna(subset=['vet_unemployed', 'total_obligations'])
 
-plt.figure(figsize=(10, 6))
-sns.regplot(data=merged_df, x='total_obligations', y='value', scatter_kws={'s': 50, 'alpha': 0.7}, line_kws={'color': 'red'})
-plt.title("Impact of Government Spending on Veteran Unemployment Count")
-plt.xlabel("Government Spending on Veteran Programs ($)")
-plt.ylabel("Veteran Unemployment Count")
+spending_regplot(merged_df)
 plt.show()
 
 
-# In[67]:
+# In[ ]:
+
+
+# Question 3: is VA spending correlated with veteran unemployment? Testing the fiscal year averages with
+# bootstrap confidence intervals and permutation p-values, with spending leading unemployment by 0-3 years
+from vet_analysis.significance import correlation_tests
 
+annual_df = (cube.frame('fiscal_year', series=['VA_TOTAL_OBLIGATIONS', 'LNS14049526'])
+             .rename(columns={'VA_TOTAL_OBLIGATIONS': 'total_obligations', 'LNS14049526': 'vet_unemployment_rate'})
+             .dropna().reset_index())
 
-plt.figure(figsize=(10, 6))
+correlation_tests(annual_df, [('total_obligations', 'vet_unemployment_rate')], time_column='fiscal_year', n_resamples=100_000, seed=42)
 
-sns.lineplot(data=vet_unemployment_rates_df, x='year', y='value', label='Veteran Unemployment Rate')
 
-sns.lineplot(data=unemployment_rate_df, x='Year', y='UNRATE', label='Total US Unemployment Rate')
+# In[ ]:
+
+
+unemployment_trend(yearly['LNS14049526'], yearly['UNRATE'])
+plt.show()
+
+
+# In[ ]:
+
 
-plt.axvspan(2020, 2022, color='gray', alpha=0.3, label='COVID Years')
+# The same comparison at full monthly resolution. Each series is downsampled with LTTB to a fixed number of points
+# before drawing, so the chart stays quick as the monthly history grows
+from vet_analysis.plotting import monthly_trend
 
-plt.title("Veteran vs Total US Unemployment Rate Over Time (2014-2023)")
-plt.xlabel("Year")
-plt.ylabel("Unemployment Rate (%)")
-plt.xlim(2014, 2023)
-plt.legend()
+monthly_rates = {
+    'Veterans': vet_unemployment_rates_df,
+    'National': unemployment_rate_df.rename(columns={'UNRATE': 'value'}),
+}
+monthly_trend(monthly_rates)
 plt.show()
 
 
-# In[68]:
+# In[ ]:
+
 
+# Veteran against national unemployment rate in the same month, averaged per year
+veteran_gap = relative_to(observations, 'UNRATE', series=['LNS14049526'])
+veteran_gap.groupby('year')[['value', 'baseline', 'difference', 'ratio']].mean()
 
-#Isolating the data for covid years and averaging unemployment rates for vets and total population during that time compared to 2019
-pre_covid_year = 2019
-covid_years = [2020, 2021, 2022]
 
-pre_covid_spending = vet_program_spending_df[vet_program_spending_df['fiscal_year'] == pre_covid_year]['total_obligations'].values[0]
+# In[ ]:
 
-covid_spending = vet_program_spending_df[vet_program_spending_df['fiscal_year'].isin(covid_years)]['total_obligations'].mean()
 
-spending_increase_pct = ((covid_spending - pre_covid_spending) / pre_covid_spending) * 100
+#Comparing the covid years against 2019 for spending and for veteran unemployment rates. Both series are
+#read from the cube's prefix sums; spending is compared by fiscal year, the unemployment rate by calendar year
+from vet_analysis.events import EventWindow
 
-pre_covid_vet_unemployment = vet_unemployment_rates_df[vet_unemployment_rates_df['year'] == pre_covid_year]['value'].values[0]
+pre_covid = EventWindow('pre_covid', 2019, 2019)
+covid = EventWindow('covid', 2020, 2022)
 
-covid_vet_unemployment = vet_unemployment_rates_df[vet_unemployment_rates_df['year'].isin(covid_years)]['value'].mean()
+covid_change = cube.compare_windows([covid], pre_covid, series=['VA_TOTAL_OBLIGATIONS', 'LNS14049526'],
+                                    level={'VA_TOTAL_OBLIGATIONS': 'fiscal_year'})
 
-vet_unemployment_increase_pct = ((covid_vet_unemployment - pre_covid_vet_unemployment) / pre_covid_vet_unemployment) * 100
+spending_increase_pct = covid_change.loc[('VA_TOTAL_OBLIGATIONS', 'covid', 'value'), 'pct_change']
+vet_unemployment_increase_pct = covid_change.loc[('LNS14049526', 'covid', 'value'), 'pct_change']
 
 spending_increase_pct, vet_unemployment_increase_pct
 
@@ -433,29 +421,18 @@ data = {
 
 increase_df = pd.DataFrame(data)
 
-plt.figure(figsize=(15, 10))
-sns.barplot(data=increase_df, x="Metric", y="Percentage Increase", palette="viridis")
-plt.title("Percentage Increase During COVID-19 (2020-2022)")
-plt.ylabel("Percentage Increase (%)")
+increase_barplot(increase_df)
 plt.show()
 
 
-# In[70]:
-
+# In[ ]:
 
-merged_df = unemployment_rate_df.merge(vet_program_spending_df, left_on='Year', right_on='fiscal_year')
 
-fig = px.treemap(
-    merged_df,
-    path=["Year"],
-    values="total_obligations",
-    color="UNRATE",
-    color_continuous_scale="Viridis",
-    title="Government Spending on Veteran Programs by Year and Unemployment Rate"
-)
+# Monthly national rate next to the fiscal-year spending total of each month, read from the cube
+merged_df = cube.aligned({'UNRATE': ('UNRATE', 'month'),
+                          'total_obligations': ('VA_TOTAL_OBLIGATIONS', 'fiscal_year')}, dropna=True)
 
-fig.update_layout(margin=dict(t=50, l=25, r=25, b=25))
-fig.update_coloraxes(colorbar_title="Unemployment Rate (%)")
+fig = spending_treemap(merged_df)
 
 fig.show()
 
@@ -556,25 +533,20 @@ print(f"Mean Squared Error: {mse}")
 print(f"R-squared: {r2}")
 
 
-# In[75]:
+# In[ ]:
 
 
 # plot the acutal vs predict values
 
-plt.figure(figsize=(10, 6))
-sns.scatterplot(x=y_test, y=target_pred, color="blue")
-plt.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], color='red')
-plt.title('Actual vs. Predicted Veteran Unemployment Rates')
-plt.xlabel('Actual Unemployment Rates')
-plt.ylabel('Predicted Unemployment Rates')
+actual_vs_predicted(y_test, target_pred)
 plt.show()
 
 
-# In[76]:
+# In[ ]:
 
 
 # The model performed poorly and the scores were unsuitable for analysis. I will remove the COVID years from the df and mrun the model again to see if it improves without the noise of the COVID years
-filtered_df = merged_df[~merged_df['Year'].isin([2020, 2021, 2022])]
+filtered_df = merged_df[~merged_df['year'].isin([2020, 2021, 2022])]
 
 x_value_filtered = filtered_df['total_obligations']
 
@@ -594,6 +566,71 @@ print(f"Filtered Data Mean Squared Error: {mse_filtered}")
 print(f"Filtered Data R-squared: {r2_filtered}")
 
 
+# In[ ]:
+
+
+# A single unseeded split on this little data gives different scores on every run. Scoring the same
+# model over 1,000 seeded random splits plus rolling-origin folds shows the spread of MSE and R2 instead
+from vet_analysis.modelling import evaluate_regression
+
+evaluation = evaluate_regression(merged_df['total_obligations'], merged_df['UNRATE'], n_splits=1000, seed=42, horizon=12)
+evaluation_filtered = evaluate_regression(filtered_df['total_obligations'], filtered_df['UNRATE'], n_splits=1000, seed=42, horizon=12)
+
+print("All years:")
+print(evaluation.summary.T)
+print("\nWithout COVID years:")
+print(evaluation_filtered.summary.T)
+
+
+# In[ ]:
+
+
+# Forecasting the monthly veteran and national unemployment rates. All series are fitted together as one array:
+# seasonal naive, Holt exponential smoothing, and an AR(3) model with monthly VA spending (lagged one month) as
+# the exogenous input. The last 12 months are held out to compare the models, then each is refitted by a
+# warm-start update with the held-out months and forecasts the next 12 months
+import numpy as np
+from vet_analysis.forecasting import fit_arx, fit_smoothing, forecast_frame, seasonal_naive, series_matrix
+
+forecast_ids, forecast_periods, rates = series_matrix(observations, ['LNS14049526', 'UNRATE'])
+monthly_spending = panel.frame['total_obligations'].reindex(forecast_periods).ffill().bfill().to_numpy()
+
+holdout = 12
+train, test = rates[:, :-holdout], rates[:, -holdout:]
+smoothing = fit_smoothing(train)
+arx = fit_arx(train, monthly_spending[:-holdout], lags=3)
+holdout_mae = pd.DataFrame({
+    'seasonal_naive': np.abs(seasonal_naive(train, holdout) - test).mean(axis=1),
+    'smoothing': np.abs(smoothing.forecast(holdout) - test).mean(axis=1),
+    'arx': np.abs(arx.forecast(holdout, monthly_spending[-holdout:]) - test).mean(axis=1),
+}, index=forecast_ids)
+print("Mean absolute error over the last 12 months:")
+print(holdout_mae)
+
+smoothing.update(test)
+arx.update(test, monthly_spending[-holdout:])
+forecast_frame(arx.forecast(12), forecast_ids, forecast_periods[-1])
+
+
+# In[ ]:
+
+
+# Report mode: with RENDER_REPORT set, every chart above is drawn headlessly into reports/ on a process pool.
+# Files are named by a hash of the chart's data and code, so charts whose inputs have not changed are skipped
+from vet_analysis.report import ChartSpec, render_report
+
+if os.getenv("RENDER_REPORT"):
+    report_specs = [
+        ChartSpec("spending_regplot", "spending_regplot", {"df": panel.frame.dropna(subset=['vet_unemployed', 'total_obligations'])}),
+        ChartSpec("unemployment_trend", "unemployment_trend", {"vet_rates": yearly['LNS14049526'], "national": yearly['UNRATE']}),
+        ChartSpec("monthly_trend", "monthly_trend", {"series": monthly_rates}),
+        ChartSpec("covid_increase", "increase_barplot", {"increase_df": increase_df}),
+        ChartSpec("spending_treemap", "spending_treemap", {"df": panel.frame.dropna(subset=['UNRATE', 'total_obligations'])}),
+        ChartSpec("actual_vs_predicted", "actual_vs_predicted", {"actual": y_test, "predicted": target_pred}),
+    ]
+    for name, (path, status) in render_report(report_specs).items():
+        print(f"{name}: {status} {path}")
+
 
 # ## ML Analaysis
 # 
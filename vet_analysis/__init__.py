@@ -0,0 +1,32 @@
+"""Analysis helpers for the veteran unemployment and VA spending project.
+
+The notebook (``source.ipynb``) and its exported script (``source.py``) drive
+the analysis; the modules in this package hold the reusable pieces so the
+notebook cells stay short.
+
+Importing the package itself is cheap: submodules are loaded on first
+attribute access (``vet_analysis.plotting``), and the heavy plotting
+libraries only when a chart is drawn. A data refresh
+(``python -m vet_analysis sync``) therefore never imports seaborn, plotly,
+matplotlib or scikit-learn.
+"""
+import importlib
+
+SUBMODULES = (
+    'async_ingestion', 'cache', 'cleaning', 'compact', 'cube', 'events', 'forecasting',
+    'ingestion', 'instrument', 'modelling', 'observations', 'outliers', 'panel', 'pipeline',
+    'plotting', 'profiling', 'report', 'service', 'significance', 'store', 'streaming',
+    'sync', 'validation',
+)
+
+__all__ = list(SUBMODULES)
+
+
+def __getattr__(name):
+    if name in SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(SUBMODULES))
@@ -0,0 +1,153 @@
+"""Command line entry point for scheduled jobs.
+
+    python -m vet_analysis sync [--store] [--offline] [--async]
+    python -m vet_analysis run [STAGE ...] [--force STAGE] [--offline] [--metrics FILE]
+    python -m vet_analysis serve [--port PORT] [--refresh-interval SECONDS]
+
+``sync`` brings the BLS CSVs in ``data/`` up to date (see
+``vet_analysis.sync``) and prints one line per series; ``--async`` fetches
+through ``vet_analysis.async_ingestion`` (rate limits, retries). ``run`` brings the
+given stages of ``vet_analysis.pipeline.analysis_pipeline`` (default: all)
+up to date and prints whether each ran or came from its memo; with
+``--metrics`` the per-stage measurements of ``vet_analysis.instrument`` are
+written as JSON, or as Prometheus text when FILE ends in ``.prom``. A stage
+whose output fails its validation (``vet_analysis.validation``) stops the
+run with exit status 1. ``serve`` answers read-only queries over the
+cleaned data and metrics (``vet_analysis.service``) until interrupted,
+refreshing its snapshot on the given interval. The API key is read from
+``BLS_API_KEY``, loading
+``.env`` first when python-dotenv is installed. Only the modules the job
+needs are imported.
+"""
+import argparse
+import os
+import sys
+
+
+def _load_dotenv():
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+
+def sync(args):
+    from vet_analysis.cache import CacheMissError, ResponseCache
+    from vet_analysis.ingestion import BLSRequestError
+    from vet_analysis.sync import sync_series
+
+    _load_dotenv()
+    api_key = os.getenv("BLS_API_KEY")
+    cache = ResponseCache(args.cache_dir, offline=args.offline or not api_key)
+    store_dir = None
+    if args.store:
+        from vet_analysis.store import STORE_DIR
+        store_dir = STORE_DIR
+    fetch_kwargs = {}
+    if args.use_async:
+        from vet_analysis.async_ingestion import fetch_series_async
+        fetch_kwargs['fetch'] = fetch_series_async
+    try:
+        results = sync_series(api_key=api_key, lookback_months=args.lookback_months,
+                              store_dir=store_dir, cache=cache, **fetch_kwargs)
+    except CacheMissError as e:
+        print(f"Offline and not cached: {e}", file=sys.stderr)
+        return 1
+    except BLSRequestError as e:
+        print(f"Sync failed: {e}", file=sys.stderr)
+        return 1
+    for result in results.values():
+        print(result)
+    return 0
+
+
+def run(args):
+    from vet_analysis.instrument import Instrumentation
+    from vet_analysis.pipeline import analysis_pipeline
+    from vet_analysis.validation import ValidationError
+
+    _load_dotenv()
+    metrics = Instrumentation(trace_memory=args.trace_memory) if args.metrics else None
+    pipeline = analysis_pipeline(os.getenv("BLS_API_KEY"), args.offline, workers=args.workers,
+                                 instrumentation=metrics)
+    try:
+        _, status = pipeline.run(args.stages or None, force=args.force)
+    except ValidationError as e:
+        print(f"Validation failed, stopping before dependent stages:\n{e}", file=sys.stderr)
+        status = None
+    if metrics:
+        with open(args.metrics, 'w') as f:
+            f.write(metrics.to_prometheus() if args.metrics.endswith('.prom')
+                    else metrics.to_json(indent=1))
+    if status is None:
+        return 1
+    for name in pipeline.upstream(args.stages or list(pipeline.stages)):
+        print(f"{name:<24} {status[name]}")
+    return 0
+
+
+def serve(args):
+    from functools import partial
+
+    from vet_analysis.service import (DEFAULT_CACHE_ENTRIES, DEFAULT_PORT, QueryService,
+                                      load_snapshot, make_server)
+
+    _load_dotenv()
+    loader = partial(load_snapshot, os.getenv("BLS_API_KEY"), args.offline)
+    cache_entries = DEFAULT_CACHE_ENTRIES if args.cache_entries is None else args.cache_entries
+    service = QueryService(loader, cache_entries=cache_entries)
+    server = make_server(service, args.host, DEFAULT_PORT if args.port is None else args.port)
+    if args.refresh_interval:
+        service.start_refresher(args.refresh_interval)
+    print(f"serving snapshot {service.snapshot.version} on "
+          f"http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
+    return 0
+
+
+def main(argv=None):
+    from vet_analysis.cache import DEFAULT_CACHE_DIR
+    from vet_analysis.sync import DEFAULT_LOOKBACK_MONTHS
+
+    parser = argparse.ArgumentParser(prog="python -m vet_analysis")
+    commands = parser.add_subparsers(dest='command', required=True)
+    p = commands.add_parser('sync', help="incrementally update the BLS series in data/")
+    p.add_argument('--store', action='store_true', help="also upsert into the columnar store")
+    p.add_argument('--offline', action='store_true', help="serve from the response cache only")
+    p.add_argument('--async', dest='use_async', action='store_true',
+                   help="fetch with the rate-limited asyncio runner")
+    p.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    p.add_argument('--lookback-months', type=int, default=DEFAULT_LOOKBACK_MONTHS)
+    p.set_defaults(func=sync)
+    p = commands.add_parser('run', help="run the analysis pipeline, reusing memoized stages")
+    p.add_argument('stages', nargs='*', help="stages to bring up to date (default: all)")
+    p.add_argument('--force', action='append', default=[], metavar='STAGE',
+                   help="rerun STAGE even if its inputs are unchanged")
+    p.add_argument('--offline', action='store_true', help="serve BLS responses from the cache only")
+    p.add_argument('--workers', type=int, default=4)
+    p.add_argument('--metrics', metavar='FILE', help="write per-stage timing, memory and I/O")
+    p.add_argument('--trace-memory', action='store_true',
+                   help="include tracemalloc peaks in --metrics (slower)")
+    p.set_defaults(func=run)
+    p = commands.add_parser('serve', help="serve the cleaned data and metrics over HTTP")
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, help="default: 8050")
+    p.add_argument('--offline', action='store_true', help="serve BLS responses from the cache only")
+    p.add_argument('--refresh-interval', type=float, default=0, metavar='SECONDS',
+                   help="rebuild and hot-swap the snapshot every SECONDS (default: never)")
+    p.add_argument('--cache-entries', type=int,
+                   help="serialized responses kept in the LRU (default: 1024)")
+    p.set_defaults(func=serve)
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""Asyncio ingestion runner for many BLS series on a schedule.
+
+``fetch_all`` splits the request into payloads (see
+``vet_analysis.ingestion.build_payloads``) and runs them with bounded
+concurrency over one pooled ``requests`` session. Each HTTP call runs on a
+worker thread, so the event loop only schedules. Requests pass through:
+
+* a ``SlidingWindowLimiter`` enforcing the BLS burst limit (at most 50
+  requests in any 10 seconds),
+* a ``DailyQuota`` (500 queries a day with a registration key, 25
+  without), optionally persisted so consecutive scheduled runs on the same
+  day share one budget,
+* per-request timeouts, and retries with full-jitter exponential backoff
+  on timeouts, connection errors, 429 and 5xx (a ``Retry-After`` header is
+  honoured).
+
+Failures do not stop the run: the returned ``IngestReport`` holds the
+observations that did arrive plus one ``FailedRequest`` per payload that
+did not, with the reason and attempt count.
+"""
+import asyncio
+import datetime
+import json
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+import requests
+
+from vet_analysis.cache import CacheMissError
+from vet_analysis.ingestion import (BLS_API_URL, OBSERVATION_COLUMNS, BLSRequestError,
+                                    build_payloads, make_session, parse_response)
+
+# BLS allows 50 requests per 10 seconds per client
+BURST_REQUESTS = 50
+BURST_WINDOW = 10.0
+DAILY_QUERIES_REGISTERED = 500
+DAILY_QUERIES_ANONYMOUS = 25
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class QuotaExceededError(BLSRequestError):
+    """The daily query budget is used up."""
+
+
+class _Retryable(Exception):
+    def __init__(self, reason, retry_after=None):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class SlidingWindowLimiter:
+    """Async limiter: at most ``limit`` acquisitions in any ``window`` seconds.
+
+    Keeps the times of the last ``limit`` acquisitions; the next one waits
+    until the oldest of them is ``window`` seconds old. Unlike a token
+    bucket that starts full, a burst plus the refill behind it can never
+    exceed the limit.
+    """
+
+    def __init__(self, limit=BURST_REQUESTS, window=BURST_WINDOW, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        self._times = deque(maxlen=limit)
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while len(self._times) == self.limit:
+                wait = self._times[0] + self.window - self.clock()
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            self._times.append(self.clock())
+
+
+class DailyQuota:
+    """Count of queries sent today against ``limit``.
+
+    With ``path`` the count is kept in a small JSON file so separate runs on
+    the same (UTC) day draw from one budget.
+    """
+
+    def __init__(self, limit, path=None):
+        self.limit = limit
+        self.path = path
+        self.day, self.used = self._today(), 0
+        if path and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if state.get('day') == self.day:
+                self.used = int(state['used'])
+
+    @staticmethod
+    def _today():
+        return datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+
+    @property
+    def remaining(self):
+        return max(self.limit - self.used, 0)
+
+    def take(self):
+        """Use one query or raise ``QuotaExceededError``."""
+        today = self._today()
+        if today != self.day:
+            self.day, self.used = today, 0
+        if self.used >= self.limit:
+            raise QuotaExceededError(f"daily quota of {self.limit} queries used up")
+        self.used += 1
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'w') as f:
+                json.dump({'day': self.day, 'used': self.used}, f)
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 5
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+
+    def delay(self, attempt, retry_after=None, rng=random):
+        """Full-jitter backoff before retry number ``attempt`` (from 1)."""
+        wait = rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            wait = max(wait, min(retry_after, self.max_delay))
+        return wait
+
+
+@dataclass
+class FailedRequest:
+    series_ids: list
+    start_year: int
+    end_year: int
+    error: str
+    attempts: int
+    # offline cache without this payload; nothing was sent
+    cache_miss: bool = False
+
+
+@dataclass
+class IngestReport:
+    frame: pd.DataFrame
+    failures: list = field(default_factory=list)
+    requests: int = 0
+    retries: int = 0
+    cached: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self):
+        return not self.failures
+
+    @property
+    def failed_series(self):
+        return sorted({sid for f in self.failures for sid in f.series_ids})
+
+    def raise_for_failures(self):
+        if self.failures:
+            raise BLSRequestError(
+                f"{len(self.failures)} request(s) failed for series {self.failed_series}: "
+                f"{self.failures[0].error}")
+
+
+def _retry_after(res):
+    value = res.headers.get('Retry-After')
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _post(session, url, payload, timeout):
+    """One blocking attempt; classifies failures as retryable or not."""
+    try:
+        res = session.post(url, json=payload, timeout=timeout)
+    except (requests.Timeout, requests.ConnectionError) as e:
+        raise _Retryable(f"{type(e).__name__}: {e}") from e
+    if res.status_code in RETRY_STATUSES:
+        raise _Retryable(f"HTTP {res.status_code}", _retry_after(res))
+    if res.status_code != 200:
+        raise BLSRequestError(f"Failed to retrieve data: {res.status_code}")
+    data = res.json()
+    if data.get('status') != 'REQUEST_SUCCEEDED':
+        message = ' '.join(data.get('message') or [])
+        if 'threshold' in message.lower():
+            raise QuotaExceededError(f"BLS daily threshold reached: {message}")
+        raise BLSRequestError(f"BLS rejected request: {message}")
+    return data
+
+
+def _request(session, url, payload, timeout, cache):
+    """``_post``, cache and parse on the worker thread, off the event loop."""
+    data = _post(session, url, payload, timeout)
+    if cache is not None:
+        cache.put(payload, data)
+    return parse_response(data)
+
+
+async def fetch_all(series_ids, start_year, end_year, api_key=None, *, url=BLS_API_URL,
+                    concurrency=8, limiter=None, quota=None, retry=None, timeout=30,
+                    cache=None, session=None, catalog=False, registered=None, seed=None):
+    """Fetch every series over ``start_year``-``end_year``; see the module docstring.
+
+    ``limiter`` and ``quota`` default to the BLS limits for the key type.
+    Returns an ``IngestReport``; it never raises for failed payloads.
+    """
+    started = time.perf_counter()
+    if registered is None:
+        # as in fetch_series: an offline cache holds payloads built with the registered limits
+        registered = bool(api_key) or (cache is not None and cache.offline)
+    payloads = build_payloads(series_ids, start_year, end_year, api_key, catalog, registered)
+    limiter = limiter or SlidingWindowLimiter()
+    quota = quota or DailyQuota(DAILY_QUERIES_REGISTERED if registered
+                                else DAILY_QUERIES_ANONYMOUS)
+    retry = retry or RetryPolicy()
+    rng = random.Random(seed)
+    own_session = session is None
+    if own_session:
+        session = make_session(pool_size=concurrency)
+    report = IngestReport(pd.DataFrame(columns=OBSERVATION_COLUMNS))
+    gate = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+
+    def failed(payload, error, attempts, cache_miss=False):
+        return FailedRequest(list(payload['seriesid']), int(payload['startyear']),
+                             int(payload['endyear']), error, attempts, cache_miss)
+
+    async def run(payload, executor):
+        if cache is not None:
+            try:
+                data = cache.get(payload)
+            except CacheMissError as e:
+                return failed(payload, str(e), 0, cache_miss=True)
+            if data is not None:
+                report.cached += 1
+                return parse_response(data)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                quota.take()
+                # backoff sleeps happen outside the gate so they do not hold a slot;
+                # the limiter is taken inside it so a request is sent as soon as
+                # it is admitted, not after queueing for a slot in a later window
+                async with gate:
+                    await limiter.acquire()
+                    report.requests += 1
+                    return await loop.run_in_executor(executor, _request, session, url,
+                                                      payload, timeout, cache)
+            except _Retryable as e:
+                if attempt < retry.max_attempts:
+                    report.retries += 1
+                    await asyncio.sleep(retry.delay(attempt, e.retry_after, rng))
+                    continue
+                error = f"{e} after {attempt} attempts"
+            except (BLSRequestError, requests.RequestException, ValueError) as e:
+                error = str(e)
+            return failed(payload, error, attempt)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = await asyncio.gather(*(run(p, executor) for p in payloads))
+    finally:
+        if own_session:
+            session.close()
+
+    report.failures = [r for r in results if isinstance(r, FailedRequest)]
+    frames = [r for r in results if not isinstance(r, FailedRequest)]
+    if frames:
+        report.frame = pd.concat(frames, ignore_index=True)
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def ingest(series_ids, start_year, end_year, api_key=None, **kwargs):
+    """Blocking wrapper around ``fetch_all`` for scripts and scheduled jobs.
+
+    Inside a running event loop (e.g. a notebook) ``await fetch_all(...)``
+    instead.
+    """
+    return asyncio.run(fetch_all(series_ids, start_year, end_year, api_key, **kwargs))
+
+
+def fetch_series_async(series_ids, start_year, end_year, api_key=None, **kwargs):
+    """``fetch_series``-compatible frame from ``ingest``.
+
+    Raises ``BLSRequestError`` naming the failed series if any payload
+    failed, or ``CacheMissError`` as ``fetch_series`` does when an offline
+    cache lacks a payload, so it can be passed as ``sync_series(fetch=...)``.
+    """
+    report = ingest(series_ids, start_year, end_year, api_key, **kwargs)
+    misses = [f for f in report.failures if f.cache_miss]
+    if misses:
+        raise CacheMissError(misses[0].error)
+    report.raise_for_failures()
+    return report.frame
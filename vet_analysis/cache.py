@@ -0,0 +1,110 @@
+"""Persistent on-disk cache for BLS API responses.
+
+Entries are content addressed: the key is a hash of the parts of a payload
+that determine the response (series IDs, start and end year and the
+catalog/calculation flags), never the registration key. Each entry is one
+JSON file; its mtime is bumped on every hit so eviction can drop the least
+recently used files once the cache grows past ``max_bytes``.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+DEFAULT_CACHE_DIR = '.cache/bls'
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# payload fields that change what BLS sends back
+KEY_FIELDS = ('startyear', 'endyear', 'catalog', 'calculations', 'annualaverage', 'aspects')
+
+
+class CacheMissError(LookupError):
+    """Raised in offline mode when a request is not in the cache."""
+
+
+def payload_key(payload):
+    """Return the content hash identifying ``payload``'s response."""
+    parts = {'seriesid': sorted(payload['seriesid'])}
+    for field in KEY_FIELDS:
+        if payload.get(field) not in (None, False):
+            parts[field] = str(payload[field])
+    raw = json.dumps(parts, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ResponseCache:
+    """Directory of cached responses with a TTL and LRU size bound.
+
+    ``ttl`` is in seconds (``None`` never expires). With ``offline=True``
+    nothing is fetched: stale entries are still served and a miss raises
+    ``CacheMissError``.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL,
+                 max_bytes=DEFAULT_MAX_BYTES, offline=False):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, payload):
+        """Return the cached response for ``payload`` or ``None``."""
+        path = self._path(payload_key(payload))
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            if self.offline:
+                raise CacheMissError(f"no cached response for {payload['seriesid']} "
+                                     f"{payload['startyear']}-{payload['endyear']}")
+            return None
+        expired = self.ttl is not None and time.time() - entry['fetched_at'] > self.ttl
+        if expired and not self.offline:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return entry['response']
+
+    def put(self, payload, response):
+        """Store ``response`` for ``payload`` and evict down to ``max_bytes``."""
+        entry = {'fetched_at': time.time(), 'response': response}
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp, self._path(payload_key(payload)))
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until under ``max_bytes``."""
+        if self.max_bytes is None:
+            return
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for e in it:
+                if e.name.endswith('.json'):
+                    st = e.stat()
+                    entries.append((st.st_mtime, st.st_size, e.path))
+                    total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                os.remove(os.path.join(self.directory, name))
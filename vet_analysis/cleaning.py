@@ -0,0 +1,130 @@
+"""Vectorized normalization of the sources onto one monthly time key.
+
+Every source is mapped to a ``period[M]`` column. Rows that summarize more
+than one month are keyed on the last month they cover and tagged in a
+``freq`` column:
+
+* ``M`` - BLS monthly periods ``M01``-``M12`` and FRED monthly dates
+* ``Q`` - BLS quarterly periods ``Q01``-``Q04`` (keyed on Mar/Jun/Sep/Dec)
+* ``A`` - BLS annual averages ``M13`` and ``Q05`` (keyed on December)
+* ``FY`` - federal fiscal years, October to September (keyed on September)
+
+Parsing never runs Python per row: the period codes and date strings are
+factorized, the handful of distinct values are parsed, and the result is
+gathered back with the factor codes.
+"""
+import numpy as np
+import pandas as pd
+
+FREQS = ['M', 'Q', 'A', 'FY']
+FISCAL_YEAR_END_MONTH = 9
+
+
+def month_ordinals(year, month):
+    """Return ``period[M]`` ordinals (months since 1970-01) for arrays."""
+    return (np.asarray(year, dtype='int64') - 1970) * 12 + np.asarray(month, dtype='int64') - 1
+
+
+def to_periods(ordinals, index=None, name='period'):
+    """Wrap month ordinals as a ``period[M]`` Series."""
+    arr = pd.arrays.PeriodArray(np.asarray(ordinals, dtype='int64'),
+                                dtype=pd.PeriodDtype('M'))
+    return pd.Series(arr, index=index, name=name)
+
+
+def _parse_period_code(code):
+    """Map one BLS period code to ``(end month, freq)``."""
+    kind, num = code[0], int(code[1:])
+    if kind == 'M' and 1 <= num <= 12:
+        return num, 'M'
+    if kind == 'M' and num == 13:
+        return 12, 'A'
+    if kind == 'Q' and 1 <= num <= 4:
+        return num * 3, 'Q'
+    if kind == 'Q' and num == 5:
+        return 12, 'A'
+    raise ValueError(f"unsupported BLS period code {code!r}")
+
+
+def _factorized_ints(values):
+    if pd.api.types.is_integer_dtype(values):
+        return np.asarray(values, dtype='int64')
+    codes, uniques = pd.factorize(values)
+    return np.asarray(uniques.astype('int64'))[codes]
+
+
+def parse_bls_periods(year, period):
+    """Turn BLS ``year``/``period`` columns into ``period`` and ``freq``.
+
+    Returns a frame aligned with ``period``'s index.
+    """
+    period = pd.Series(period)
+    codes, uniques = pd.factorize(period)
+    if (codes < 0).any():
+        raise ValueError("period column contains missing values")
+    parsed = [_parse_period_code(str(code)) for code in uniques]
+    end_month = np.array([month for month, _ in parsed], dtype='int64')[codes]
+    freq_codes = np.array([FREQS.index(freq) for _, freq in parsed], dtype='int8')[codes]
+    ordinals = month_ordinals(_factorized_ints(pd.Series(year).to_numpy()), end_month)
+    return pd.DataFrame({
+        'period': to_periods(ordinals, index=period.index),
+        'freq': pd.Categorical.from_codes(freq_codes, categories=FREQS),
+    }, index=period.index)
+
+
+def parse_dates(dates, format='%m/%d/%Y'):
+    """Parse date strings (FRED's ``M/D/YYYY`` by default) to ``period[M]``."""
+    dates = pd.Series(dates)
+    codes, uniques = pd.factorize(dates)
+    if (codes < 0).any():
+        raise ValueError("date column contains missing values")
+    parsed = pd.to_datetime(pd.Index(uniques), format=format)
+    ordinals = month_ordinals(parsed.year, parsed.month)[codes]
+    return to_periods(ordinals, index=dates.index)
+
+
+def fiscal_year_periods(fiscal_year, end_month=FISCAL_YEAR_END_MONTH):
+    """Key fiscal years on their last month (September by default)."""
+    fiscal_year = pd.Series(fiscal_year)
+    ordinals = month_ordinals(_factorized_ints(fiscal_year.to_numpy()), end_month)
+    return to_periods(ordinals, index=fiscal_year.index)
+
+
+def _canonical(series_id, keys, freq, value):
+    return pd.DataFrame({
+        'series_id': series_id,
+        'period': keys,
+        'freq': freq,
+        'value': pd.to_numeric(value, errors='coerce'),
+    })
+
+
+def normalize_bls(df, series_id=None):
+    """Canonical frame for a BLS ``year``/``period``/``value`` frame."""
+    if series_id is None:
+        series_id = df['series_id']
+    keys = parse_bls_periods(df['year'], df['period'])
+    return _canonical(series_id, keys['period'], keys['freq'], df['value'])
+
+
+def normalize_fred(df, value_column, series_id=None, date_column='DATE'):
+    """Canonical frame for a FRED ``DATE``/value export."""
+    keys = parse_dates(df[date_column])
+    freq = pd.Categorical.from_codes(np.zeros(len(df), dtype='int8'), categories=FREQS)
+    return _canonical(series_id or value_column, keys, freq, df[value_column])
+
+
+def normalize_fiscal(df, value_column, series_id=None, year_column='fiscal_year'):
+    """Canonical frame for per-fiscal-year totals."""
+    keys = fiscal_year_periods(df[year_column])
+    freq = pd.Categorical.from_codes(np.full(len(df), FREQS.index('FY'), dtype='int8'),
+                                     categories=FREQS)
+    return _canonical(series_id or value_column, keys, freq, df[value_column])
+
+
+def normalize_sources(frames):
+    """Concatenate canonical frames into one table sorted by series and period."""
+    df = pd.concat(frames, ignore_index=True)
+    df['series_id'] = df['series_id'].astype('category')
+    df['freq'] = df['freq'].astype(pd.CategoricalDtype(FREQS))
+    return df.sort_values(['series_id', 'period'], kind='stable', ignore_index=True)
@@ -0,0 +1,136 @@
+"""Compact dtypes for the observation frames.
+
+Read naively, a BLS export is three columns of Python strings, and the
+usual coercion turns them into 64-bit numbers. The loaders here produce
+the small schema directly:
+
+* series IDs and BLS period codes as ``category`` (one byte per row),
+* years as ``int16`` and months as ``int8``,
+* values as ``float32`` where every value survives the round trip at the
+  precision it was published with (rates like ``2.8`` do, dollar totals
+  like ``232489728.41`` do not and stay ``float64``).
+
+A ``float32`` value cast straight back to ``float64`` is not the number
+that was published (5.1 becomes 5.099999904632568), so code that stacks or
+persists these frames (the store, the observation table, the panel and the
+aggregate cube) widens them with ``widen``, which rounds back to the
+published decimals. Purely computational code (outliers, modelling) casts
+to ``float64`` and sees only that ~1e-7 relative noise.
+"""
+import numpy as np
+import pandas as pd
+
+MAX_DECIMALS = 6
+
+
+def decimals(values):
+    """Fewest decimal places (up to ``MAX_DECIMALS``) that represent ``values``.
+
+    Returns ``None`` when the values need more than that.
+    """
+    values = np.asarray(values, dtype='float64')
+    values = values[np.isfinite(values)]
+    for d in range(MAX_DECIMALS + 1):
+        if np.array_equal(np.round(values, d), values):
+            return d
+    return None
+
+
+def float32_safe(values):
+    """Whether ``values`` round-trip through ``float32`` at their precision."""
+    values = np.asarray(values, dtype='float64')
+    d = decimals(values)
+    if d is None:
+        return False
+    finite = np.isfinite(values)
+    back = values.astype('float32').astype('float64')
+    return bool(np.array_equal(np.round(back[finite], d), values[finite]))
+
+
+def compact_values(values):
+    """``values`` as ``float32`` when that loses nothing, else ``float64``."""
+    values = pd.to_numeric(values, errors='coerce')
+    dtype = 'float32' if float32_safe(values) else 'float64'
+    return values.astype(dtype) if isinstance(values, pd.Series) else np.asarray(values, dtype)
+
+
+def widen(values):
+    """``values`` as ``float64``; ``float32`` input is rounded back to its decimals.
+
+    ``compact_values`` only narrows values that round-trip at some
+    precision up to ``MAX_DECIMALS``, so the fewest decimals that map back
+    onto the same ``float32`` values recover the published numbers.
+    """
+    narrow = np.asarray(values)
+    wide = narrow.astype('float64')
+    if narrow.dtype != np.float32:
+        return wide
+    for d in range(MAX_DECIMALS + 1):
+        rounded = np.round(wide, d)
+        if np.array_equal(rounded.astype('float32'), narrow, equal_nan=True):
+            return rounded
+    return wide
+
+
+def smallest_int(values):
+    """``values`` in the narrowest signed integer dtype that holds them."""
+    values = np.asarray(values)
+    if values.size == 0:
+        return values.astype('int8')
+    lo, hi = values.min(), values.max()
+    for dtype in ('int8', 'int16', 'int32'):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return values.astype(dtype)
+    return values.astype('int64')
+
+
+def compact_frame(df, max_category_ratio=0.5):
+    """Copy of ``df`` with every column in its smallest lossless dtype.
+
+    Integers are narrowed, floats go to ``float32`` when ``float32_safe``,
+    and string columns with at most ``max_category_ratio`` distinct values
+    per row become ``category``. Other columns are left alone.
+    """
+    out = {}
+    for name, col in df.items():
+        if pd.api.types.is_bool_dtype(col) or isinstance(col.dtype, pd.CategoricalDtype):
+            out[name] = col
+        elif pd.api.types.is_integer_dtype(col) and not col.isna().any():
+            out[name] = pd.Series(smallest_int(col.to_numpy()), index=col.index)
+        elif pd.api.types.is_float_dtype(col):
+            out[name] = compact_values(col)
+        elif (pd.api.types.is_object_dtype(col) or pd.api.types.is_string_dtype(col)) \
+                and col.nunique(dropna=False) <= max_category_ratio * max(len(col), 1):
+            out[name] = col.astype('category')
+        else:
+            out[name] = col
+    return pd.DataFrame(out, index=df.index)
+
+
+def read_bls_csv(path, series_id=None):
+    """Read a ``year,period,value`` BLS export in the compact schema.
+
+    With ``series_id`` a categorical ``series_id`` column is added first.
+    """
+    df = pd.read_csv(path, dtype={'year': 'int16', 'period': 'category', 'value': str})
+    df['value'] = compact_values(df['value'])
+    if series_id is not None:
+        df.insert(0, 'series_id', pd.Categorical.from_codes(
+            np.zeros(len(df), dtype='int8'), categories=[series_id]))
+    return df
+
+
+def memory_report(before, after):
+    """Deep memory use of each frame in ``before`` against ``after``.
+
+    Both map a frame name to a frame; returns bytes before and after and
+    the reduction factor per name.
+    """
+    rows = []
+    for name, frame in before.items():
+        b = int(frame.memory_usage(deep=True).sum())
+        a = int(after[name].memory_usage(deep=True).sum())
+        rows.append({'frame': name, 'before_bytes': b, 'after_bytes': a,
+                     'reduction': b / a if a else float('nan')})
+    return pd.DataFrame(rows).set_index('frame')
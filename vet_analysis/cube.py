@@ -0,0 +1,373 @@
+"""Materialized aggregate cube of every series by month and its rollups.
+
+Charts, event windows and models keep asking for the same aggregates:
+yearly means, means over a range of years, fiscal-year totals laid onto
+months. ``AggregateCube`` computes them once and keeps them as dense
+(series, slot) arrays of sums and counts for each level:
+
+* ``month`` - the monthly observations themselves
+* ``quarter`` and ``year`` - calendar quarters and years
+* ``fiscal_year`` - October to September, plus fiscal-year observations
+  (the spending totals) that have no monthly detail
+* ``rolling12`` - the trailing twelve months ending in each month
+
+A slot is a plain function of the month ordinal (``period[M]`` ordinals,
+see ``vet_analysis.cleaning``), so a lookup is an array index and a mean
+over a range of slots is two reads from a cached prefix sum. ``frame``
+returns a level as a wide frame without any ``groupby``.
+
+``update`` takes new or revised observations and recomputes only the
+slots of the months they touch, for the series they touch. Quarterly and
+annual rows from the sources (BLS ``Q01``-``Q05``, ``M13``) are skipped,
+since those rollups are computed from the months.
+"""
+import numpy as np
+import pandas as pd
+
+from vet_analysis.cleaning import FISCAL_YEAR_END_MONTH, month_ordinals, to_periods
+from vet_analysis.compact import widen
+
+LEVELS = ('month', 'quarter', 'year', 'fiscal_year', 'rolling12')
+STATS = ('mean', 'sum', 'count')
+ROLLING_MONTHS = 12
+# months of empty room added when the cube grows forward, so monthly updates
+# do not reallocate every array each time
+GROW_MONTHS = 12
+
+
+class AggregateCube:
+    """Series x month observations with quarterly, yearly, fiscal and rolling rollups."""
+
+    def __init__(self, fiscal_year_end_month=FISCAL_YEAR_END_MONTH):
+        self.fiscal_offset = 12 - fiscal_year_end_month
+        self.series = pd.Index([], dtype=object, name='series_id')
+        self._start = self._stop = None
+        self.values = np.empty((0, 0))
+        self.native = np.empty((0, 0))
+        self._sums = {}
+        self._counts = {}
+        self._cache = {}
+
+    @classmethod
+    def from_observations(cls, table, **kwargs):
+        """Cube of a long ``series_id``/``period``/``freq``/``value`` table."""
+        return cls(**kwargs).update(table)
+
+    @classmethod
+    def from_store(cls, store_dir=None, fiscal_series=None, **kwargs):
+        """Cube of the columnar store (``vet_analysis.store``).
+
+        Month-13 rows of ``fiscal_series`` (default: the spending series)
+        are fiscal-year totals; other month-13 rows are annual averages and
+        are skipped like ``M13`` rows.
+        """
+        from vet_analysis.store import ANNUAL, SPENDING_SERIES, STORE_DIR, load_observations
+        df = load_observations(store_dir or STORE_DIR)
+        cube = cls(**kwargs)
+        annual = df['month'].to_numpy() == ANNUAL
+        fiscal = annual & df['series_id'].isin(fiscal_series or [SPENDING_SERIES]).to_numpy()
+        end_month = 12 - cube.fiscal_offset
+        month = np.where(annual, end_month, df['month'].to_numpy())
+        freq = np.where(fiscal, 'FY', np.where(annual, 'A', 'M'))
+        return cube.update(pd.DataFrame({
+            'series_id': df['series_id'].astype(str),
+            'period': to_periods(month_ordinals(df['year'], month)),
+            'freq': freq,
+            'value': df['value'],
+        }))
+
+    # slots
+
+    def _slot(self, level, ordinals):
+        ordinals = np.asarray(ordinals, dtype='int64')
+        if level in ('month', 'rolling12'):
+            return ordinals
+        if level == 'quarter':
+            return ordinals // 3
+        if level == 'year':
+            return ordinals // 12
+        if level == 'fiscal_year':
+            return (ordinals + self.fiscal_offset) // 12
+        raise ValueError(f"unknown level {level!r}; expected one of {LEVELS}")
+
+    def _first_month(self, level, slot):
+        if level in ('month', 'rolling12'):
+            return slot
+        if level == 'quarter':
+            return slot * 3
+        return slot * 12 - (self.fiscal_offset if level == 'fiscal_year' else 0)
+
+    def _slot_range(self, level):
+        if self._start is None:
+            return 0, 0
+        return int(self._slot(level, self._start)), int(self._slot(level, self._stop - 1)) + 1
+
+    def _key_slot(self, level, key):
+        """Slot of a level key: a month or quarter ``Period``/string, or a year."""
+        if level in ('month', 'rolling12'):
+            return pd.Period(key, freq='M').ordinal
+        if level == 'quarter':
+            return pd.Period(key, freq='Q').ordinal
+        return int(key) - 1970
+
+    def _keys(self, level, slots):
+        if level in ('month', 'rolling12'):
+            return pd.PeriodIndex(to_periods(slots), name='period')
+        if level == 'quarter':
+            return pd.PeriodIndex.from_ordinals(slots, freq='Q', name='quarter')
+        return pd.Index(slots + 1970, name=level)
+
+    # building
+
+    def _add_series(self, ids):
+        new = pd.Index(ids).unique().difference(self.series)
+        if len(new) == 0:
+            return
+        self.series = self.series.append(pd.Index(list(new), dtype=object)).rename('series_id')
+        k = len(new)
+        self.values = np.vstack([self.values, np.full((k, self.values.shape[1]), np.nan)])
+        self.native = np.vstack([self.native, np.full((k, self.native.shape[1]), np.nan)])
+        for arrays in (self._sums, self._counts):
+            for level, arr in arrays.items():
+                arrays[level] = np.vstack([arr, np.zeros((k, arr.shape[1]))])
+
+    def _extend(self, lo, hi):
+        """Grow the month axis to cover ordinals ``lo..hi`` and the trailing
+        ``rolling12`` windows ending up to ``hi + 11``."""
+        need = hi + ROLLING_MONTHS
+        if self._start is None:
+            start, stop = lo, max(hi + 1 + GROW_MONTHS, need)
+        else:
+            start = min(self._start, lo)
+            stop = max(self._stop, hi + 1 + GROW_MONTHS, need) if need > self._stop \
+                else self._stop
+            if (start, stop) == (self._start, self._stop):
+                return
+        old = {level: self._slot_range(level) for level in LEVELS}
+        old_start = self._start
+        self._start, self._stop = start, stop
+        S = len(self.series)
+
+        def regrid(arr, level, fill):
+            lo_, hi_ = self._slot_range(level)
+            out = np.full((S, hi_ - lo_), fill)
+            if old_start is not None:
+                offset = old[level][0] - lo_
+                out[:, offset:offset + arr.shape[1]] = arr
+            return out
+
+        self.values = regrid(self.values, 'month', np.nan)
+        self.native = regrid(self.native, 'fiscal_year', np.nan)
+        for level in ('quarter', 'year', 'fiscal_year', 'rolling12'):
+            self._sums[level] = regrid(self._sums.get(level, np.zeros((S, 0))), level, 0.0)
+            self._counts[level] = regrid(self._counts.get(level, np.zeros((S, 0))), level, 0.0)
+
+    def update(self, rows):
+        """Insert or revise observations and refresh the rollups they touch.
+
+        ``rows`` has ``series_id``, ``period`` (``period[M]``), ``freq`` and
+        ``value`` columns; fiscal-year rows are keyed on the last month of
+        their fiscal year, as ``vet_analysis.cleaning`` does.
+        """
+        fiscal = (rows['freq'] == 'FY').to_numpy()
+        keep = fiscal | (rows['freq'] == 'M').to_numpy()
+        if not keep.all():
+            rows, fiscal = rows[keep], fiscal[keep]
+        if rows.empty:
+            return self
+        # factorize reads categorical codes directly instead of converting every row to str
+        codes, ids = pd.factorize(rows['series_id'])
+        ids = pd.Index(np.asarray(ids, dtype=object).astype(str))
+        self._add_series(ids)
+        codes = self.series.get_indexer(ids)[codes]
+        ordinals = pd.PeriodIndex(rows['period'], freq='M').asi8
+        values = widen(rows['value'])
+        first = np.where(fiscal, ordinals - 11, ordinals)
+        lo, hi = int(first.min()), int(ordinals.max())
+        self._extend(lo, hi)
+
+        monthly = ~fiscal
+        self.values[codes[monthly], ordinals[monthly] - self._start] = values[monthly]
+        fy_slots = self._slot('fiscal_year', ordinals[fiscal]) - self._slot_range('fiscal_year')[0]
+        self.native[codes[fiscal], fy_slots] = values[fiscal]
+        self._refresh(np.unique(codes), lo, hi)
+        self._cache.clear()
+        return self
+
+    def _refresh(self, rows, lo, hi):
+        """Recompute every rollup slot of ``rows`` that months ``lo..hi`` fall in."""
+        for level in ('quarter', 'year', 'fiscal_year'):
+            slot_lo, slot_hi = self._slot(level, lo), self._slot(level, hi)
+            a = max(self._first_month(level, slot_lo), self._start)
+            b = min(self._first_month(level, slot_hi + 1), self._stop)
+            block = self.values[np.ix_(rows, np.arange(a, b) - self._start)]
+            slots = self._slot(level, np.arange(a, b))
+            starts = np.flatnonzero(np.r_[True, np.diff(slots) != 0])
+            observed = ~np.isnan(block)
+            sums = np.add.reduceat(np.where(observed, block, 0.0), starts, axis=1)
+            counts = np.add.reduceat(observed, starts, axis=1).astype('float64')
+            cols = slots[starts] - self._slot_range(level)[0]
+            if level == 'fiscal_year':
+                native = self.native[np.ix_(rows, cols)]
+                has = ~np.isnan(native)
+                sums += np.where(has, native, 0.0)
+                counts += has
+            self._sums[level][np.ix_(rows, cols)] = sums
+            self._counts[level][np.ix_(rows, cols)] = counts
+
+        # trailing windows ending in lo .. hi + 11 read months lo - 11 .. hi + 11
+        a, b = max(lo, self._start), min(hi + ROLLING_MONTHS, self._stop)
+        src = np.arange(max(a - ROLLING_MONTHS + 1, self._start), b) - self._start
+        block = self.values[np.ix_(rows, src)]
+        observed = ~np.isnan(block)
+        pad = np.zeros((len(rows), 1))
+        csum = np.hstack([pad, np.cumsum(np.where(observed, block, 0.0), axis=1)])
+        ccount = np.hstack([pad, np.cumsum(observed, axis=1)])
+        end = np.arange(a, b) - self._start - src[0] + 1
+        begin = np.maximum(end - ROLLING_MONTHS, 0)
+        cols = np.arange(a, b) - self._start
+        self._sums['rolling12'][np.ix_(rows, cols)] = csum[:, end] - csum[:, begin]
+        self._counts['rolling12'][np.ix_(rows, cols)] = ccount[:, end] - ccount[:, begin]
+
+    # queries
+
+    def _level(self, level):
+        if level == 'month':
+            observed = ~np.isnan(self.values)
+            return np.where(observed, self.values, 0.0), observed.astype('float64')
+        if level not in self._sums:
+            self._slot(level, 0)
+            return np.zeros((len(self.series), 0)), np.zeros((len(self.series), 0))
+        return self._sums[level], self._counts[level]
+
+    def _stat(self, level, stat, sums, counts):
+        if stat == 'sum':
+            return np.where(counts > 0, sums, np.nan)
+        if stat == 'count':
+            return counts
+        if stat != 'mean':
+            raise ValueError(f"unknown stat {stat!r}; expected one of {STATS}")
+        full = counts >= (ROLLING_MONTHS if level == 'rolling12' else 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(full, sums / counts, np.nan)
+
+    def _rows(self, series):
+        if series is None:
+            return np.arange(len(self.series))
+        series = [series] if isinstance(series, str) else list(series)
+        codes = self.series.get_indexer(series)
+        if (codes < 0).any():
+            raise KeyError(f"series not in cube: {[s for s, c in zip(series, codes) if c < 0]}")
+        return codes
+
+    def frame(self, level='year', stat='mean', series=None):
+        """One level as a frame of level keys (rows) by series (columns).
+
+        ``rolling12`` means are only given where all twelve months are
+        observed. Slots before the first and after the last observation of
+        any selected series are left out.
+        """
+        cache_key = (level, stat, None if series is None else tuple(np.atleast_1d(series)))
+        if cache_key not in self._cache:
+            rows = self._rows(series)
+            sums, counts = self._level(level)
+            counts = counts[rows]
+            values = self._stat(level, stat, sums[rows], counts)
+            lo = self._slot_range(level)[0]
+            seen = np.flatnonzero(counts.any(axis=0))
+            span = slice(seen[0], seen[-1] + 1) if len(seen) else slice(0, 0)
+            keys = self._keys(level, np.arange(lo, lo + counts.shape[1])[span])
+            self._cache[cache_key] = pd.DataFrame(values[:, span].T, index=keys,
+                                                  columns=self.series[rows])
+        return self._cache[cache_key]
+
+    def lookup(self, series_id, level, key, stat='mean'):
+        """One cell, e.g. ``lookup('UNRATE', 'year', 2020)``; NaN when empty."""
+        row = self._rows(series_id)[0]
+        lo, hi = self._slot_range(level)
+        slot = self._key_slot(level, key)
+        if not lo <= slot < hi:
+            return np.nan
+        sums, counts = self._level(level)
+        col = slot - lo
+        return float(self._stat(level, stat, sums[row, col], counts[row, col]))
+
+    def _prefix(self, level):
+        if ('prefix', level) not in self._cache:
+            sums, counts = self._level(level)
+            pad = np.zeros((len(self.series), 1))
+            self._cache['prefix', level] = (np.hstack([pad, np.cumsum(sums, axis=1)]),
+                                            np.hstack([pad, np.cumsum(counts, axis=1)]))
+        return self._cache['prefix', level]
+
+    def window(self, level, start, end, stat='mean', series=None):
+        """Aggregate of every month in the level slots ``start..end`` (inclusive).
+
+        Means are over the underlying observations, not an average of slot
+        means. Returns one value per series, from two prefix-sum reads.
+        """
+        if level == 'rolling12':
+            raise ValueError("windows over rolling12 would count months twelve times")
+        rows = self._rows(series)
+        lo, hi = self._slot_range(level)
+        a = int(np.clip(self._key_slot(level, start) - lo, 0, hi - lo))
+        b = int(np.clip(self._key_slot(level, end) - lo + 1, 0, hi - lo))
+        psum, pcount = self._prefix(level)
+        sums = psum[rows, max(b, a)] - psum[rows, a]
+        counts = pcount[rows, max(b, a)] - pcount[rows, a]
+        return pd.Series(self._stat(level, stat, sums, counts), index=self.series[rows])
+
+    def compare_windows(self, windows, baseline, series=None, level='year'):
+        """``vet_analysis.events.compare_windows`` answered from the cube.
+
+        ``level`` is one level for all series or a ``{series_id: level}``
+        mapping (e.g. spending by fiscal year, rates by calendar year).
+        Returns the same ``baseline``/``value``/``delta``/``pct_change``
+        frame, indexed by series, window and metric ``'value'``.
+        """
+        rows = self._rows(series)
+        ids = list(self.series[rows])
+        levels = level if isinstance(level, dict) else dict.fromkeys(ids, level)
+        windows = [w for w in windows if w.name != baseline.name]
+        out = []
+        for sid in ids:
+            lvl = levels.get(sid, 'year')
+            base = self.window(lvl, baseline.start, baseline.end, series=sid).iloc[0]
+            for w in windows:
+                value = self.window(lvl, w.start, w.end, series=sid).iloc[0]
+                out.append((sid, w.name, 'value', base, value))
+        result = pd.DataFrame(out, columns=['series_id', 'window', 'metric', 'baseline', 'value'])
+        result['window'] = pd.Categorical(result['window'], categories=[w.name for w in windows])
+        result['delta'] = result['value'] - result['baseline']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result['pct_change'] = result['delta'] / result['baseline'] * 100
+        return result.set_index(['series_id', 'window', 'metric']).sort_index()
+
+    def aligned(self, columns, dropna=False):
+        """Monthly frame with each column read from a series at some level.
+
+        ``columns`` maps a column name to ``(series_id, level)``; every month
+        gets the value of the slot it falls in, so
+        ``('VA_TOTAL_OBLIGATIONS', 'fiscal_year')`` lays the fiscal-year
+        totals onto their twelve months. ``year``, ``month`` and
+        ``fiscal_year`` helper columns are added as in ``vet_analysis.panel``.
+        """
+        ordinals = np.arange(self._start, self._stop) if self._start is not None \
+            else np.empty(0, dtype='int64')
+        data = {}
+        for name, (sid, level) in columns.items():
+            row = self._rows(sid)[0]
+            sums, counts = self._level(level)
+            cols = self._slot(level, ordinals) - self._slot_range(level)[0]
+            data[name] = self._stat(level, 'mean', sums[row, cols], counts[row, cols])
+        frame = pd.DataFrame(data, index=pd.PeriodIndex(to_periods(ordinals), name='period'))
+        observed = frame.notna().any(axis=1).to_numpy()
+        seen = np.flatnonzero(observed)
+        frame = frame.iloc[seen[0]:seen[-1] + 1] if len(seen) else frame.iloc[:0]
+        ordinals = frame.index.asi8
+        frame['year'] = ordinals // 12 + 1970
+        frame['month'] = ordinals % 12 + 1
+        frame['fiscal_year'] = self._slot('fiscal_year', ordinals) + 1970
+        if dropna:
+            frame = frame.dropna(subset=list(columns))
+        return frame
@@ -0,0 +1,84 @@
+"""Baseline-vs-window comparisons for named event windows.
+
+An event window is a named, inclusive time range (a recession, a policy
+change, a funding shift). ``compare_windows`` labels each row with the
+window(s) it falls in, aggregates every metric for every window (and every
+group, e.g. series) in one ``groupby``, and reports each window's change
+against a baseline window. Rows are scanned once regardless of how many
+windows and metrics are compared.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class EventWindow:
+    """Named inclusive time range, e.g. ``EventWindow('covid', 2020, 2022)``.
+
+    ``start``/``end`` are in the units of the time column being compared:
+    years, fiscal years, or ``pd.Period`` months.
+    """
+    name: str
+    start: object
+    end: object
+
+
+def _as_numbers(values):
+    """Time values as comparable numbers (Period ordinals or plain numbers)."""
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.PeriodDtype):
+        return values.array.asi8
+    if isinstance(values, pd.Period):
+        return values.ordinal
+    return np.asarray(values)
+
+
+def window_membership(times, windows):
+    """Return ``(row, window)`` index pairs for every row inside a window.
+
+    Windows may overlap; a row in two windows appears twice.
+    """
+    t = _as_numbers(times)
+    starts = np.array([_as_numbers(w.start) for w in windows])
+    ends = np.array([_as_numbers(w.end) for w in windows])
+    inside = (t[:, None] >= starts[None, :]) & (t[:, None] <= ends[None, :])
+    return np.nonzero(inside)
+
+
+def label_windows(frame, windows, time_column='year'):
+    """Rows of ``frame`` that fall in a window, with a ``window`` label column."""
+    rows, which = window_membership(frame[time_column], windows)
+    labelled = frame.iloc[rows].copy()
+    labelled['window'] = pd.Categorical.from_codes(which, categories=[w.name for w in windows])
+    return labelled
+
+
+def compare_windows(frame, windows, baseline, metrics, time_column='year', by=None,
+                    agg='mean'):
+    """Change of each metric in each window relative to ``baseline``.
+
+    Returns a frame indexed by (``by`` groups,) window and metric with the
+    ``baseline`` and ``value`` aggregates, ``delta`` and ``pct_change``.
+    A window or baseline with no rows gives NaN instead of raising.
+    """
+    if isinstance(metrics, str):
+        metrics = [metrics]
+    by = [] if by is None else [by] if isinstance(by, str) else list(by)
+    all_windows = [baseline] + [w for w in windows if w.name != baseline.name]
+    labelled = label_windows(frame[[time_column, *by, *metrics]], all_windows, time_column)
+    stats = labelled.groupby([*by, 'window'], observed=False)[metrics].agg(agg)
+
+    long = stats.index.repeat(len(metrics)).to_frame(index=False)
+    long['metric'] = np.tile(metrics, len(stats))
+    long['value'] = stats.to_numpy(dtype='float64').ravel()
+    keys = [*by, 'metric']
+    is_base = long['window'] == baseline.name
+    base = long.loc[is_base, [*keys, 'value']].rename(columns={'value': 'baseline'})
+    long = long.loc[~is_base].merge(base, on=keys, how='left')
+    long['window'] = long['window'].cat.remove_categories(baseline.name)
+    long['delta'] = long['value'] - long['baseline']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        long['pct_change'] = long['delta'] / long['baseline'] * 100
+    return (long.set_index([*by, 'window', 'metric'])
+                .sort_index()[['baseline', 'value', 'delta', 'pct_change']])
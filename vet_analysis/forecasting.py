@@ -0,0 +1,226 @@
+"""Batched monthly forecasts for many series at once.
+
+Every model works on a (series, months) array ``Y`` with the series in
+rows and fits all rows together; the only Python loops run over months or
+forecast steps, never over series:
+
+* ``seasonal_naive`` repeats the value from one season earlier.
+* ``fit_smoothing`` fits Holt's linear exponential smoothing. The smoothing
+  parameters are picked per series from a grid, and all grid points of all
+  series are run through the recursion together.
+* ``fit_arx`` fits an autoregression on ``lags`` months plus lagged
+  exogenous regressors (monthly VA spending), solving every series'
+  normal equations in one stacked ``np.linalg.solve``.
+
+The fitted states support warm starts: ``update`` takes the months that
+arrived since the fit and gives the same result as refitting on the full
+history, at the cost of only the new months. Smoothing keeps the state
+and squared-error sum of every grid point; ARX keeps each series' normal
+equations.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+SEASON = 12
+DEFAULT_ALPHAS = np.round(np.linspace(0.05, 0.95, 19), 2)
+DEFAULT_BETAS = np.array([0.0, 0.05, 0.1, 0.2, 0.3])
+
+
+def _matrix(Y):
+    Y = np.asarray(Y, dtype='float64')
+    return Y[None, :] if Y.ndim == 1 else Y
+
+
+def series_matrix(table, series_ids=None, freq='M'):
+    """Wide (series, months) array from a long observation table.
+
+    ``table`` has ``series_id``, ``period``, ``freq`` and ``value`` columns
+    (see ``vet_analysis.observations``). Only the months every selected
+    series covers are kept. Returns ``(series_ids, periods, Y)``.
+    """
+    rows = table[table['freq'] == freq] if freq is not None else table
+    wide = rows.pivot_table(index='period', columns='series_id', values='value',
+                            aggfunc='last', observed=True)
+    if series_ids is not None:
+        wide = wide[list(series_ids)]
+    wide = wide.dropna().sort_index()
+    return list(wide.columns), wide.index, wide.to_numpy(dtype='float64').T
+
+
+def forecast_frame(values, series_ids, last_period):
+    """Forecast array (series, horizon) as a frame with future periods as columns."""
+    values = _matrix(values)
+    start = pd.Period(last_period, freq='M') + 1
+    return pd.DataFrame(values, index=pd.Index(series_ids, name='series_id'),
+                        columns=pd.period_range(start, periods=values.shape[1], freq='M'))
+
+
+def seasonal_naive(Y, horizon, season=SEASON):
+    """Each forecast month takes the value observed one ``season`` earlier."""
+    Y = _matrix(Y)
+    steps = np.arange(horizon)
+    return Y[:, Y.shape[1] - season + steps % season]
+
+
+@dataclass
+class SmoothingState:
+    """Holt recursion state for every (grid point, series)."""
+    alphas: np.ndarray
+    betas: np.ndarray
+    level: np.ndarray
+    trend: np.ndarray
+    sse: np.ndarray
+    n: int
+
+    @property
+    def best(self):
+        """Index of the grid point with the lowest one-step SSE, per series."""
+        return self.sse.argmin(axis=0)
+
+    @property
+    def params(self):
+        """Chosen ``alpha`` and ``beta`` per series as a (series, 2) array."""
+        return np.column_stack([self.alphas[self.best], self.betas[self.best]])
+
+    def update(self, Y_new):
+        """Run the recursion over the new months (series, k) in place."""
+        a, b = self.alphas[:, None], self.betas[:, None]
+        for y in _matrix(Y_new).T:
+            fitted = self.level + self.trend
+            self.sse += (y[None, :] - fitted) ** 2
+            level = a * y[None, :] + (1 - a) * fitted
+            self.trend = b * (level - self.level) + (1 - b) * self.trend
+            self.level = level
+            self.n += 1
+        return self
+
+    def forecast(self, horizon):
+        cols = np.arange(self.level.shape[1])
+        level, trend = self.level[self.best, cols], self.trend[self.best, cols]
+        return level[:, None] + trend[:, None] * np.arange(1, horizon + 1)
+
+
+def fit_smoothing(Y, alphas=DEFAULT_ALPHAS, betas=DEFAULT_BETAS):
+    """Holt's linear exponential smoothing with per-series grid-searched parameters.
+
+    Pass ``betas=[0]`` for simple exponential smoothing.
+    """
+    Y = _matrix(Y)
+    if Y.shape[1] < 3:
+        raise ValueError("need at least three months to fit exponential smoothing")
+    grid_a, grid_b = np.meshgrid(np.asarray(alphas, 'float64'), np.asarray(betas, 'float64'),
+                                 indexing='ij')
+    G, S = grid_a.size, Y.shape[0]
+    state = SmoothingState(
+        grid_a.ravel(), grid_b.ravel(),
+        level=np.broadcast_to(Y[:, 1], (G, S)).copy(),
+        trend=np.broadcast_to(Y[:, 1] - Y[:, 0], (G, S)).copy(),
+        sse=np.zeros((G, S)), n=2)
+    return state.update(Y[:, 2:])
+
+
+@dataclass
+class ARXState:
+    """Normal equations and recent history of an ARX fit for every series."""
+    lags: int
+    exog_lag: int
+    xtx: np.ndarray
+    xty: np.ndarray
+    coef: np.ndarray
+    y_tail: np.ndarray
+    x_tail: np.ndarray
+    x_scale: np.ndarray
+    n: int
+
+    def _solve(self):
+        try:
+            self.coef = np.linalg.solve(self.xtx, self.xty[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            self.coef = np.einsum('sij,sj->si', np.linalg.pinv(self.xtx), self.xty)
+        return self
+
+    def update(self, Y_new, X_new=None):
+        """Add the new months to the normal equations and re-solve."""
+        Y_new = _matrix(Y_new)
+        y = np.concatenate([self.y_tail, Y_new], axis=1)
+        x = None
+        if self.x_tail is not None:
+            x = np.concatenate([self.x_tail, _exog(X_new, Y_new.shape) / self.x_scale], axis=1)
+        Z, target = _lagged(y, x, self.lags, self.exog_lag, start=self.y_tail.shape[1])
+        self.xtx += np.einsum('snk,snj->skj', Z, Z)
+        self.xty += np.einsum('snk,sn->sk', Z, target)
+        self.y_tail = y[:, -self.lags:]
+        if x is not None:
+            self.x_tail = x[:, -max(self.exog_lag, 1):]
+        self.n += Y_new.shape[1]
+        return self._solve()
+
+    def forecast(self, horizon, X_future=None):
+        """Recursive ``horizon``-month forecast.
+
+        ``X_future`` (series or shared, horizon) gives the exogenous values
+        of the forecast months; without it the last observed value is held.
+        """
+        y = self.y_tail.copy()
+        x = self.x_tail
+        if x is not None:
+            if X_future is None:
+                future = np.repeat(x[:, -1:], horizon, axis=1)
+            else:
+                future = _exog(X_future, (y.shape[0], horizon)) / self.x_scale
+            x = np.concatenate([x, future], axis=1)
+        out = np.empty((y.shape[0], horizon))
+        for h in range(horizon):
+            row = [np.ones(y.shape[0]), *(y[:, -i] for i in range(1, self.lags + 1))]
+            if x is not None:
+                row.append(x[:, x.shape[1] - horizon + h - self.exog_lag])
+            out[:, h] = np.einsum('sk,sk->s', np.column_stack(row), self.coef)
+            y = np.concatenate([y[:, 1:], out[:, h:h + 1]], axis=1)
+        return out
+
+
+def _exog(X, shape):
+    X = np.asarray(X, dtype='float64')
+    return np.broadcast_to(X if X.ndim == 2 else X[None, :], shape)
+
+
+def _lagged(y, x, lags, exog_lag, start=None):
+    """Design tensor (series, rows, k) and targets (series, rows).
+
+    Rows are the months from ``start`` (default: the first month with a
+    full set of lags) to the end of ``y``.
+    """
+    T = y.shape[1]
+    start = max(lags, exog_lag if x is not None else 0) if start is None else start
+    cols = [np.ones((y.shape[0], T - start))]
+    cols += [y[:, start - i:T - i] for i in range(1, lags + 1)]
+    if x is not None:
+        offset = x.shape[1] - T
+        cols.append(x[:, offset + start - exog_lag:offset + T - exog_lag])
+    return np.stack(cols, axis=2), y[:, start:]
+
+
+def fit_arx(Y, X=None, lags=3, exog_lag=1):
+    """Autoregression on ``lags`` months plus ``X`` lagged by ``exog_lag`` months.
+
+    ``X`` is one exogenous series shared by all rows of ``Y`` (months,) or
+    one per row (series, months), aligned with ``Y``. It is divided by its
+    standard deviation once at fit time so the normal equations stay well
+    conditioned.
+    """
+    Y = _matrix(Y)
+    x = x_scale = None
+    if X is not None:
+        X = _exog(X, Y.shape)
+        x_scale = X.std(axis=1, keepdims=True)
+        x_scale[x_scale == 0] = 1.0
+        x = X / x_scale
+    Z, target = _lagged(Y, x, lags, exog_lag)
+    state = ARXState(lags, exog_lag,
+                     xtx=np.einsum('snk,snj->skj', Z, Z), xty=np.einsum('snk,sn->sk', Z, target),
+                     coef=None, y_tail=Y[:, -lags:],
+                     x_tail=None if x is None else x[:, -max(exog_lag, 1):],
+                     x_scale=x_scale, n=Y.shape[1])
+    return state._solve()
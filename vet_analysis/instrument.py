@@ -0,0 +1,128 @@
+"""Per-stage timing, memory and I/O measurements.
+
+``Instrumentation.stage(name)`` is a context manager recording, for the
+code inside it:
+
+- wall time and CPU time of the calling thread,
+- the process' peak RSS at the end of the stage and how much it grew,
+- the tracemalloc peak of Python allocations (only with ``trace_memory``,
+  which slows allocation-heavy code down noticeably),
+- bytes read and written through system calls (``rchar``/``wchar`` from
+  ``/proc/self/io``; ``None`` where that file does not exist).
+
+RSS and I/O counters are per process, so for stages that run concurrently
+(see ``vet_analysis.pipeline``) they include the other stages' work; wall
+and CPU time do not. Records are emitted as JSON or in the Prometheus text
+exposition format.
+"""
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRIC_PREFIX = 'vet_analysis_stage'
+
+# StageMetrics field -> Prometheus help text
+METRICS = {
+    'wall_seconds': "Wall-clock time spent in the stage",
+    'cpu_seconds': "CPU time of the thread that ran the stage",
+    'peak_rss_bytes': "Process peak resident set size after the stage",
+    'rss_growth_bytes': "Growth of the process peak RSS during the stage",
+    'traced_peak_bytes': "tracemalloc peak of Python allocations",
+    'read_bytes': "Bytes read through system calls",
+    'write_bytes': "Bytes written through system calls",
+}
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    wall_seconds: float
+    cpu_seconds: float
+    peak_rss_bytes: int = None
+    rss_growth_bytes: int = None
+    traced_peak_bytes: int = None
+    read_bytes: int = None
+    write_bytes: int = None
+    status: str = 'ok'
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes, or ``None``."""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def io_counters():
+    """``(bytes read, bytes written)`` by this process, or ``(None, None)``."""
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(':', 1) for line in f)
+    except OSError:
+        return None, None
+    return int(fields['rchar']), int(fields['wchar'])
+
+
+def _delta(after, before):
+    return None if after is None or before is None else after - before
+
+
+class Instrumentation:
+    """Collects a ``StageMetrics`` record per instrumented stage."""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.records = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Measure the block; it may set ``status`` in the yielded dict."""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        rss0, (read0, write0) = peak_rss(), io_counters()
+        wall0, cpu0 = time.perf_counter(), time.thread_time()
+        outcome = {'status': 'error'}
+        try:
+            yield outcome
+            if outcome['status'] == 'error':
+                outcome['status'] = 'ok'
+        finally:
+            wall, cpu = time.perf_counter() - wall0, time.thread_time() - cpu0
+            rss, (read, write) = peak_rss(), io_counters()
+            traced = tracemalloc.get_traced_memory()[1] if self.trace_memory else None
+            record = StageMetrics(name, wall, cpu, rss, _delta(rss, rss0), traced,
+                                  _delta(read, read0), _delta(write, write0), outcome['status'])
+            with self._lock:
+                self.records.append(record)
+
+    def to_dicts(self):
+        return [asdict(r) for r in self.records]
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dicts(), **kwargs)
+
+    def to_prometheus(self, labels=None):
+        """Records in the Prometheus text exposition format."""
+        extra = ''.join(f',{k}="{v}"' for k, v in sorted((labels or {}).items()))
+        lines = []
+        for field, help_text in METRICS.items():
+            metric = f"{METRIC_PREFIX}_{field}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for r in self.records:
+                value = getattr(r, field)
+                if value is not None:
+                    lines.append(f'{metric}{{stage="{r.name}",status="{r.status}"{extra}}} {value}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,147 @@
+"""One long observation table for every series, described by a registry.
+
+Instead of one named frame per source, all observations live in a single
+table with one row per series and period::
+
+    series_id  period   freq  year  value  source
+
+and ``SERIES_REGISTRY`` holds what is known about each series (source,
+title, units, population and where it is loaded from). Every per-series
+operation - summaries, null and duplicate counts, IQR bounds, comparisons
+against the national rate - is one ``groupby`` or merge over the table, so
+adding series means adding registry rows, not code.
+"""
+import numpy as np
+import pandas as pd
+
+from vet_analysis.cleaning import FREQS, normalize_bls, normalize_fiscal, normalize_fred
+from vet_analysis.compact import read_bls_csv, widen
+from vet_analysis.profiling import Profiler
+from vet_analysis.store import SOURCE_FILES, SPENDING_SERIES, UNRATE_SERIES
+
+REGISTRY_COLUMNS = ['source', 'title', 'units', 'population', 'loader', 'path', 'value_column']
+
+SERIES_REGISTRY = pd.DataFrame([
+    ('LNS13049526', 'BLS', "Unemployed, Gulf War era II veterans", 'thousands', 'veterans',
+     'bls', SOURCE_FILES['LNS13049526'], 'value'),
+    ('LNS14049526', 'BLS', "Unemployment rate, Gulf War era II veterans", 'percent', 'veterans',
+     'bls', SOURCE_FILES['LNS14049526'], 'value'),
+    (UNRATE_SERIES, 'FRED', "Unemployment rate", 'percent', 'all',
+     'fred', SOURCE_FILES[UNRATE_SERIES], 'UNRATE'),
+    (SPENDING_SERIES, 'USAspending', "VA total obligations", 'dollars', 'veterans',
+     'fiscal', SOURCE_FILES[SPENDING_SERIES], 'total_obligations'),
+], columns=['series_id'] + REGISTRY_COLUMNS).set_index('series_id')
+
+OBSERVATION_COLUMNS = ['series_id', 'period', 'freq', 'year', 'value', 'source']
+
+# shared by every series_summary call unless one is passed in
+PROFILER = Profiler()
+
+
+def _load(series_id, info, raw_files):
+    path = info['path']
+    if path not in raw_files:
+        raw_files[path] = read_bls_csv(path) if info['loader'] == 'bls' else pd.read_csv(path)
+    raw = raw_files[path]
+    if info['loader'] == 'bls':
+        return normalize_bls(raw, series_id)
+    if info['loader'] == 'fred':
+        return normalize_fred(raw, info['value_column'], series_id)
+    if info['loader'] == 'fiscal':
+        return normalize_fiscal(raw, info['value_column'], series_id)
+    raise ValueError(f"unknown loader {info['loader']!r} for {series_id}")
+
+
+def observation_table(frames, registry=SERIES_REGISTRY):
+    """Stack canonical frames (see ``vet_analysis.cleaning``) into the long table.
+
+    ``source`` comes from ``registry``; ``year`` is the calendar year of
+    ``period``, which for fiscal-year rows is the fiscal year.
+    """
+    # widen per frame: concat would upcast float32 values without rounding them back
+    df = pd.concat([frame.assign(value=widen(frame['value'])) for frame in frames],
+                   ignore_index=True)
+    series = df['series_id'].astype(str)
+    table = pd.DataFrame({
+        'series_id': pd.Categorical(series, categories=sorted(series.unique())),
+        'period': df['period'],
+        'freq': df['freq'].astype(pd.CategoricalDtype(FREQS)),
+        'year': df['period'].dt.year.astype('int16'),
+        'value': df['value'].astype('float64'),
+        'source': pd.Categorical(series.map(registry['source'])),
+    })
+    return table.sort_values(['series_id', 'period'], kind='stable', ignore_index=True)
+
+
+def load_observation_table(registry=SERIES_REGISTRY):
+    """Load every series in ``registry`` into one long table.
+
+    Files shared by several registry rows are read once.
+    """
+    raw_files = {}
+    frames = [_load(series_id, info, raw_files) for series_id, info in registry.iterrows()]
+    return observation_table(frames, registry)
+
+
+def _summarize(table):
+    # built-in aggregations rather than groupby.describe, which runs per group
+    g = table.groupby('series_id', observed=True)
+    values = g['value']
+    summary = values.agg(['count', 'size', 'mean', 'std', 'min']).astype('float64')
+    summary.insert(1, 'nulls', summary.pop('size') - summary['count'])
+    quartiles = values.quantile([0.25, 0.5, 0.75]).unstack()
+    summary[['25%', '50%', '75%']] = quartiles.to_numpy()
+    summary['max'] = values.max()
+    summary['first'] = g['period'].min()
+    summary['last'] = g['period'].max()
+    return summary
+
+
+def series_summary(table, profiler=None):
+    """``describe()`` of ``value`` per series plus null counts and time span.
+
+    One grouped pass over the table; the result is cached in ``profiler``
+    (``PROFILER`` by default) under the table's fingerprint, so summarizing
+    an unchanged table again is a lookup.
+    """
+    profiler = PROFILER if profiler is None else profiler
+    return profiler.cached(table[['series_id', 'period', 'value']], 'series_summary',
+                           _summarize).copy()
+
+
+def duplicate_counts(table, subset=('series_id', 'period', 'freq')):
+    """Number of rows per series repeating an earlier row's ``subset`` values."""
+    dup = table.duplicated(list(subset))
+    return dup.groupby(table['series_id'], observed=True).sum().astype('int64')
+
+
+def yearly(table, agg='mean', freq='M'):
+    """Wide frame of one aggregate per year (rows) and series (columns).
+
+    Only rows of frequency ``freq`` are aggregated; ``None`` keeps all.
+    """
+    if freq is not None:
+        table = table[table['freq'] == freq]
+    return (table.groupby(['year', 'series_id'], observed=True)['value'].agg(agg)
+            .unstack('series_id'))
+
+
+def relative_to(table, baseline, series=None, freq='M'):
+    """Difference and ratio of each series to ``baseline`` in the same period.
+
+    Returns a long frame of ``series_id``, ``period``, ``year``, ``value``,
+    ``baseline``, ``difference`` and ``ratio``. ``series`` limits the
+    compared series (default: every other series with frequency ``freq``).
+    """
+    rows = table[table['freq'] == freq] if freq is not None else table
+    base = rows.loc[rows['series_id'] == baseline, ['period', 'value']]
+    others = rows[rows['series_id'] != baseline]
+    if series is not None:
+        others = others[others['series_id'].isin(list(series))]
+    merged = others[['series_id', 'period', 'year', 'value']].merge(
+        base.rename(columns={'value': 'baseline'}), on='period', how='inner')
+    merged['series_id'] = merged['series_id'].cat.remove_unused_categories()
+    merged['difference'] = merged['value'] - merged['baseline']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        merged['ratio'] = merged['value'] / merged['baseline']
+    return merged
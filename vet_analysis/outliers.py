@@ -0,0 +1,194 @@
+"""IQR outlier detection for every numeric column of a frame at once.
+
+``detect_outliers`` takes the 25th and 75th percentiles of all selected
+columns in one ``quantile([.25, .75])`` call (per group when ``by`` is
+given) and returns the bounds, the outlier counts and the row masks
+together, so no column is scanned more than once for the quantiles and
+once for the comparison.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_K = 1.5
+
+
+@dataclass
+class IQRResult:
+    """Bounds, counts and masks from one IQR pass.
+
+    ``bounds`` has ``q1``, ``q3``, ``iqr``, ``lower`` and ``upper`` columns,
+    indexed by column name (or by group and column name for grouped
+    results). ``mask`` is a boolean frame aligned with the input rows that
+    is ``True`` where a value lies outside its bounds, and ``counts`` is the
+    number of outliers per column (per group and column when grouped).
+    """
+    bounds: pd.DataFrame
+    counts: pd.Series
+    mask: pd.DataFrame
+
+    def rows(self, df, columns=None):
+        """Rows of ``df`` that are outliers in any of ``columns``."""
+        return df[self._any(columns)]
+
+    def filter(self, df, columns=None):
+        """Rows of ``df`` that are within bounds in all of ``columns``."""
+        return df[~self._any(columns)]
+
+    def _any(self, columns):
+        if columns is None:
+            columns = list(self.mask.columns)
+        elif isinstance(columns, str):
+            columns = [columns]
+        return self.mask[columns].to_numpy().any(axis=1)
+
+
+def numeric_columns(df, columns=None):
+    if columns is None:
+        return list(df.select_dtypes(include='number').columns)
+    if isinstance(columns, str):
+        return [columns]
+    return list(columns)
+
+
+def _bounds_frame(q1, q3, k):
+    iqr = q3 - q1
+    return pd.DataFrame({'q1': q1, 'q3': q3, 'iqr': iqr,
+                         'lower': q1 - k * iqr, 'upper': q3 + k * iqr})
+
+
+def _result(values, index, columns, lower, upper, bounds, group_codes=None,
+            group_index=None):
+    """Build an ``IQRResult`` from row-aligned ``lower``/``upper`` arrays."""
+    with np.errstate(invalid='ignore'):
+        flags = (values < lower) | (values > upper)
+    mask = pd.DataFrame(flags, index=index, columns=columns)
+    if group_codes is None:
+        counts = pd.Series(flags.sum(axis=0), index=columns)
+    else:
+        per_group = pd.DataFrame(flags, columns=columns).groupby(group_codes).sum()
+        per_group.index = group_index
+        counts = per_group.stack()
+    return IQRResult(bounds, counts.astype('int64'), mask)
+
+
+def detect_outliers(df, columns=None, by=None, k=DEFAULT_K):
+    """Flag values outside ``[Q1 - k*IQR, Q3 + k*IQR]`` for every column.
+
+    ``columns`` defaults to all numeric columns. With ``by`` (a column name
+    or list of names) the quartiles are computed per group, e.g. per series
+    or per year.
+    """
+    columns = numeric_columns(df, columns)
+    values = df[columns].to_numpy(dtype='float64')
+    if by is None:
+        q = df[columns].quantile([0.25, 0.75])
+        bounds = _bounds_frame(q.loc[0.25], q.loc[0.75], k)
+        return _result(values, df.index, columns, bounds['lower'].to_numpy(),
+                       bounds['upper'].to_numpy(), bounds)
+
+    grouped = df.groupby(by, sort=True, observed=True, dropna=False)
+    codes = grouped.ngroup().to_numpy()
+    q = grouped[columns].quantile([0.25, 0.75])
+    q1 = q.xs(0.25, level=-1)
+    q3 = q.xs(0.75, level=-1)
+    bounds = _bounds_frame(q1.stack(), q3.stack(), k)
+    lower = (q1 - k * (q3 - q1)).to_numpy()[codes]
+    upper = (q3 + k * (q3 - q1)).to_numpy()[codes]
+    return _result(values, df.index, columns, lower, upper, bounds, codes, q1.index)
+
+
+def rolling_outliers(df, window, columns=None, k=DEFAULT_K, min_periods=None,
+                     center=False):
+    """Flag values against bounds from a rolling window of ``window`` rows.
+
+    ``bounds`` is indexed like ``df`` with a ``(column, stat)`` column
+    MultiIndex, since every row has its own bounds.
+    """
+    columns = numeric_columns(df, columns)
+    rolling = df[columns].rolling(window, min_periods=min_periods, center=center)
+    q1 = rolling.quantile(0.25)
+    q3 = rolling.quantile(0.75)
+    iqr = q3 - q1
+    lower, upper = q1 - k * iqr, q3 + k * iqr
+    bounds = pd.concat({'q1': q1, 'q3': q3, 'iqr': iqr, 'lower': lower, 'upper': upper},
+                       axis=1).swaplevel(axis=1).sort_index(axis=1)
+    return _result(df[columns].to_numpy(dtype='float64'), df.index, columns,
+                   lower.to_numpy(), upper.to_numpy(), bounds)
+
+
+def filter_outliers(df, columns=None, by=None, k=DEFAULT_K):
+    """Drop the rows that are outliers in any of ``columns``."""
+    return detect_outliers(df, columns, by, k).filter(df)
+
+
+def chunked_bounds(chunks, columns=None, k=DEFAULT_K, bins=1 << 16):
+    """IQR bounds for data that does not fit in memory.
+
+    ``chunks`` is a callable returning a fresh iterator of frames (for
+    example ``lambda: pd.read_csv(path, chunksize=1_000_000)``); it is read
+    twice. The first pass finds each column's range, the second builds a
+    ``bins``-bucket histogram from which the quartiles are interpolated, so
+    they are accurate to within one bucket width. ``columns`` defaults to
+    the numeric columns of the first chunk.
+    """
+    lo = hi = None
+    for chunk in chunks():
+        if lo is None:
+            columns = numeric_columns(chunk, columns)
+            lo = np.full(len(columns), np.inf)
+            hi = np.full(len(columns), -np.inf)
+        values = chunk[columns].to_numpy(dtype='float64')
+        lo = np.fmin(lo, np.nanmin(values, axis=0, initial=np.inf))
+        hi = np.fmax(hi, np.nanmax(values, axis=0, initial=-np.inf))
+    if lo is None:
+        # no chunks at all
+        columns = [] if columns is None else numeric_columns(None, columns)
+        lo = np.full(len(columns), np.inf)
+        hi = np.full(len(columns), -np.inf)
+    # one (lo, hi) pair for both the histogram range and the bucket width;
+    # constant columns get a unit range, empty ones (lo = inf) an empty histogram
+    lo = np.where(np.isfinite(lo), lo, 0.0)
+    hi = np.where(hi > lo, hi, lo + 1)
+
+    hist = np.zeros((len(columns), bins), dtype='int64')
+    for chunk in chunks():
+        values = chunk[columns].to_numpy(dtype='float64')
+        for j in range(len(columns)):
+            h, _ = np.histogram(values[:, j], bins=bins, range=(lo[j], hi[j]))
+            hist[j] += h
+
+    q1 = np.empty(len(columns))
+    q3 = np.empty(len(columns))
+    for j in range(len(columns)):
+        width = (hi[j] - lo[j]) / bins
+        cum = np.cumsum(hist[j])
+        q1[j], q3[j] = (_histogram_quantile(cum, lo[j], width, p) for p in (0.25, 0.75))
+    return _bounds_frame(pd.Series(q1, index=columns), pd.Series(q3, index=columns), k)
+
+
+def _histogram_quantile(cum, lo, width, p):
+    """Linear-interpolation quantile ``p`` from cumulative bucket counts."""
+    n = cum[-1]
+    if n == 0:
+        return np.nan
+    # same position convention as pandas' linear interpolation
+    target = p * (n - 1) + 1
+    b = int(np.searchsorted(cum, target))
+    before = cum[b - 1] if b else 0
+    inside = cum[b] - before
+    return lo + width * (b + (target - before) / inside)
+
+
+def chunked_outlier_counts(chunks, bounds):
+    """Count values outside ``bounds`` (from ``chunked_bounds``) chunk by chunk."""
+    columns = list(bounds.index)
+    lower = bounds['lower'].to_numpy()
+    upper = bounds['upper'].to_numpy()
+    counts = np.zeros(len(columns), dtype='int64')
+    for chunk in chunks():
+        values = chunk[columns].to_numpy(dtype='float64')
+        with np.errstate(invalid='ignore'):
+            counts += ((values < lower) | (values > upper)).sum(axis=0)
+    return pd.Series(counts, index=columns)
@@ -0,0 +1,146 @@
+"""Monthly panel that holds every source on one sorted integer time index.
+
+Instead of pairwise ``merge`` calls keyed on years, each source is placed
+on a dense range of month ordinals (``period[M]`` ordinals, see
+``vet_analysis.cleaning``). Aligning a source is a scatter into that range,
+so adding one costs a single O(n) pass and never rebuilds the columns
+already in the panel. Annual obligations are laid onto the months of their
+fiscal year (October to September) rather than the calendar year.
+"""
+import numpy as np
+import pandas as pd
+
+from vet_analysis.cleaning import FISCAL_YEAR_END_MONTH, month_ordinals, to_periods
+from vet_analysis.compact import widen
+
+
+def _ordinals(periods):
+    """Month ordinals of a ``period[M]`` Series/array."""
+    return np.asarray(pd.PeriodIndex(periods, freq='M').asi8, dtype='int64')
+
+
+class Panel:
+    """Sources aligned on one monthly index.
+
+    ``frame`` returns the aligned panel with a ``period`` index, one column
+    per source and ``year``, ``month`` and ``fiscal_year`` helper columns.
+    It is cached and only rebuilt after a source is added.
+    """
+
+    def __init__(self, fiscal_year_end_month=FISCAL_YEAR_END_MONTH):
+        self.fiscal_year_end_month = fiscal_year_end_month
+        self._start = None
+        self._stop = None
+        self._columns = {}
+        self._frame = None
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    @property
+    def sources(self):
+        return list(self._columns)
+
+    def _extend(self, lo, hi):
+        """Grow the index to cover ordinals ``lo..hi`` (inclusive)."""
+        if self._start is None:
+            self._start, self._stop = lo, hi + 1
+            return
+        start, stop = min(self._start, lo), max(self._stop, hi + 1)
+        if (start, stop) == (self._start, self._stop):
+            return
+        before, after = self._start - start, stop - self._stop
+        for name, col in self._columns.items():
+            self._columns[name] = np.concatenate(
+                [np.full(before, np.nan), col, np.full(after, np.nan)])
+        self._start, self._stop = start, stop
+
+    def add_series(self, name, ordinals, values, how='exact'):
+        """Align ``values`` observed at month ``ordinals`` onto the panel.
+
+        ``how='exact'`` leaves months without an observation empty;
+        ``how='asof'`` carries the last observation forward.
+        """
+        ordinals = np.asarray(ordinals, dtype='int64')
+        values = widen(values)
+        if len(ordinals) == 0:
+            raise ValueError(f"source {name!r} is empty")
+        if len(np.unique(ordinals)) != len(ordinals):
+            raise ValueError(f"source {name!r} has more than one value per month")
+        self._extend(int(ordinals.min()), int(ordinals.max()))
+        col = np.full(self._stop - self._start, np.nan)
+        col[ordinals - self._start] = values
+        if how == 'asof':
+            observed = np.zeros(len(col), dtype=bool)
+            observed[ordinals - self._start] = True
+            last = np.maximum.accumulate(np.where(observed, np.arange(len(col)), -1))
+            col = np.where(last >= 0, col[np.maximum(last, 0)], np.nan)
+        elif how != 'exact':
+            raise ValueError(f"unknown alignment {how!r}")
+        self._columns[name] = col
+        self._frame = None
+        return self
+
+    def add_monthly(self, name, frame, value_column, period_column='period', how='exact'):
+        """Add a monthly source keyed by a ``period[M]`` column.
+
+        Rows tagged as annual or quarterly in a ``freq`` column (see
+        ``vet_analysis.cleaning``) are skipped.
+        """
+        if 'freq' in frame:
+            frame = frame[frame['freq'] == 'M']
+        return self.add_series(name, _ordinals(frame[period_column]),
+                               frame[value_column], how)
+
+    def add_annual(self, name, frame, value_column, year_column='fiscal_year',
+                   fiscal=True, how='repeat'):
+        """Lay annual values onto the twelve months each year covers.
+
+        With ``fiscal=True`` year ``Y`` covers October ``Y-1`` to September
+        ``Y``. ``how='repeat'`` gives every month the annual value (levels),
+        ``how='spread'`` gives each month a twelfth of it (flows).
+        """
+        end_month = self.fiscal_year_end_month if fiscal else 12
+        years = np.asarray(frame[year_column], dtype='int64')
+        last = month_ordinals(years, np.full(len(years), end_month))
+        ordinals = (last[:, None] + np.arange(-11, 1)).ravel()
+        values = np.repeat(widen(frame[value_column]), 12)
+        if how == 'spread':
+            values = values / 12
+        elif how != 'repeat':
+            raise ValueError(f"unknown annual alignment {how!r}")
+        return self.add_series(name, ordinals, values)
+
+    @property
+    def frame(self):
+        if self._frame is None:
+            self._frame = self._build()
+        return self._frame
+
+    def _build(self):
+        if self._start is None:
+            return pd.DataFrame(index=pd.PeriodIndex([], freq='M', name='period'))
+        ordinals = np.arange(self._start, self._stop)
+        year = ordinals // 12 + 1970
+        month = ordinals % 12 + 1
+        fiscal_year = year + (month > self.fiscal_year_end_month)
+        index = pd.PeriodIndex(to_periods(ordinals), name='period')
+        data = dict(self._columns)
+        data.update({'year': year, 'month': month, 'fiscal_year': fiscal_year})
+        return pd.DataFrame(data, index=index)
+
+    def to_parquet(self, path):
+        """Save the aligned panel (period stored as ``YYYY-MM`` strings)."""
+        out = self.frame.reset_index()
+        out['period'] = out['period'].astype(str)
+        out.to_parquet(path, index=False)
+
+    @classmethod
+    def from_parquet(cls, path, fiscal_year_end_month=FISCAL_YEAR_END_MONTH):
+        """Load a panel saved by ``to_parquet``."""
+        df = pd.read_parquet(path)
+        panel = cls(fiscal_year_end_month)
+        ordinals = _ordinals(pd.PeriodIndex(df['period'], freq='M'))
+        for name in df.columns.drop(['period', 'year', 'month', 'fiscal_year']):
+            panel.add_series(name, ordinals, df[name])
+        return panel
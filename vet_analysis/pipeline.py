@@ -0,0 +1,380 @@
+"""A small dependency-graph runner with stages memoized on disk.
+
+Each stage names the stages it reads from. A stage's key hashes its own
+source code and that of every ``vet_analysis`` module it imports (followed
+through their imports in turn, see ``code_fingerprint``), its parameters, the files it declares and the fingerprints of
+its inputs' outputs, and its output is pickled under that key. A stage
+whose key is unchanged is loaded from disk instead of run, and because the
+key depends on the upstream *outputs* rather than their keys, a rerun
+upstream stage that produces identical data does not invalidate anything
+downstream. Stages marked ``volatile`` (network fetches) always run.
+
+A stage may carry a ``check``, a ``vet_analysis.validation.Schema`` run on
+every freshly computed output before it is stored. A failed check raises
+``ValidationError`` from ``run``, so nothing downstream of a bad frame is
+computed; the schema is part of the key, so changing a rule reruns the
+stage.
+
+Stages whose inputs are done are run concurrently on a thread pool, so
+independent branches such as the BLS, FRED and spending loads overlap.
+With an ``Instrumentation`` (``vet_analysis.instrument``) every stage,
+cached or not, is measured.
+
+``analysis_pipeline`` wires the project's own stages together; run it with
+``python -m vet_analysis run``.
+"""
+import ast
+import glob
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import pickle
+import tempfile
+import textwrap
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PIPELINE_DIR = '.cache/pipeline'
+
+
+@dataclass
+class Stage:
+    name: str
+    func: object
+    inputs: tuple = ()
+    params: dict = field(default_factory=dict)
+    files: tuple = ()
+    volatile: bool = False
+    check: object = None
+
+
+def fingerprint(value):
+    """Stable hex digest of a stage output."""
+    h = hashlib.sha256()
+    _update(h, value)
+    return h.hexdigest()[:16]
+
+
+def _update(h, value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        h.update(repr(list(value.columns) if isinstance(value, pd.DataFrame) else value.name).encode())
+        h.update(repr(list(value.dtypes) if isinstance(value, pd.DataFrame) else value.dtype).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        h.update(str(value.dtype).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value, key=str):
+            h.update(str(key).encode())
+            _update(h, value[key])
+    elif isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _update(h, item)
+    else:
+        h.update(pickle.dumps(value, protocol=4))
+
+
+def _imported_modules(source):
+    """Names imported from the ``vet_analysis`` package anywhere in ``source``."""
+    names = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.ImportFrom) and node.module == 'vet_analysis':
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and (node.module or '').startswith('vet_analysis.'):
+            names.add(node.module.split('.')[1])
+        elif isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[1] for alias in node.names
+                         if alias.name.startswith('vet_analysis.'))
+    return names
+
+
+def _module_source(name):
+    """Path and text of ``vet_analysis.<name>``, or None if it is not a submodule."""
+    try:
+        spec = importlib.util.find_spec(f'vet_analysis.{name}')
+    except ModuleNotFoundError:
+        return None
+    if spec is None or not spec.origin or not spec.origin.endswith('.py'):
+        return None
+    with open(spec.origin, encoding='utf-8') as f:
+        return spec.origin, f.read()
+
+
+def code_fingerprint(func, modules=()):
+    """Digest of ``func``'s source and of the ``vet_analysis`` code it can reach.
+
+    Every ``vet_analysis`` module imported by ``func`` is hashed whole, and
+    so are the modules those import, transitively. Helpers called from the
+    function's own module are not followed unless that module is listed in
+    ``modules``.
+    """
+    h = hashlib.sha256()
+    source = textwrap.dedent(inspect.getsource(func))
+    h.update(source.encode())
+    todo, seen = sorted(_imported_modules(source) | set(modules)), set()
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        found = _module_source(name)
+        if found is None:
+            continue
+        h.update(f"{name}\0{found[1]}".encode())
+        todo.extend(sorted(_imported_modules(found[1]) - seen))
+    return h.hexdigest()[:16]
+
+
+def _file_state(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class Pipeline:
+    """Registry of stages plus the on-disk memo of their outputs."""
+
+    def __init__(self, cache_dir=DEFAULT_PIPELINE_DIR, workers=4, instrumentation=None):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.instrumentation = instrumentation
+        self.stages = {}
+
+    def add(self, name, func, inputs=(), params=None, files=(), volatile=False, check=None):
+        """Register ``func(**inputs, **params)`` as stage ``name``.
+
+        ``check`` is called on each new output and raises to stop the run.
+        """
+        for dep in inputs:
+            if dep not in self.stages:
+                raise KeyError(f"stage {name!r} depends on unknown stage {dep!r}")
+        self.stages[name] = Stage(name, func, tuple(inputs), dict(params or {}),
+                                  tuple(files), volatile, check)
+        return func
+
+    def stage(self, name=None, inputs=(), **kwargs):
+        """Decorator form of ``add``."""
+        def register(func):
+            return self.add(name or func.__name__, func, inputs, **kwargs)
+        return register
+
+    def upstream(self, targets):
+        """``targets`` plus everything they depend on, in dependency order."""
+        order, seen = [], set()
+
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in self.stages[name].inputs:
+                visit(dep)
+            order.append(name)
+
+        for name in targets:
+            visit(name)
+        return order
+
+    def key(self, stage, input_fingerprints):
+        h = hashlib.sha256()
+        h.update(stage.name.encode())
+        h.update(code_fingerprint(stage.func).encode())
+        h.update(json.dumps(stage.params, sort_keys=True, default=str).encode())
+        for path in stage.files:
+            h.update(json.dumps([path, _file_state(path)]).encode())
+        if stage.check is not None:
+            h.update(repr(stage.check).encode())
+        for dep in stage.inputs:
+            h.update(input_fingerprints[dep].encode())
+        return h.hexdigest()[:16]
+
+    def _path(self, name, key):
+        return os.path.join(self.cache_dir, f"{name}-{key}.pkl")
+
+    def _load(self, name, key):
+        with open(self._path(name, key), 'rb') as f:
+            return pickle.load(f)
+
+    def _save(self, name, key, value, fp):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((fp, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(name, key))
+        # one entry per stage: drop outputs stored under older keys
+        for stale in glob.glob(self._path(name, '?' * 16)):
+            if stale != self._path(name, key):
+                os.remove(stale)
+
+    def _execute(self, stage, fingerprints, outputs, force):
+        measure = self.instrumentation.stage(stage.name) if self.instrumentation else nullcontext({})
+        with measure as outcome:
+            key = self.key(stage, fingerprints)
+            if not stage.volatile and stage.name not in force \
+                    and os.path.exists(self._path(stage.name, key)):
+                fp, value = self._load(stage.name, key)
+                outcome['status'] = 'cached'
+                return value, fp, 'cached'
+            kwargs = {dep: outputs[dep] for dep in stage.inputs}
+            value = stage.func(**kwargs, **stage.params)
+            if stage.check is not None:
+                outcome['status'] = 'invalid'
+                stage.check(value)
+            fp = fingerprint(value)
+            self._save(stage.name, key, value, fp)
+            outcome['status'] = 'ran'
+            return value, fp, 'ran'
+
+    def run(self, targets=None, force=()):
+        """Bring ``targets`` (default: every stage) up to date.
+
+        Returns ``(outputs, status)``: the value of every stage that was
+        needed and whether it ``'ran'`` or was ``'cached'``. Names in
+        ``force`` are rerun regardless of their key.
+        """
+        order = self.upstream(targets or list(self.stages))
+        force = set(force)
+        outputs, fingerprints, status = {}, {}, {}
+        pending = list(order)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running = {}
+            while pending or running:
+                for name in [n for n in pending
+                             if all(d in status for d in self.stages[n].inputs)]:
+                    pending.remove(name)
+                    running[pool.submit(self._execute, self.stages[name],
+                                        fingerprints, outputs, force)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    outputs[name], fingerprints[name], status[name] = future.result()
+        return outputs, status
+
+
+def _sync_bls(api_key=None, offline=False):
+    from vet_analysis.cache import CacheMissError, ResponseCache
+    from vet_analysis.sync import sync_series
+
+    cache = ResponseCache(offline=offline or not api_key)
+    try:
+        results = sync_series(api_key=api_key, cache=cache)
+    except CacheMissError:
+        return {}
+    return {sid: (r.inserted, r.revised) for sid, r in results.items()}
+
+
+def _load_bls(sync, path, series_id):
+    from vet_analysis.cleaning import normalize_bls
+    from vet_analysis.compact import read_bls_csv
+    return normalize_bls(read_bls_csv(path), series_id)
+
+
+def _load_fred(path, value_column):
+    from vet_analysis.cleaning import normalize_fred
+    return normalize_fred(pd.read_csv(path), value_column)
+
+
+def _load_spending(path):
+    from vet_analysis.outliers import detect_outliers
+    df = pd.read_csv(path)
+    return detect_outliers(df, ['total_obligations']).filter(df, 'total_obligations')
+
+
+def _build_panel(vet_unemployed, vet_unemployment_rate, unrate, spending):
+    from vet_analysis.panel import Panel
+    panel = Panel()
+    panel.add_monthly('vet_unemployed', vet_unemployed, 'value')
+    panel.add_monthly('vet_unemployment_rate', vet_unemployment_rate, 'value')
+    panel.add_monthly('UNRATE', unrate, 'value')
+    panel.add_annual('total_obligations', spending, 'total_obligations')
+    return panel.frame
+
+
+def _build_cube(vet_unemployed, vet_unemployment_rate, unrate, spending):
+    from vet_analysis.cleaning import normalize_fiscal
+    from vet_analysis.cube import AggregateCube
+    from vet_analysis.store import SPENDING_SERIES
+    cube = AggregateCube()
+    for frame in (vet_unemployed, vet_unemployment_rate, unrate):
+        cube.update(frame)
+    return cube.update(normalize_fiscal(spending, 'total_obligations', SPENDING_SERIES))
+
+
+def _correlation(cube, n_resamples=100_000, seed=42):
+    from vet_analysis.significance import correlation_tests
+    from vet_analysis.store import SPENDING_SERIES
+    annual = (cube.frame('fiscal_year', series=[SPENDING_SERIES, 'LNS14049526'])
+              .rename(columns={SPENDING_SERIES: 'total_obligations',
+                               'LNS14049526': 'vet_unemployment_rate'})
+              .dropna().reset_index())
+    return correlation_tests(annual, [('total_obligations', 'vet_unemployment_rate')],
+                             time_column='fiscal_year', n_resamples=n_resamples, seed=seed)
+
+
+def _evaluation(cube, n_splits=1000, seed=42, horizon=12):
+    from vet_analysis.modelling import evaluate_regression
+    from vet_analysis.store import SPENDING_SERIES
+    merged = cube.aligned({'UNRATE': ('UNRATE', 'month'),
+                           'total_obligations': (SPENDING_SERIES, 'fiscal_year')}, dropna=True)
+    filtered = merged[~merged['year'].isin([2020, 2021, 2022])]
+    return {
+        'all_years': evaluate_regression(merged['total_obligations'], merged['UNRATE'],
+                                         n_splits=n_splits, seed=seed, horizon=horizon).summary,
+        'without_covid': evaluate_regression(filtered['total_obligations'], filtered['UNRATE'],
+                                             n_splits=n_splits, seed=seed, horizon=horizon).summary,
+    }
+
+
+def _report(panel, vet_unemployment_rate, unrate, out_dir='reports'):
+    from vet_analysis.report import ChartSpec, render_report
+    specs = [
+        ChartSpec("spending_regplot", "spending_regplot",
+                  {"df": panel.dropna(subset=['vet_unemployed', 'total_obligations'])}),
+        ChartSpec("monthly_trend", "monthly_trend",
+                  {"series": {'Veterans': vet_unemployment_rate, 'National': unrate}}),
+        ChartSpec("spending_treemap", "spending_treemap",
+                  {"df": panel.dropna(subset=['UNRATE', 'total_obligations'])}),
+    ]
+    return {name: path for name, (path, _) in render_report(specs, out_dir).items()}
+
+
+def analysis_pipeline(api_key=None, offline=False, cache_dir=DEFAULT_PIPELINE_DIR, workers=4,
+                      instrumentation=None):
+    """The notebook's analysis as a ``Pipeline``.
+
+    sync -> the two BLS series, alongside the FRED and spending loads ->
+    panel and aggregate cube -> correlation tests and regression evaluation
+    (from the cube) and report charts.
+    Every load and the panel are validated (``vet_analysis.validation``).
+    """
+    from vet_analysis import validation
+    from vet_analysis.store import SOURCE_FILES, SPENDING_SERIES, UNRATE_SERIES
+    from vet_analysis.sync import BLS_SERIES_FILES
+
+    p = Pipeline(cache_dir, workers, instrumentation)
+    p.add('sync', _sync_bls, params={'api_key': api_key, 'offline': offline}, volatile=True)
+    for name, sid, schema in (('vet_unemployed', 'LNS13049526', validation.BLS_LEVEL),
+                              ('vet_unemployment_rate', 'LNS14049526', validation.BLS_RATE)):
+        path = BLS_SERIES_FILES[sid]
+        p.add(name, _load_bls, ['sync'], {'path': path, 'series_id': sid}, files=[path],
+              check=schema)
+    unrate_path, spending_path = SOURCE_FILES[UNRATE_SERIES], SOURCE_FILES[SPENDING_SERIES]
+    p.add('unrate', _load_fred, params={'path': unrate_path, 'value_column': 'UNRATE'},
+          files=[unrate_path], check=validation.FRED_RATE)
+    p.add('spending', _load_spending, params={'path': spending_path}, files=[spending_path],
+          check=validation.SPENDING)
+    p.add('panel', _build_panel, ['vet_unemployed', 'vet_unemployment_rate', 'unrate', 'spending'],
+          check=validation.PANEL)
+    p.add('cube', _build_cube, ['vet_unemployed', 'vet_unemployment_rate', 'unrate', 'spending'])
+    p.add('correlation', _correlation, ['cube'])
+    p.add('evaluation', _evaluation, ['cube'])
+    p.add('report', _report, ['panel', 'vet_unemployment_rate', 'unrate'])
+    return p
@@ -0,0 +1,210 @@
+"""The project's charts as functions of their input data.
+
+Each function draws one chart and returns the figure, so the notebook can
+show it and ``vet_analysis.report`` can render it headlessly. matplotlib,
+seaborn and plotly are imported inside the functions.
+
+Trend charts never hand raw monthly frames to ``sns.lineplot``, which
+bootstraps a confidence interval for every repeated x value. They plot
+either pre-aggregated yearly means or, for full monthly resolution, series
+downsampled with LTTB (largest-triangle-three-buckets) to a fixed number
+of points, so drawing time does not grow with the length of the history.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_POINTS = 500
+
+
+def _pyplot():
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def spending_regplot(df, x='total_obligations', y='vet_unemployed'):
+    """Scatter of spending against veteran unemployment with a fitted line."""
+    import seaborn as sns
+    plt = _pyplot()
+    fig = plt.figure(figsize=(10, 6))
+    sns.regplot(data=df, x=x, y=y, scatter_kws={'s': 50, 'alpha': 0.7}, line_kws={'color': 'red'})
+    plt.title("Impact of Government Spending on Veteran Unemployment Count")
+    plt.xlabel("Government Spending on Veteran Programs ($)")
+    plt.ylabel("Veteran Unemployment Count")
+    return fig
+
+
+def unemployment_trend(vet_rates, national, covid=(2020, 2022), xlim=(2014, 2023)):
+    """Veteran vs. national unemployment rate by year with the COVID years shaded.
+
+    ``vet_rates`` and ``national`` are yearly means indexed by year, e.g.
+    two columns of ``AggregateCube.frame('year')`` (``vet_analysis.cube``);
+    no per-year bootstrap interval is computed.
+    """
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    vet, total = vet_rates.sort_index(), national.sort_index()
+    ax.plot(vet.index, vet.to_numpy(), label='Veteran Unemployment Rate')
+    ax.plot(total.index, total.to_numpy(), label='Total US Unemployment Rate')
+    ax.axvspan(*covid, color='gray', alpha=0.3, label='COVID Years')
+    ax.set_title(f"Veteran vs Total US Unemployment Rate Over Time ({xlim[0]}-{xlim[1]})")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Unemployment Rate (%)")
+    ax.set_xlim(*xlim)
+    ax.legend()
+    return fig
+
+
+def lttb(x, y, n_out):
+    """Indices of ``n_out`` points chosen by largest-triangle-three-buckets.
+
+    ``x`` must be sorted. Keeps the first and last point and, from each of
+    the ``n_out - 2`` buckets in between, the point forming the largest
+    triangle with the previous pick and the next bucket's mean, which keeps
+    peaks and troughs that plain striding would drop.
+    """
+    return lttb_many(x, np.asarray(y, dtype='float64')[None, :], n_out)[0]
+
+
+def lttb_many(x, Y, n_out):
+    """``lttb`` for several series sharing one ``x``; ``Y`` is (series, n).
+
+    The bucket loop runs once for all series, so its Python overhead does
+    not grow with the number of series. Returns (series, n_out) indices.
+    """
+    x = np.asarray(x, dtype='float64')
+    Y = np.asarray(Y, dtype='float64')
+    S, n = Y.shape
+    if n_out >= n or n_out < 3:
+        return np.broadcast_to(np.arange(n), (S, n))
+    edges = np.linspace(1, n - 1, n_out - 1).astype('int64')
+    rows = np.arange(S)
+    picked = np.empty((S, n_out), dtype='int64')
+    picked[:, 0], picked[:, -1] = 0, n - 1
+    a = np.zeros(S, dtype='int64')
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = edges[i + 2] if i + 2 < len(edges) else n
+        cx = x[hi:nxt].mean()
+        cy = Y[:, hi:nxt].mean(axis=1)
+        ax, ay = x[a], Y[rows, a]
+        area = np.abs((ax - cx)[:, None] * (Y[:, lo:hi] - ay[:, None])
+                      - (ax[:, None] - x[lo:hi]) * (cy - ay)[:, None])
+        a = lo + np.argmax(area, axis=1)
+        picked[:, i + 1] = a
+    return picked
+
+
+def decimal_year(periods):
+    """``period[M]`` values as fractional years (2020-07 -> 2020.5)."""
+    ordinals = pd.PeriodIndex(periods, freq='M').asi8
+    return 1970 + ordinals / 12
+
+
+def downsample_monthly(series, max_points=DEFAULT_MAX_POINTS):
+    """Downsample ``{label: frame with period/value}`` to at most ``max_points`` each.
+
+    Series covering exactly the same months go through ``lttb_many``
+    together. Returns ``{label: (x, y)}`` with ``x`` in decimal years.
+    """
+    # hash of the month axis -> groups of members sharing it (compared in
+    # full, so a hash collision cannot merge different axes)
+    groups = {}
+    for label, frame in series.items():
+        frame = frame.sort_values('period')
+        x = decimal_year(frame['period'])
+        member = (label, x, frame['value'].to_numpy(dtype='float64'))
+        candidates = groups.setdefault(hash(x.tobytes()), [])
+        for members in candidates:
+            if np.array_equal(members[0][1], x):
+                members.append(member)
+                break
+        else:
+            candidates.append([member])
+    out = {}
+    for members in (m for candidates in groups.values() for m in candidates):
+        x = members[0][1]
+        idx = lttb_many(x, np.vstack([y for _, _, y in members]), max_points)
+        for (label, _, y), keep in zip(members, idx):
+            out[label] = (x[keep], y[keep])
+    return {label: out[label] for label in series}
+
+
+def monthly_trend(series, max_points=DEFAULT_MAX_POINTS, covid=(2020, 2023),
+                  title="Unemployment Rate by Month"):
+    """Monthly lines for many series, each downsampled to ``max_points``.
+
+    ``series`` maps a legend label to a frame with ``period`` and ``value``
+    columns. Past ten series the lines are drawn as one ``LineCollection``
+    without a legend.
+    """
+    from matplotlib.collections import LineCollection
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    lines = downsample_monthly(series, max_points)
+    if len(lines) <= 10:
+        for label, (x, y) in lines.items():
+            ax.plot(x, y, label=label, linewidth=1)
+    else:
+        ax.add_collection(LineCollection([np.column_stack(xy) for xy in lines.values()],
+                                         linewidths=0.5, alpha=0.6))
+        ax.autoscale_view()
+    if covid:
+        ax.axvspan(*covid, color='gray', alpha=0.3, label='COVID Years')
+    ax.set_title(title)
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Unemployment Rate (%)")
+    if len(lines) <= 10:
+        ax.legend()
+    return fig
+
+
+def monthly_trend_webgl(series, max_points=DEFAULT_MAX_POINTS * 4,
+                        title="Unemployment Rate by Month"):
+    """Interactive plotly version of ``monthly_trend`` drawn with WebGL."""
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    for label, (x, y) in downsample_monthly(series, max_points).items():
+        fig.add_trace(go.Scattergl(x=x, y=y, mode='lines', name=str(label)))
+    fig.update_layout(title=title, xaxis_title="Year", yaxis_title="Unemployment Rate (%)")
+    return fig
+
+
+def increase_barplot(increase_df):
+    """Percentage increase of each metric during the COVID years."""
+    import seaborn as sns
+    plt = _pyplot()
+    fig = plt.figure(figsize=(15, 10))
+    sns.barplot(data=increase_df, x="Metric", y="Percentage Increase", hue="Metric",
+                palette="viridis", legend=False)
+    plt.title("Percentage Increase During COVID-19 (2020-2022)")
+    plt.ylabel("Percentage Increase (%)")
+    return fig
+
+
+def spending_treemap(df):
+    """Plotly treemap of spending per fiscal year coloured by unemployment rate."""
+    import plotly.express as px
+    fig = px.treemap(
+        df,
+        path=["fiscal_year"],
+        values="total_obligations",
+        color="UNRATE",
+        color_continuous_scale="Viridis",
+        title="Government Spending on Veteran Programs by Fiscal Year and Unemployment Rate"
+    )
+    fig.update_layout(margin=dict(t=50, l=25, r=25, b=25))
+    fig.update_coloraxes(colorbar_title="Unemployment Rate (%)")
+    return fig
+
+
+def actual_vs_predicted(actual, predicted):
+    """Scatter of actual against predicted rates with the identity line."""
+    import seaborn as sns
+    plt = _pyplot()
+    fig = plt.figure(figsize=(10, 6))
+    sns.scatterplot(x=actual, y=predicted, color="blue")
+    plt.plot([actual.min(), actual.max()], [actual.min(), actual.max()], color='red')
+    plt.title('Actual vs. Predicted Veteran Unemployment Rates')
+    plt.xlabel('Actual Unemployment Rates')
+    plt.ylabel('Predicted Unemployment Rates')
+    return fig
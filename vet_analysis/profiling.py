@@ -0,0 +1,231 @@
+"""Cached, structured summaries of data frames.
+
+``profile_frame`` computes what ``describe(include='all')`` and ``info()``
+report in one pass: all numeric columns are stacked into a single float
+array and reduced together, and non-numeric columns get one
+``value_counts`` each. A ``Profiler`` caches profiles by a content
+fingerprint, so an unchanged frame is never profiled twice, and when a
+frame only gained rows at the end it folds the new rows into the cached
+moments instead of starting over.
+"""
+import hashlib
+import warnings
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+QUANTILES = (0.25, 0.5, 0.75)
+NUMERIC_STATS = ['count', 'nulls', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+def fingerprint(df):
+    """Cheap content hash of ``df``: columns, dtypes, index and values."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((list(df.columns), [str(t) for t in df.dtypes])).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _is_numeric(series):
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+@dataclass
+class ColumnMoments:
+    """Mergeable running statistics of the numeric columns."""
+    count: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+
+    @classmethod
+    def from_values(cls, values):
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, np.nansum(values, axis=0) / count, np.nan)
+            m2 = np.nansum((values - mean) ** 2, axis=0)
+        return cls(count, mean, m2,
+                   np.nanmin(values, axis=0, initial=np.inf),
+                   np.nanmax(values, axis=0, initial=-np.inf))
+
+    def merge(self, other):
+        """Combine two sets of moments (Chan et al. parallel update)."""
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(other.count == 0, self.mean,
+                            np.where(self.count == 0, other.mean,
+                                     self.mean + delta * other.count / n))
+            m2 = (np.nan_to_num(self.m2) + np.nan_to_num(other.m2)
+                  + np.nan_to_num(delta ** 2 * self.count * other.count / n))
+        return ColumnMoments(n, mean, m2, np.fmin(self.min, other.min),
+                             np.fmax(self.max, other.max))
+
+    @property
+    def std(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+
+@dataclass
+class FrameProfile:
+    """Summary statistics of one frame as structured data.
+
+    ``numeric`` has one row per numeric column with ``NUMERIC_STATS``;
+    ``categorical`` has ``count``, ``nulls``, ``unique``, ``top`` and
+    ``freq`` for the remaining columns; ``dtypes`` and ``memory_bytes``
+    hold what ``info()`` prints.
+    """
+    rows: int
+    dtypes: pd.Series
+    memory_bytes: int
+    numeric: pd.DataFrame
+    categorical: pd.DataFrame
+    moments: ColumnMoments = field(repr=False)
+    value_counts: dict = field(repr=False)
+
+    def to_frame(self):
+        """``describe(include='all')``-style frame (stats as rows)."""
+        frame = pd.concat([self.numeric, self.categorical], axis=0, sort=False).T
+        return frame[list(self.dtypes.index)]
+
+    def info_frame(self):
+        """``info()``-style frame of dtype and non-null count per column."""
+        counts = pd.concat([self.numeric['count'], self.categorical['count']])
+        return pd.DataFrame({'dtype': self.dtypes.astype(str),
+                             'non_null': counts.reindex(self.dtypes.index).astype('int64')})
+
+    def to_dict(self):
+        """JSON-serializable form for dashboards."""
+        def clean(frame):
+            return {col: {k: (None if pd.isna(v) else v.item() if hasattr(v, 'item') else v)
+                          for k, v in stats.items()}
+                    for col, stats in frame.to_dict(orient='index').items()}
+        return {
+            'rows': self.rows,
+            'memory_bytes': self.memory_bytes,
+            'dtypes': self.dtypes.astype(str).to_dict(),
+            'numeric': clean(self.numeric),
+            'categorical': clean(self.categorical.astype({'top': str})),
+        }
+
+
+def _numeric_values(df, columns):
+    if not columns:
+        return np.empty((len(df), 0))
+    return df[columns].to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _build(df, moments, value_counts):
+    numeric_cols = [c for c in df.columns if _is_numeric(df[c])]
+    other_cols = [c for c in df.columns if c not in numeric_cols]
+    values = _numeric_values(df, numeric_cols)
+    if values.size:
+        with warnings.catch_warnings():
+            # all-NaN columns just get NaN quantiles
+            warnings.simplefilter('ignore', RuntimeWarning)
+            quantiles = np.nanquantile(values, QUANTILES, axis=0)
+    else:
+        quantiles = np.full((len(QUANTILES), len(numeric_cols)), np.nan)
+    numeric = pd.DataFrame({
+        'count': moments.count,
+        'nulls': len(df) - moments.count,
+        'mean': moments.mean,
+        'std': moments.std,
+        'min': np.where(moments.count > 0, moments.min, np.nan),
+        '25%': quantiles[0], '50%': quantiles[1], '75%': quantiles[2],
+        'max': np.where(moments.count > 0, moments.max, np.nan),
+    }, index=numeric_cols, columns=NUMERIC_STATS)
+
+    rows = []
+    for col in other_cols:
+        vc = value_counts[col]
+        count = int(vc.sum())
+        rows.append({'count': count, 'nulls': len(df) - count, 'unique': len(vc),
+                     'top': vc.index[0] if len(vc) else None,
+                     'freq': int(vc.iloc[0]) if len(vc) else 0})
+    categorical = pd.DataFrame(rows, index=other_cols,
+                               columns=['count', 'nulls', 'unique', 'top', 'freq'])
+    return FrameProfile(len(df), df.dtypes, int(df.memory_usage(deep=True).sum()),
+                        numeric, categorical, moments, value_counts)
+
+
+def _value_counts(df, columns):
+    return {col: df[col].value_counts(dropna=True, sort=False) for col in columns}
+
+
+def _sort_counts(counts):
+    return {col: vc.sort_values(ascending=False, kind='stable') for col, vc in counts.items()}
+
+
+def profile_frame(df):
+    """Profile every column of ``df`` in one pass."""
+    numeric_cols = [c for c in df.columns if _is_numeric(df[c])]
+    other_cols = [c for c in df.columns if c not in numeric_cols]
+    moments = ColumnMoments.from_values(_numeric_values(df, numeric_cols))
+    return _build(df, moments, _sort_counts(_value_counts(df, other_cols)))
+
+
+class Profiler:
+    """Profile cache keyed by content fingerprint.
+
+    ``profile(df, key=...)`` also remembers the last profile per ``key``;
+    if the new frame is that frame with rows appended, only the new rows
+    are scanned for the counts, moments and value counts (quantiles are
+    still taken over the whole frame).
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._by_fingerprint = {}
+        self._by_key = {}
+
+    def profile(self, df, key=None):
+        fp = fingerprint(df)
+        cached = self._by_fingerprint.get(fp)
+        if cached is None:
+            cached = self._incremental(df, key) or profile_frame(df)
+            self._store(fp, cached)
+        if key is not None:
+            self._by_key[key] = (fp, len(df), cached)
+        return cached
+
+    def cached(self, df, name, compute):
+        """``compute(df)``, cached under ``df``'s fingerprint and ``name``."""
+        key = (fingerprint(df), name)
+        result = self._by_fingerprint.get(key)
+        if result is None:
+            result = compute(df)
+            self._store(key, result)
+        return result
+
+    def _store(self, fp, profile):
+        self._by_fingerprint[fp] = profile
+        while len(self._by_fingerprint) > self.max_entries:
+            self._by_fingerprint.pop(next(iter(self._by_fingerprint)))
+
+    def _incremental(self, df, key):
+        previous = self._by_key.get(key)
+        if previous is None:
+            return None
+        prev_fp, prev_rows, prev = previous
+        if len(df) <= prev_rows or list(df.dtypes.index) != list(prev.dtypes.index) \
+                or not df.dtypes.equals(prev.dtypes):
+            return None
+        if fingerprint(df.iloc[:prev_rows]) != prev_fp:
+            return None
+        tail = df.iloc[prev_rows:]
+        numeric_cols = list(prev.numeric.index)
+        moments = prev.moments.merge(
+            ColumnMoments.from_values(_numeric_values(tail, numeric_cols)))
+        tail_counts = _value_counts(tail, list(prev.categorical.index))
+        counts = {col: prev.value_counts[col].add(tail_counts[col], fill_value=0).astype('int64')
+                  for col in tail_counts}
+        return _build(df, moments, _sort_counts(counts))
+
+    def clear(self):
+        self._by_fingerprint.clear()
+        self._by_key.clear()
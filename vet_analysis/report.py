@@ -0,0 +1,136 @@
+"""Headless, cached batch rendering of the charts in ``vet_analysis.plotting``.
+
+Each chart is described by a ``ChartSpec``: the plotting function, its data
+and its options. The output file is named after a hash of all three plus
+the source of ``vet_analysis.plotting`` and the modules it imports, so a
+chart whose inputs have not changed is found on disk and skipped. The
+remaining charts are drawn on a process pool whose workers use the Agg
+backend. A single chart is drawn in-process with interactive mode off and
+saved through an Agg canvas, so it is headless too without switching the
+caller's backend (which would close their open figures); plotly figures are exported as static images when kaleido is
+installed and as HTML otherwise.
+"""
+import glob
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from vet_analysis import plotting
+from vet_analysis.pipeline import code_fingerprint
+
+REPORT_DIR = 'reports'
+KEY_GLOB = '[0-9a-f]' * 16
+
+
+@dataclass
+class ChartSpec:
+    """One chart: ``plotting.<chart>(**data, **options)`` saved as ``name``."""
+    name: str
+    chart: str
+    data: dict
+    options: dict = field(default_factory=dict)
+
+
+def _hash_value(h, value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        h.update(repr(list(value.columns) if isinstance(value, pd.DataFrame) else value.name).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        h.update(str(value.dtype).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict) and any(isinstance(v, (pd.DataFrame, pd.Series, np.ndarray, dict))
+                                         for v in value.values()):
+        for name in sorted(value, key=str):
+            h.update(str(name).encode())
+            _hash_value(h, value[name])
+    else:
+        h.update(json.dumps(value, sort_keys=True, default=str).encode())
+
+
+def spec_key(spec):
+    """Hash of the chart's code (its module and what that imports), data and options."""
+    h = hashlib.sha256()
+    h.update(spec.chart.encode())
+    h.update(code_fingerprint(getattr(plotting, spec.chart), ['plotting']).encode())
+    for name in sorted(spec.data):
+        h.update(name.encode())
+        _hash_value(h, spec.data[name])
+    _hash_value(h, spec.options)
+    return h.hexdigest()[:16]
+
+
+def _existing(out_dir, name, key):
+    return glob.glob(os.path.join(out_dir, f"{name}-{key}.*"))
+
+
+def _has_kaleido():
+    try:
+        import kaleido  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+def render_chart(spec, out_dir, key):
+    """Draw one chart headlessly and return the written path."""
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    with plt.ioff():
+        fig = getattr(plotting, spec.chart)(**spec.data, **spec.options)
+    base = os.path.join(out_dir, f"{spec.name}-{key}")
+    if hasattr(fig, 'savefig'):
+        path = base + '.png'
+        FigureCanvasAgg(fig)
+        fig.savefig(path, dpi=100, bbox_inches='tight')
+        plt.close(fig)
+    elif _has_kaleido():
+        path = base + '.png'
+        fig.write_image(path)
+    else:
+        path = base + '.html'
+        fig.write_html(path, include_plotlyjs='cdn')
+    return path
+
+
+def render_report(specs, out_dir=REPORT_DIR, workers=None):
+    """Render every chart in ``specs`` whose output is not already on disk.
+
+    Returns ``{name: (path, status)}`` with status ``'cached'`` or
+    ``'rendered'``. Outputs of older versions of a chart are removed.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    results = {}
+    todo = []
+    for spec in specs:
+        key = spec_key(spec)
+        existing = _existing(out_dir, spec.name, key)
+        if existing:
+            results[spec.name] = (existing[0], 'cached')
+        else:
+            todo.append((spec, key))
+
+    if todo:
+        workers = workers or min(os.cpu_count() or 1, len(todo))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                paths = list(pool.map(render_chart, [s for s, _ in todo],
+                                      [out_dir] * len(todo), [k for _, k in todo]))
+        else:
+            paths = [render_chart(s, out_dir, k) for s, k in todo]
+        for (spec, key), path in zip(todo, paths):
+            for old in glob.glob(os.path.join(out_dir, f"{spec.name}-{KEY_GLOB}.*")):
+                if old != path:
+                    os.remove(old)
+            results[spec.name] = (path, 'rendered')
+    return results
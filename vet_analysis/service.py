@@ -0,0 +1,345 @@
+"""Read-only HTTP query service over the cleaned data and model metrics.
+
+Dashboards and downstream jobs poll for the same few results. Instead of
+rerunning the notebook, ``QueryService`` loads one ``Snapshot`` - the
+aggregate cube of every cleaned series (``vet_analysis.cube``) and the
+correlation and regression metrics - through the memoized pipeline
+(``vet_analysis.pipeline``) and keeps it in memory. Queries are index
+lookups into the cube:
+
+    GET /series                          series, their levels and spans
+    GET /series/<id>?level=&stat=&start=&end=
+                                         one series at one level, as rows
+    GET /window/<level>?start=&end=&series=a,b&stat=
+                                         one aggregate per series over a range
+    GET /metrics                         correlation tests and regression scores
+    GET /health                          snapshot version and cache counters
+
+``/series`` and ``/window`` answer JSON, or an Arrow IPC stream with
+``format=arrow`` (or ``Accept: application/vnd.apache.arrow.stream``).
+
+Serialized responses are kept in an LRU keyed by snapshot version and
+normalized query. Each carries an ``ETag`` derived from the same key, so a
+poller sending ``If-None-Match`` gets ``304 Not Modified`` until the data
+actually changes. ``refresh`` builds the next snapshot beside the current
+one and swaps a single reference; a request in flight keeps the snapshot
+it started with, so none are dropped or see a half-built state.
+
+    python -m vet_analysis serve --port 8050 --refresh-interval 3600
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from vet_analysis.cube import LEVELS, STATS
+
+DEFAULT_PORT = 8050
+DEFAULT_CACHE_ENTRIES = 1024
+SNAPSHOT_STAGES = ['cube', 'correlation', 'evaluation']
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+
+
+class QueryError(ValueError):
+    """A request the service cannot answer, with its HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Snapshot:
+    cube: object
+    metrics: dict
+    version: str
+    loaded_at: float
+
+
+@dataclass
+class Response:
+    status: int
+    body: bytes
+    content_type: str
+    etag: str = None
+
+
+def _json_value(value):
+    if isinstance(value, (np.floating, float)):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def _records(df):
+    return [{k: _json_value(v) for k, v in row.items()} for row in df.to_dict('records')]
+
+
+def _summary(df):
+    """``EvaluationResult.summary`` as ``{kind: {metric: {stat: value}}}``."""
+    return {kind: {metric: {stat: _json_value(row[(metric, stat)])
+                            for stat in df.columns.get_level_values(1).unique()}
+                   for metric in df.columns.get_level_values(0).unique()}
+            for kind, row in df.iterrows()}
+
+
+def build_snapshot(outputs):
+    """``Snapshot`` from the outputs of ``SNAPSHOT_STAGES``."""
+    from vet_analysis.pipeline import fingerprint
+    cube = outputs['cube']
+    metrics = {
+        'correlation': _records(outputs['correlation']),
+        'evaluation': {name: _summary(df) for name, df in outputs['evaluation'].items()},
+    }
+    version = fingerprint([cube.values, cube.native, list(cube.series), cube._start,
+                           json.dumps(metrics, sort_keys=True)])
+    return Snapshot(cube, metrics, version, time.time())
+
+
+def load_snapshot(api_key=None, offline=True, cache_dir=None):
+    """Bring the snapshot stages up to date (reusing the memo) and build a ``Snapshot``."""
+    from vet_analysis.pipeline import DEFAULT_PIPELINE_DIR, analysis_pipeline
+    pipeline = analysis_pipeline(api_key, offline, cache_dir or DEFAULT_PIPELINE_DIR)
+    outputs, _ = pipeline.run(SNAPSHOT_STAGES)
+    return build_snapshot(outputs)
+
+
+def _parse_key(level, value):
+    """Query-string level key: ``2020-03`` for months, ``2020Q1`` for quarters, else a year."""
+    if value is None:
+        return None
+    try:
+        if level in ('month', 'rolling12'):
+            return pd.Period(value, freq='M')
+        if level == 'quarter':
+            return pd.Period(value, freq='Q')
+        return int(value)
+    except ValueError as e:
+        raise QueryError(400, f"bad {level} key {value!r}") from e
+
+
+def _format_key(key):
+    return str(key) if isinstance(key, pd.Period) else _json_value(key)
+
+
+class QueryService:
+    """Resident snapshot, query routing and the response LRU.
+
+    ``loader`` is called with no arguments to build each snapshot
+    (default: ``load_snapshot`` from the memoized pipeline, offline).
+    """
+
+    def __init__(self, loader=None, cache_entries=DEFAULT_CACHE_ENTRIES):
+        self.loader = loader or load_snapshot
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'hits': 0, 'misses': 0, 'not_modified': 0, 'refreshes': 0}
+        self.snapshot = self.loader()
+        self._stop = threading.Event()
+
+    # snapshots
+
+    def refresh(self):
+        """Build the next snapshot and swap it in; returns whether the data changed."""
+        snapshot = self.loader()
+        changed = snapshot.version != self.snapshot.version
+        self.snapshot = snapshot
+        with self._lock:
+            self.stats['refreshes'] += 1
+            if changed:
+                self._cache.clear()
+        return changed
+
+    def start_refresher(self, interval):
+        """Call ``refresh`` every ``interval`` seconds on a daemon thread."""
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:  # keep serving the last good snapshot
+                    print(f"refresh failed, serving snapshot {self.snapshot.version}: {e}")
+
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+    # requests
+
+    def handle(self, path, query, accept='', if_none_match=None):
+        """Answer one GET; ``query`` is a dict of query-string parameters."""
+        snapshot, query = self.snapshot, dict(query)
+        fmt = query.pop('format', None) or ('arrow' if ARROW_STREAM in accept else 'json')
+        if fmt not in ('json', 'arrow'):
+            raise QueryError(400, f"unknown format {fmt!r}")
+        with self._lock:
+            self.stats['requests'] += 1
+        if path == '/health':
+            return self._json(200, self._health(snapshot))
+        key = (snapshot.version, path, tuple(sorted(query.items())), fmt)
+        etag = '"' + hashlib.sha256(repr(key).encode()).hexdigest()[:20] + '"'
+        if if_none_match and etag in [t.strip() for t in if_none_match.split(',')]:
+            with self._lock:
+                self.stats['not_modified'] += 1
+            return Response(304, b'', None, etag)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.stats['hits'] += 1
+                return cached
+            self.stats['misses'] += 1
+        response = self._route(snapshot, path, query, fmt)
+        response.etag = etag
+        with self._lock:
+            self._cache[key] = response
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return response
+
+    def _route(self, snapshot, path, query, fmt):
+        parts = [unquote(p) for p in path.strip('/').split('/')]
+        if parts == ['series']:
+            return self._json(200, self._series_list(snapshot))
+        if len(parts) == 2 and parts[0] == 'series':
+            return self._table(self._series(snapshot, parts[1], query), fmt)
+        if len(parts) == 2 and parts[0] == 'window':
+            return self._table(self._window(snapshot, parts[1], query), fmt)
+        if parts == ['metrics']:
+            return self._json(200, snapshot.metrics)
+        raise QueryError(404, f"no route for {path}")
+
+    def _health(self, snapshot):
+        with self._lock:
+            stats = dict(self.stats, entries=len(self._cache))
+        return {'version': snapshot.version, 'loaded_at': snapshot.loaded_at,
+                'series': len(snapshot.cube.series), **stats}
+
+    def _series_list(self, snapshot):
+        from vet_analysis.observations import SERIES_REGISTRY
+        cube = snapshot.cube
+        counts = {level: cube.frame(level, 'count') for level in ('month', 'fiscal_year')}
+        out = []
+        for sid in cube.series:
+            item = {'series_id': sid}
+            if sid in SERIES_REGISTRY.index:
+                info = SERIES_REGISTRY.loc[sid]
+                item.update(title=info['title'], units=info['units'], source=info['source'])
+            level = 'month' if counts['month'][sid].any() else 'fiscal_year'
+            observed = counts[level].index[counts[level][sid].to_numpy() > 0]
+            item.update(level=level, first=_format_key(observed[0]),
+                        last=_format_key(observed[-1]), observations=len(observed))
+            out.append(item)
+        return out
+
+    @staticmethod
+    def _level_stat(query, default_level):
+        level = query.get('level', default_level)
+        stat = query.get('stat', 'mean')
+        if level not in LEVELS:
+            raise QueryError(400, f"unknown level {level!r}; expected one of {list(LEVELS)}")
+        if stat not in STATS:
+            raise QueryError(400, f"unknown stat {stat!r}; expected one of {list(STATS)}")
+        return level, stat
+
+    def _series(self, snapshot, series_id, query):
+        cube = snapshot.cube
+        if series_id not in cube.series:
+            raise QueryError(404, f"unknown series {series_id!r}")
+        monthly = cube.frame('month', 'count', series=[series_id])[series_id].any()
+        level, stat = self._level_stat(query, 'month' if monthly else 'fiscal_year')
+        values = cube.frame(level, stat, series=[series_id])[series_id]
+        start, end = (_parse_key(level, query.get(name)) for name in ('start', 'end'))
+        values = values.loc[start:end]
+        values = values.dropna()
+        return pd.DataFrame({'key': [_format_key(k) for k in values.index],
+                             'value': values.to_numpy(dtype='float64')})
+
+    def _window(self, snapshot, level, query):
+        level, stat = self._level_stat(dict(query, level=level), level)
+        if 'start' not in query or 'end' not in query:
+            raise QueryError(400, "window needs start and end")
+        series = query['series'].split(',') if query.get('series') else None
+        start, end = (_parse_key(level, query[name]) for name in ('start', 'end'))
+        try:
+            values = snapshot.cube.window(level, start, end, stat, series)
+        except KeyError as e:
+            raise QueryError(404, str(e.args[0])) from e
+        except ValueError as e:
+            raise QueryError(400, str(e)) from e
+        return pd.DataFrame({'series_id': list(values.index),
+                             'value': values.to_numpy(dtype='float64')})
+
+    # serialization
+
+    @staticmethod
+    def _json(status, payload):
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        return Response(status, body, 'application/json')
+
+    def _table(self, df, fmt):
+        if fmt == 'arrow':
+            import pyarrow as pa
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return Response(200, sink.getvalue().to_pybytes(), ARROW_STREAM)
+        return self._json(200, _records(df))
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in two writes; with Nagle on, keep-alive clients
+    # wait out the peer's delayed ACK (~40ms) on every response.
+    disable_nagle_algorithm = True
+    service = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            response = self.service.handle(url.path, dict(parse_qsl(url.query)),
+                                           self.headers.get('Accept', ''),
+                                           self.headers.get('If-None-Match'))
+        except QueryError as e:
+            response = QueryService._json(e.status, {'error': str(e)})
+        except Exception as e:
+            response = QueryService._json(500, {'error': f"{type(e).__name__}: {e}"})
+        self.send_response(response.status)
+        if response.etag:
+            self.send_header('ETag', response.etag)
+            self.send_header('Cache-Control', 'no-cache')
+        if response.content_type:
+            self.send_header('Content-Type', response.content_type)
+        self.send_header('Content-Length', str(len(response.body)))
+        self.end_headers()
+        self.wfile.write(response.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(service, host='127.0.0.1', port=DEFAULT_PORT):
+    """``ThreadingHTTPServer`` answering with ``service``; port 0 picks a free one."""
+    handler = type('Handler', (ServiceHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_service(service, host='127.0.0.1', port=0):
+    """Serve ``service`` on a background thread and return ``(server, url)``."""
+    server = make_server(service, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
@@ -0,0 +1,180 @@
+"""Typed columnar store for the observations in ``data/``.
+
+All sources are held as one long table of ``series_id``, ``year``,
+``month`` and ``value`` in Parquet, written once at ingest time so analysis
+runs never re-parse and re-cast the CSVs. Annual observations (BLS ``M13``
+averages and the fiscal-year spending totals) use ``month == 13``, the same
+convention BLS uses for annual averages.
+
+The dataset is partitioned by ``year`` (hive style, ``year=2024/``) and
+sorted by series within each file, so year-range filters prune whole
+directories and series filters are answered from row-group statistics.
+A directory per series as well would mean hundreds of thousands of tiny
+files once we track thousands of series.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs
+
+from vet_analysis.compact import read_bls_csv, widen
+
+STORE_DIR = 'data/store'
+
+SCHEMA = pa.schema([
+    ('series_id', pa.dictionary(pa.int32(), pa.string())),
+    ('year', pa.int16()),
+    ('month', pa.int8()),
+    ('value', pa.float64()),
+])
+KEY_COLUMNS = ['series_id', 'year', 'month']
+PARTITIONING = ds.partitioning(pa.schema([('year', pa.int16())]), flavor='hive')
+
+# series IDs used for the non-BLS sources
+UNRATE_SERIES = 'UNRATE'
+SPENDING_SERIES = 'VA_TOTAL_OBLIGATIONS'
+ANNUAL = 13
+
+SOURCE_FILES = {
+    'LNS13049526': 'data/veteran_unemployment_bls.csv',
+    'LNS14049526': 'data/veteran_unemployment_rates_bls.csv',
+    UNRATE_SERIES: 'data/us_unemployment_rate_2014_2024.csv',
+    SPENDING_SERIES: 'data/veterans_program_spending_by_year.csv',
+}
+
+
+def _frame(series_id, year, month, value):
+    """Store-layout frame: compact keys, values in the store's ``float64``.
+
+    Values are widened per source (``compact.widen``), before any concat
+    would upcast ``float32`` rates without rounding them back.
+    """
+    return pd.DataFrame({
+        'series_id': pd.Categorical.from_codes(np.zeros(len(year), dtype='int8'),
+                                               categories=[series_id]),
+        'year': year, 'month': month, 'value': widen(pd.to_numeric(value, errors='coerce')),
+    })
+
+
+def _bls_frame(path, series_id):
+    """A BLS export (read by ``compact.read_bls_csv``) in store layout."""
+    raw = read_bls_csv(path)
+    months = raw['period'].cat.categories.str.slice(1).astype('int8')
+    month = months.to_numpy()[raw['period'].cat.codes.to_numpy()]
+    return _frame(series_id, raw['year'], month, raw['value'])
+
+
+def read_fred_csv(path, series_id=UNRATE_SERIES, value_column='UNRATE'):
+    """Read a FRED ``DATE,<value>`` export (dates as ``M/D/YYYY``)."""
+    raw = pd.read_csv(path)
+    date = pd.to_datetime(raw['DATE'], format='%m/%d/%Y')
+    return _frame(series_id, date.dt.year.astype('int16'),
+                  date.dt.month.astype('int8'), raw[value_column].astype('float64'))
+
+
+def read_spending_csv(path, series_id=SPENDING_SERIES):
+    """Read the fiscal-year spending totals as annual observations."""
+    raw = pd.read_csv(path)
+    return _frame(series_id, raw['fiscal_year'].astype('int16'),
+                  np.full(len(raw), ANNUAL, dtype='int8'), raw['total_obligations'])
+
+
+def ingest_csvs(source_files=None):
+    """Read the CSVs in ``data/`` into one frame in store layout."""
+    source_files = source_files or SOURCE_FILES
+    frames = []
+    for series_id, path in source_files.items():
+        if series_id == UNRATE_SERIES:
+            frames.append(read_fred_csv(path, series_id))
+        elif series_id == SPENDING_SERIES:
+            frames.append(read_spending_csv(path, series_id))
+        else:
+            frames.append(_bls_frame(path, series_id))
+    df = pd.concat(frames, ignore_index=True)
+    df['series_id'] = df['series_id'].astype('category')
+    return df
+
+
+def _to_table(df):
+    df = df[list(SCHEMA.names)].sort_values(['year', 'series_id', 'month'])
+    df = df.astype({'series_id': str, 'year': 'int16', 'month': 'int8', 'value': 'float64'})
+    return pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+
+
+def write_store(df, store_dir=STORE_DIR, max_rows_per_group=64 * 1024):
+    """Write ``df`` to the store, replacing every year partition it covers."""
+    ds.write_dataset(
+        _to_table(df), store_dir, format='parquet', partitioning=PARTITIONING,
+        existing_data_behavior='delete_matching',
+        max_rows_per_group=max_rows_per_group,
+        min_rows_per_group=min(max_rows_per_group, 1024),
+        basename_template='part-{i}.parquet',
+    )
+
+
+def upsert_store(df, store_dir=STORE_DIR):
+    """Insert or replace the rows in ``df``, rewriting only their years."""
+    if df.empty:
+        return
+    years = (int(df['year'].min()), int(df['year'].max()))
+    if os.path.isdir(store_dir):
+        existing = load_observations(store_dir, years=years)
+        df = pd.concat([existing, df[list(SCHEMA.names)]], ignore_index=True)
+        df = df.astype({'series_id': str}).drop_duplicates(KEY_COLUMNS, keep='last')
+    write_store(df, store_dir)
+
+
+def open_store(store_dir=STORE_DIR):
+    """Return the store as a memory-mapped ``pyarrow.dataset.Dataset``."""
+    filesystem = pyarrow.fs.LocalFileSystem(use_mmap=True)
+    return ds.dataset(os.path.abspath(store_dir), format='parquet',
+                      partitioning=PARTITIONING, filesystem=filesystem)
+
+
+def store_filter(series=None, years=None):
+    """Build the pushdown filter for ``load_observations``.
+
+    ``series`` is one ID or a list of IDs, ``years`` an inclusive
+    ``(start, end)`` range.
+    """
+    expr = None
+    if years is not None:
+        start, end = years
+        expr = (pc.field('year') >= start) & (pc.field('year') <= end)
+    if series is not None:
+        if isinstance(series, str):
+            series = [series]
+        cond = pc.field('series_id').isin(list(series))
+        expr = cond if expr is None else expr & cond
+    return expr
+
+
+def load_table(store_dir=STORE_DIR, columns=None, series=None, years=None):
+    """Read the store as an Arrow table with column and filter pushdown."""
+    dataset = open_store(store_dir)
+    return dataset.to_table(columns=columns or SCHEMA.names,
+                            filter=store_filter(series, years))
+
+
+def load_observations(store_dir=STORE_DIR, columns=None, series=None, years=None):
+    """Read the store as a pandas frame; see ``load_table``."""
+    return load_table(store_dir, columns, series, years).to_pandas()
+
+
+def write_batches(batches, store_dir=STORE_DIR, max_rows_per_group=64 * 1024):
+    """Stream Arrow record batches in ``SCHEMA`` into the store.
+
+    Unlike ``write_store`` the rows are not sorted first, so nothing but
+    the current batch is held in memory. Year partitions the batches touch
+    are replaced.
+    """
+    ds.write_dataset(
+        batches, store_dir, schema=SCHEMA, format='parquet',
+        partitioning=PARTITIONING, existing_data_behavior='delete_matching',
+        max_rows_per_group=max_rows_per_group,
+        basename_template='part-{i}.parquet',
+    )
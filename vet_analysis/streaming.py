@@ -0,0 +1,223 @@
+"""Streaming parser for large BLS responses.
+
+``res.json()`` materializes the whole response, and building a list of
+dicts per observation multiplies that several times over. Here the body is
+scanned as it arrives: each ``Results.series[].data[]`` item is decoded on
+its own, written into preallocated typed column buffers, and handed out in
+fixed-size batches, so memory stays bounded by the batch size rather than
+the response size.
+
+Batches use the columnar store layout (``series_id``, ``year``, ``month``,
+``value``; see ``vet_analysis.store``) and can be written to it directly.
+"""
+import codecs
+import json
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from vet_analysis.ingestion import (BLS_API_URL, BLSRequestError, build_payloads,
+                                    make_session)
+from vet_analysis.store import SCHEMA
+
+DEFAULT_BATCH_ROWS = 64 * 1024
+DEFAULT_CHUNK_BYTES = 64 * 1024
+
+_STATUS = re.compile(r'"status"\s*:\s*"([^"]*)"')
+_SERIES_ID = re.compile(r'"seriesID"\s*:\s*"([^"]*)"')
+_DATA_START = re.compile(r'"data"\s*:\s*\[')
+# longest token the regexes above may need to see in one piece
+_KEEP_TAIL = 256
+
+# BLS period code -> store month (13 marks annual averages, quarters are
+# keyed on their last month as in vet_analysis.cleaning)
+PERIOD_MONTHS = {f"M{m:02d}": m for m in range(1, 14)}
+PERIOD_MONTHS.update({f"Q0{q}": 3 * q for q in range(1, 5)})
+PERIOD_MONTHS['Q05'] = 13
+
+
+def iter_items(chunks):
+    """Yield ``(series_id, item)`` for every observation in a BLS body.
+
+    ``chunks`` is any iterable of ``bytes`` or ``str`` pieces of the JSON
+    response, e.g. ``res.iter_content(...)`` or a file read in blocks.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    pieces = iter(chunks)
+    buf, pos = '', 0
+    series_id = None
+    in_data = False
+    status_checked = False
+    eof = False
+
+    def read_more():
+        nonlocal buf, pos, eof
+        for piece in pieces:
+            piece = text.decode(piece) if isinstance(piece, bytes) else piece
+            if piece:
+                buf = buf[pos:] + piece
+                pos = 0
+                return True
+        eof = True
+        return False
+
+    while True:
+        if not status_checked:
+            m = _STATUS.search(buf, pos)
+            if m is not None:
+                status_checked = True
+                if m.group(1) != 'REQUEST_SUCCEEDED':
+                    raise BLSRequestError(f"BLS rejected request: {m.group(1)}")
+        if not in_data:
+            m_sid = _SERIES_ID.search(buf, pos)
+            m_data = _DATA_START.search(buf, pos)
+            matches = [m for m in (m_sid, m_data) if m is not None]
+            if not matches:
+                pos = max(pos, len(buf) - _KEEP_TAIL)
+                if not read_more():
+                    return
+                continue
+            m = min(matches, key=lambda m: m.start())
+            if m is m_sid:
+                series_id = m.group(1)
+            else:
+                in_data = True
+            pos = m.end()
+            continue
+
+        while pos < len(buf) and buf[pos] in ' \t\r\n,':
+            pos += 1
+        if pos == len(buf):
+            if not read_more():
+                raise ValueError("response ended inside a data array")
+            continue
+        if buf[pos] == ']':
+            in_data = False
+            pos += 1
+            continue
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof or not read_more():
+                raise
+            continue
+        pos = end
+        yield series_id, item
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        # BLS uses '-' for unavailable observations
+        return np.nan
+
+
+class ColumnBuffers:
+    """Preallocated typed columns that are emptied into batches."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.series = np.empty(rows, dtype='int32')
+        self.year = np.empty(rows, dtype='int16')
+        self.month = np.empty(rows, dtype='int8')
+        self.value = np.empty(rows, dtype='float64')
+        self.n = 0
+
+    def append(self, series_code, year, month, value):
+        i = self.n
+        self.series[i] = series_code
+        self.year[i] = year
+        self.month[i] = month
+        self.value[i] = value
+        self.n = i + 1
+        return self.n == self.rows
+
+    def to_frame(self, series_ids):
+        n = self.n
+        self.n = 0
+        return pd.DataFrame({
+            'series_id': pd.Categorical.from_codes(self.series[:n].copy(), categories=series_ids),
+            'year': self.year[:n].copy(),
+            'month': self.month[:n].copy(),
+            'value': self.value[:n].copy(),
+        })
+
+    def to_record_batch(self, series_ids):
+        n = self.n
+        self.n = 0
+        # the slices are copied because pa.array would wrap the numpy memory,
+        # and the buffers are overwritten by the next batch
+        return pa.RecordBatch.from_arrays([
+            pa.DictionaryArray.from_arrays(pa.array(self.series[:n].copy()),
+                                           pa.array(series_ids, pa.string())),
+            pa.array(self.year[:n].copy()),
+            pa.array(self.month[:n].copy()),
+            pa.array(self.value[:n].copy()),
+        ], schema=SCHEMA)
+
+
+def iter_observation_batches(chunks, batch_rows=DEFAULT_BATCH_ROWS, as_arrow=False,
+                             series_ids=None):
+    """Parse a BLS body into batches of at most ``batch_rows`` observations.
+
+    Yields pandas frames, or Arrow ``RecordBatch``es in the store schema
+    when ``as_arrow`` is set. ``series_ids`` may be a list shared across
+    calls so series codes stay stable between responses. Observations whose
+    period code has no store month (semiannual ``S01``-``S03``) are skipped.
+    """
+    series_ids = [] if series_ids is None else series_ids
+    codes = {sid: i for i, sid in enumerate(series_ids)}
+    buffers = ColumnBuffers(batch_rows)
+    emit = buffers.to_record_batch if as_arrow else buffers.to_frame
+    for sid, item in iter_items(chunks):
+        month = PERIOD_MONTHS.get(item['period'])
+        if month is None:
+            continue
+        code = codes.get(sid)
+        if code is None:
+            code = codes[sid] = len(series_ids)
+            series_ids.append(sid)
+        if buffers.append(code, int(item['year']), month, _to_float(item['value'])):
+            yield emit(list(series_ids))
+    if buffers.n:
+        yield emit(list(series_ids))
+
+
+def iter_file_chunks(path, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """Read ``path`` in ``chunk_bytes`` blocks."""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_bytes)
+            if not chunk:
+                return
+            yield chunk
+
+
+def stream_fetch(series_ids, start_year, end_year, api_key=None, *, session=None,
+                 url=BLS_API_URL, timeout=60, batch_rows=DEFAULT_BATCH_ROWS,
+                 as_arrow=False, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """Fetch series like ``ingestion.fetch_series`` but yield bounded batches.
+
+    Payloads are requested one after another with ``stream=True`` so only
+    one response is in flight and none is ever held in memory whole.
+    """
+    payloads = build_payloads(series_ids, start_year, end_year, api_key)
+    own_session = session is None
+    if own_session:
+        session = make_session(pool_size=1)
+    shared_ids = []
+    try:
+        for payload in payloads:
+            with session.post(url, json=payload, timeout=timeout, stream=True) as res:
+                if res.status_code != 200:
+                    raise BLSRequestError(f"Failed to retrieve data: {res.status_code}")
+                yield from iter_observation_batches(
+                    res.iter_content(chunk_size=chunk_bytes), batch_rows, as_arrow,
+                    series_ids=shared_ids)
+    finally:
+        if own_session:
+            session.close()
@@ -0,0 +1,172 @@
+"""Incremental sync of BLS series into the local CSV files in ``data/``.
+
+Each monthly release only adds one period, so rather than re-downloading the
+full history we look at the newest ``year``/``period`` already on disk and
+request only the years from there on. BLS revises recent observations (and
+re-benchmarks seasonally adjusted CPS series every January), so the window
+also reaches ``lookback_months`` back from the latest stored period and any
+revised values in that window are upserted.
+
+Files are kept oldest first so that an upsert only touches the tail of the
+file: everything before the lookback window is left in place and the file
+is truncated and rewritten from the first row inside the window.
+"""
+import datetime
+import os
+from dataclasses import dataclass
+
+import pandas as pd
+
+from vet_analysis.ingestion import fetch_series
+
+BLS_SERIES_FILES = {
+    "LNS13049526": 'data/veteran_unemployment_bls.csv',
+    "LNS14049526": 'data/veteran_unemployment_rates_bls.csv',
+}
+
+CSV_COLUMNS = ['year', 'period', 'value']
+DEFAULT_LOOKBACK_MONTHS = 12
+
+
+@dataclass
+class SyncResult:
+    series_id: str
+    start_year: int
+    end_year: int
+    fetched: int = 0
+    inserted: int = 0
+    revised: int = 0
+
+
+def period_key(year, period):
+    """Sortable integer key for a BLS ``year``/``period`` pair, e.g. 202411."""
+    return int(year) * 100 + int(str(period)[1:])
+
+
+def latest_period(path):
+    """Return ``(year, period)`` of the newest row in ``path`` or ``None``."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    keys = pd.read_csv(path, usecols=['year', 'period'], dtype=str)
+    if keys.empty:
+        return None
+    # M13 annual averages sort after December of the same year, which is
+    # where BLS publishes them
+    key = keys['year'].astype(int) * 100 + keys['period'].str[1:].astype(int)
+    row = keys.iloc[int(key.to_numpy().argmax())]
+    return int(row['year']), row['period']
+
+
+def sync_window(latest, end_year, lookback_months=DEFAULT_LOOKBACK_MONTHS,
+                default_start_year=2014):
+    """Return the ``(start_year, end_year)`` window to request for a series."""
+    if latest is None:
+        return default_start_year, end_year
+    year, period = latest
+    month = min(int(period[1:]), 12)
+    start = (year * 12 + month - 1) - lookback_months
+    return min(start // 12, end_year), end_year
+
+
+def _is_sorted_ascending(path):
+    keys = pd.read_csv(path, usecols=['year', 'period'], dtype=str)
+    key = keys['year'].astype(int) * 100 + keys['period'].str[1:].astype(int)
+    return key.is_monotonic_increasing
+
+
+def _format_rows(rows):
+    return ''.join(f"{y},{p},{v}\n" for y, p, v in rows)
+
+
+def upsert_csv(path, new_rows):
+    """Upsert ``new_rows`` (``year``/``period``/``value``) into ``path``.
+
+    Returns ``(inserted, revised)``. Only the tail of the file from the
+    oldest incoming period onwards is rewritten.
+    """
+    new_rows = new_rows[CSV_COLUMNS].astype(str)
+    if new_rows.empty:
+        return 0, 0
+    incoming = {
+        period_key(y, p): (y, p, v)
+        for y, p, v in new_rows.itertuples(index=False, name=None)
+    }
+    first_key = min(incoming)
+
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        with open(path, 'w', newline='') as f:
+            f.write(','.join(CSV_COLUMNS) + '\n')
+            f.write(_format_rows(incoming[k] for k in sorted(incoming)))
+        return len(incoming), 0
+
+    if not _is_sorted_ascending(path):
+        # files written by the full download are newest first; reorder once
+        # so later syncs can append at the tail
+        existing = pd.read_csv(path, dtype=str)
+        existing['_key'] = existing['year'].astype(int) * 100 + existing['period'].str[1:].astype(int)
+        existing.sort_values('_key').drop(columns='_key').to_csv(path, index=False)
+
+    tail = {}
+    offset = None
+    with open(path, 'rb') as f:
+        pos = len(f.readline())
+        for line in f:
+            year, period, value = line.decode().rstrip('\r\n').split(',', 2)
+            key = period_key(year, period)
+            if key >= first_key:
+                if offset is None:
+                    offset = pos
+                tail[key] = (year, period, value)
+            pos += len(line)
+    if offset is None:
+        offset = pos
+
+    inserted = sum(1 for k in incoming if k not in tail)
+    revised = sum(1 for k, row in incoming.items()
+                  if k in tail and tail[k][2] != row[2])
+    if inserted == 0 and revised == 0:
+        return 0, 0
+
+    tail.update(incoming)
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        f.truncate()
+        f.write(_format_rows(tail[k] for k in sorted(tail)).encode())
+    return inserted, revised
+
+
+def sync_series(series_files=None, api_key=None, *, end_year=None,
+                lookback_months=DEFAULT_LOOKBACK_MONTHS, default_start_year=2014,
+                store_dir=None, fetch=fetch_series, **fetch_kwargs):
+    """Bring each series in ``series_files`` up to date on disk.
+
+    ``series_files`` maps series IDs to CSV paths and defaults to
+    ``BLS_SERIES_FILES``. Series that need the same year window share one
+    batched fetch. With ``store_dir`` the fetched window is also upserted
+    into the columnar store. Returns a ``SyncResult`` per series.
+    """
+    series_files = dict(series_files or BLS_SERIES_FILES)
+    end_year = end_year or datetime.date.today().year
+
+    windows = {}
+    for sid, path in series_files.items():
+        window = sync_window(latest_period(path), end_year, lookback_months,
+                             default_start_year)
+        windows.setdefault(window, []).append(sid)
+
+    results = {}
+    for (start, end), sids in windows.items():
+        df = fetch(sids, start, end, api_key=api_key, **fetch_kwargs)
+        for sid in sids:
+            rows = df[df['series_id'] == sid]
+            inserted, revised = upsert_csv(series_files[sid], rows)
+            results[sid] = SyncResult(sid, start, end, len(rows), inserted, revised)
+        if store_dir is not None and not df.empty:
+            from vet_analysis.store import upsert_store
+            upsert_store(pd.DataFrame({
+                'series_id': df['series_id'],
+                'year': df['year'].astype(int),
+                'month': df['period'].str.slice(1).astype(int),
+                'value': pd.to_numeric(df['value'], errors='coerce'),
+            }), store_dir)
+    return results
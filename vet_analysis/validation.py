@@ -0,0 +1,517 @@
+"""Data-quality rules checked on every ingested and merged frame.
+
+A ``Schema`` is a list of rules. Row rules (``NotNull``, ``InRange``,
+``Allowed``, ``UniqueKey``, ``MonthlyGaps``) each reduce to one boolean
+array over the rows, True where a row violates the rule; frame rules
+(``Columns``, ``FiscalYearCoverage``) report what is missing.
+``Schema.validate`` evaluates every rule of a schema in one pass over the
+frame: each column is converted to a NumPy array once, and the integer sort
+key behind the duplicate and gap checks is built once per key and reused.
+
+Keys are packed into one ``int64`` per row (categorical codes, period
+ordinals and integers, mixed-radix), so duplicates and gaps are a single
+``np.diff`` when the frame is already in key order (as the loaders and
+``observation_table`` leave it) and one ``argsort`` otherwise.
+
+Pipeline stages take a schema as ``check`` (see
+``vet_analysis.pipeline``), so a failed error-level rule stops the run
+before the merge, plotting and modelling stages.
+"""
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+SEVERITIES = ('error', 'warn')
+EXAMPLE_ROWS = 5
+
+
+class ValidationError(ValueError):
+    """A frame failed one or more error-level rules."""
+
+    def __init__(self, report):
+        super().__init__(str(report))
+        self.report = report
+
+
+class _MissingColumn(KeyError):
+    pass
+
+
+def _dtype_matches(dtype, spec):
+    if spec == 'int':
+        return pd.api.types.is_integer_dtype(dtype)
+    if spec == 'float':
+        return pd.api.types.is_float_dtype(dtype)
+    if spec == 'number':
+        return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+    if spec == 'str':
+        return pd.api.types.is_string_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype)
+    if spec == 'category':
+        return isinstance(dtype, pd.CategoricalDtype)
+    return str(dtype) == spec
+
+
+class _Frame:
+    """Per-validation cache of column arrays and packed sort keys."""
+
+    def __init__(self, df):
+        self.df = df
+        self.n = len(df)
+        self._arrays = {}
+        self._codes = {}
+        self._keys = {}
+        self._packs = {}
+        self._spans = {}
+
+    def has(self, name):
+        return name in self.df.columns or name == self.df.index.name
+
+    def series(self, name):
+        if name in self.df.columns:
+            return self.df[name]
+        if name == self.df.index.name:
+            return self.df.index.to_series(index=self.df.index)
+        raise _MissingColumn(name)
+
+    def array(self, name):
+        """Column as a float/int/object array (categoricals as their values)."""
+        if name not in self._arrays:
+            s = self.series(name)
+            if _dtype_matches(s.dtype, 'number'):
+                self._arrays[name] = s.to_numpy(dtype='float64', na_value=np.nan)
+            else:
+                self._arrays[name] = s.to_numpy()
+        return self._arrays[name]
+
+    def isna(self, name):
+        s = self.series(name)
+        if pd.api.types.is_float_dtype(s.dtype):
+            return np.isnan(self.array(name))
+        return s.isna().to_numpy()
+
+    def codes(self, name):
+        """Non-negative integer codes and their radix; -1 marks missing values."""
+        if name not in self._codes:
+            s = self.series(name)
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                codes, radix = s.cat.codes.to_numpy().astype('int64'), len(s.cat.categories)
+            elif isinstance(s.dtype, pd.PeriodDtype):
+                codes = s.array.asi8.astype('int64')
+                codes, radix = self._shift(codes, codes != np.iinfo('int64').min)
+            elif pd.api.types.is_integer_dtype(s.dtype) and not s.hasnans:
+                codes, radix = self._shift(s.to_numpy().astype('int64'), None)
+            else:
+                codes, uniques = pd.factorize(s)
+                codes, radix = codes.astype('int64'), len(uniques)
+            self._codes[name] = codes, radix
+        return self._codes[name]
+
+    @staticmethod
+    def _shift(values, valid):
+        if valid is not None and not valid.all():
+            present = values[valid]
+            lo = present.min() if len(present) else 0
+            hi = present.max() if len(present) else 0
+            return np.where(valid, values - lo, -1), int(hi - lo + 1)
+        if len(values) == 0:
+            return values, 1
+        lo = values.min()
+        return values - lo, int(values.max() - lo + 1)
+
+    def _packed(self, columns):
+        """Mixed-radix ``int64`` of ``columns`` and its null mask.
+
+        Prefixes are cached, so ``(series_id, period)`` is packed once for
+        both the gap check and the ``(series_id, period, freq)`` key.
+        """
+        if columns in self._packs:
+            return self._packs[columns]
+        codes, radix = self.codes(columns[-1])
+        if len(columns) == 1:
+            packed, missing, span = np.zeros(self.n, dtype='int64'), None, 1
+        else:
+            prefix = self._packed(columns[:-1])
+            if prefix is None:
+                return None
+            (packed, missing), span = prefix, self._spans[columns[:-1]]
+            packed = packed * (radix + 1)
+        span *= radix + 1
+        if span >= 2 ** 62:
+            self._packs[columns] = None
+            return None
+        packed += codes
+        packed += 1
+        if len(codes) and codes.min() < 0:
+            missing = (codes < 0) if missing is None else missing | (codes < 0)
+        self._packs[columns], self._spans[columns] = (packed, missing), span
+        return self._packs[columns]
+
+    def key(self, columns, where=None):
+        """Packed key of ``columns`` with the rows in key order.
+
+        ``where`` is a ``(cache name, boolean mask)`` pair restricting the
+        rows. Returns a ``_Key``, or ``None`` when the key does not fit 62
+        bits.
+        """
+        cache_key = (tuple(columns), where[0] if where is not None else None)
+        if cache_key in self._keys:
+            return self._keys[cache_key]
+        packed = self._packed(tuple(columns))
+        if packed is None:
+            self._keys[cache_key] = None
+            return None
+        packed, missing = packed
+        positions = None
+        if where is not None and not where[1].all():
+            positions = np.flatnonzero(where[1])
+            packed = packed[positions]
+            missing = None if missing is None else missing[positions]
+        step = np.diff(packed)
+        if not (step >= 0).all():
+            if (step <= 0).all():
+                # newest first, as the BLS CSVs are written
+                order = np.arange(len(packed))[::-1]
+            else:
+                order = self._longer_order(tuple(columns)) if positions is None else None
+                if order is None:
+                    order = np.argsort(packed, kind='stable')
+            positions = order if positions is None else positions[order]
+            packed = packed[order]
+            missing = None if missing is None else missing[order]
+            step = np.diff(packed)
+        self._keys[cache_key] = _Key(positions, packed, step, missing)
+        return self._keys[cache_key]
+
+    def _longer_order(self, columns):
+        """Row order of an already sorted key that ``columns`` is a prefix of."""
+        for (cached, where), key in self._keys.items():
+            if where is None and key is not None and cached[:len(columns)] == columns \
+                    and key.positions is not None:
+                return key.positions
+        return None
+
+
+@dataclass
+class _Key:
+    """Sorted packed keys; ``positions`` maps them to frame rows (``None``: same order)."""
+    positions: np.ndarray
+    packed: np.ndarray
+    step: np.ndarray
+    missing: np.ndarray
+
+    def rows(self, i):
+        """Frame row positions of sorted key positions ``i``."""
+        return i if self.positions is None else self.positions[i]
+
+
+@dataclass(frozen=True)
+class Columns:
+    """Required columns and their dtypes.
+
+    A dtype is a name such as ``'period[M]'``, or one of ``'int'``,
+    ``'float'``, ``'number'``, ``'str'`` (strings or categoricals),
+    ``'category'`` and ``'any'``.
+    """
+    dtypes: tuple
+    severity: str = 'error'
+
+    def __init__(self, dtypes, severity='error'):
+        object.__setattr__(self, 'dtypes', tuple(dict(dtypes).items()))
+        object.__setattr__(self, 'severity', severity)
+
+    @property
+    def label(self):
+        return "columns"
+
+    def evaluate(self, frame):
+        problems = []
+        for name, spec in self.dtypes:
+            if not frame.has(name):
+                problems.append(f"{name} missing")
+            elif spec != 'any' and not _dtype_matches(frame.series(name).dtype, spec):
+                problems.append(f"{name} is {frame.series(name).dtype}, expected {spec}")
+        return len(problems), '; '.join(problems), None
+
+
+@dataclass(frozen=True)
+class NotNull:
+    columns: tuple
+    severity: str = 'error'
+
+    @property
+    def label(self):
+        return f"not_null({', '.join(self.columns)})"
+
+    def evaluate(self, frame):
+        mask = np.zeros(frame.n, dtype=bool)
+        for name in self.columns:
+            mask |= frame.isna(name)
+        return int(mask.sum()), "", mask
+
+
+@dataclass(frozen=True)
+class InRange:
+    """``min <= column <= max``; nulls pass (see ``NotNull``)."""
+    column: str
+    min: float = None
+    max: float = None
+    severity: str = 'error'
+
+    @property
+    def label(self):
+        lo = '' if self.min is None else f"{self.min} <= "
+        hi = '' if self.max is None else f" <= {self.max}"
+        return f"range({lo}{self.column}{hi})"
+
+    def evaluate(self, frame):
+        v = frame.array(self.column)
+        with np.errstate(invalid='ignore'):
+            if self.min is not None and self.max is not None:
+                mask = (v < self.min) | (v > self.max)
+            elif self.min is not None:
+                mask = v < self.min
+            elif self.max is not None:
+                mask = v > self.max
+            else:
+                mask = np.zeros(frame.n, dtype=bool)
+        return int(mask.sum()), "", mask
+
+
+@dataclass(frozen=True)
+class Allowed:
+    """Values of ``column`` come from ``values``; nulls pass."""
+    column: str
+    values: tuple
+    severity: str = 'error'
+
+    @property
+    def label(self):
+        return f"allowed({self.column})"
+
+    def evaluate(self, frame):
+        s = frame.series(self.column)
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            ok = np.append(np.isin(np.asarray(s.cat.categories, dtype=object),
+                                   list(self.values)), True)
+            mask = ~ok[s.cat.codes.to_numpy()]
+        else:
+            mask = ~(s.isin(list(self.values)) | s.isna()).to_numpy()
+        return int(mask.sum()), "", mask
+
+
+@dataclass(frozen=True)
+class UniqueKey:
+    columns: tuple
+    severity: str = 'error'
+
+    @property
+    def label(self):
+        return f"unique({', '.join(self.columns)})"
+
+    def evaluate(self, frame):
+        key = frame.key(self.columns)
+        if key is None:
+            columns = {name: frame.series(name).to_numpy() for name in self.columns}
+            mask = pd.DataFrame(columns).duplicated().to_numpy()
+            return int(mask.sum()), "", mask
+        mask = np.zeros(frame.n, dtype=bool)
+        mask[key.rows(np.flatnonzero(key.step == 0) + 1)] = True
+        return int(mask.sum()), "", mask
+
+
+@dataclass(frozen=True)
+class MonthlyGaps:
+    """No month is skipped between a series' first and last monthly row.
+
+    ``period`` is a ``period[M]`` column (or the index); rows whose
+    ``freq`` is not ``'M'`` are ignored. A violating row is the first one
+    after a gap.
+    """
+    period: str = 'period'
+    by: tuple = ()
+    freq_column: str = 'freq'
+    severity: str = 'error'
+
+    @property
+    def label(self):
+        by = f" by {', '.join(self.by)}" if self.by else ''
+        return f"monthly_gaps({self.period}{by})"
+
+    def evaluate(self, frame):
+        where = None
+        if frame.has(self.freq_column):
+            freq = frame.series(self.freq_column)
+            where = ('freq=M', (freq == 'M').to_numpy())
+        key = frame.key(tuple(self.by) + (self.period,), where)
+        if key is None:
+            raise ValueError(f"{self.label}: key does not fit 62 bits")
+        # consecutive months of one group differ by exactly one in the packed key;
+        # only the few larger steps need their groups compared
+        radix = frame.codes(self.period)[1] + 1
+        i = np.flatnonzero(key.step > 1)
+        gap = key.packed[i] // radix == key.packed[i + 1] // radix
+        if key.missing is not None:
+            gap &= ~key.missing[i] & ~key.missing[i + 1]
+        i = i[gap]
+        mask = np.zeros(frame.n, dtype=bool)
+        mask[key.rows(i + 1)] = True
+        missing_months = int((key.step[i] - 1).sum())
+        detail = f"{missing_months} missing month(s)" if missing_months else ""
+        return int(mask.sum()), detail, mask
+
+
+@dataclass(frozen=True)
+class FiscalYearCoverage:
+    """Every fiscal year from ``first`` to ``last`` has a row.
+
+    Only rows with a non-null ``value`` count when it is given. ``first``
+    and ``last`` default to the earliest and latest year present, so a
+    year dropped from the middle (e.g. by an outlier filter) is caught.
+    """
+    column: str = 'fiscal_year'
+    value: str = None
+    first: int = None
+    last: int = None
+    severity: str = 'error'
+
+    @property
+    def label(self):
+        return f"fiscal_year_coverage({self.column})"
+
+    def evaluate(self, frame):
+        years = frame.array(self.column)
+        keep = ~np.isnan(years)
+        if self.value is not None:
+            keep &= ~frame.isna(self.value)
+        years = years[keep].astype('int64')
+        if len(years) == 0:
+            return 1, "no fiscal years", None
+        lo, hi = int(years.min()), int(years.max())
+        first = lo if self.first is None else self.first
+        last = hi if self.last is None else self.last
+        present = np.zeros(max(hi, last) - min(lo, first) + 1, dtype=bool)
+        present[years - min(lo, first)] = True
+        wanted = np.arange(first, last + 1)
+        missing = wanted[~present[wanted - min(lo, first)]]
+        detail = f"missing fiscal years {missing.tolist()}" if len(missing) else ""
+        return len(missing), detail, None
+
+
+@dataclass
+class RuleResult:
+    rule: str
+    severity: str
+    failed: int
+    detail: str = ''
+    examples: list = field(default_factory=list)
+
+
+@dataclass
+class ValidationReport:
+    name: str
+    rows: int
+    results: list
+    elapsed: float = 0.0
+
+    @property
+    def errors(self):
+        return [r for r in self.results if r.failed and r.severity == 'error']
+
+    @property
+    def warnings(self):
+        return [r for r in self.results if r.failed and r.severity == 'warn']
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def to_frame(self):
+        return pd.DataFrame([vars(r) for r in self.results]).set_index('rule')
+
+    def raise_for_errors(self):
+        if self.errors:
+            raise ValidationError(self)
+        return self
+
+    def __str__(self):
+        lines = [f"{self.name}: {self.rows} rows, {len(self.errors)} error(s), "
+                 f"{len(self.warnings)} warning(s) in {self.elapsed * 1000:.1f} ms"]
+        for r in self.errors + self.warnings:
+            detail = f" ({r.detail})" if r.detail else ""
+            examples = f", e.g. rows {r.examples}" if r.examples else ""
+            lines.append(f"  {r.severity}: {r.rule} failed {r.failed}{detail}{examples}")
+        return '\n'.join(lines)
+
+
+@dataclass(frozen=True)
+class Schema:
+    name: str
+    rules: tuple
+
+    def __init__(self, name, rules):
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'rules', tuple(rules))
+        for rule in self.rules:
+            if rule.severity not in SEVERITIES:
+                raise ValueError(f"unknown severity {rule.severity!r} in {rule.label}")
+
+    def validate(self, df):
+        """Evaluate every rule on ``df`` and return a ``ValidationReport``."""
+        started = time.perf_counter()
+        frame = _Frame(df)
+        results = []
+        for rule in self.rules:
+            try:
+                failed, detail, mask = rule.evaluate(frame)
+            except _MissingColumn as e:
+                failed, detail, mask = 1, f"column {e.args[0]!r} missing", None
+            examples = []
+            if failed and mask is not None:
+                examples = df.index[np.flatnonzero(mask)[:EXAMPLE_ROWS]].tolist()
+            results.append(RuleResult(rule.label, rule.severity, failed, detail, examples))
+        return ValidationReport(self.name, len(df), results, time.perf_counter() - started)
+
+    def __call__(self, df):
+        """Validate ``df`` and raise ``ValidationError`` on any error-level failure."""
+        return self.validate(df).raise_for_errors()
+
+
+def observation_rules(minimum=0.0, maximum=None, columns=None):
+    """Rules for a canonical frame (``vet_analysis.cleaning``) or the long table."""
+    return [
+        Columns({'series_id': 'str', 'period': 'period[M]', 'freq': 'category',
+                 'value': 'number', **(columns or {})}),
+        NotNull(('series_id', 'period', 'value')),
+        Allowed('freq', ('M', 'Q', 'A', 'FY')),
+        UniqueKey(('series_id', 'period', 'freq')),
+        MonthlyGaps('period', by=('series_id',)),
+        InRange('value', minimum, maximum),
+    ]
+
+
+BLS_LEVEL = Schema('bls_level', observation_rules())
+BLS_RATE = Schema('bls_rate', observation_rules(maximum=100.0))
+FRED_RATE = Schema('fred_rate', observation_rules(maximum=100.0))
+OBSERVATIONS = Schema('observations',
+                      observation_rules(columns={'year': 'int', 'source': 'str'}))
+SPENDING = Schema('spending', [
+    Columns({'fiscal_year': 'int', 'total_obligations': 'number'}),
+    NotNull(('fiscal_year', 'total_obligations')),
+    UniqueKey(('fiscal_year',)),
+    InRange('total_obligations', min=0.0),
+    FiscalYearCoverage('fiscal_year'),
+])
+PANEL = Schema('panel', [
+    Columns({'period': 'period[M]', 'vet_unemployed': 'float',
+             'vet_unemployment_rate': 'float', 'UNRATE': 'float',
+             'total_obligations': 'float', 'year': 'int', 'fiscal_year': 'int'}),
+    UniqueKey(('period',)),
+    MonthlyGaps('period'),
+    InRange('vet_unemployed', min=0.0),
+    InRange('vet_unemployment_rate', 0.0, 100.0),
+    InRange('UNRATE', 0.0, 100.0),
+    InRange('total_obligations', min=0.0),
+    FiscalYearCoverage('fiscal_year', value='total_obligations'),
+])